@@ -1,4 +1,16 @@
-from django.urls import path
+from django.urls import path, re_path
+from .views import PortfolioAnalyticsView, CorrelationView, PortfolioRiskView
 
-# Placeholder URL patterns for analytics app. Add routes here as needed.
-urlpatterns = []
+app_name = 'analytics'
+
+urlpatterns = [
+    # Portfolio performance
+    path('portfolio/', PortfolioAnalyticsView.as_view(), name='portfolio-analytics'),
+    re_path(r'^portfolio/?$', PortfolioAnalyticsView.as_view(), name='portfolio-analytics-noslash'),
+
+    # Co-movement and risk
+    path('correlation/', CorrelationView.as_view(), name='correlation'),
+    re_path(r'^correlation/?$', CorrelationView.as_view(), name='correlation-noslash'),
+    path('risk/', PortfolioRiskView.as_view(), name='portfolio-risk'),
+    re_path(r'^risk/?$', PortfolioRiskView.as_view(), name='portfolio-risk-noslash'),
+]
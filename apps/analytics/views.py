@@ -0,0 +1,171 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from apps.portfolio.models import PortfolioHolding, Watchlist
+from services.analytics.correlation import ReturnMatrixBuilding, correlation_report, portfolio_risk
+from services.analytics.portfolio import get_portfolio_analytics
+from services.portfolio.valuation import value_holdings
+from utils.constants import (
+    ANALYTICS_PERIODS, RISK_FREE_RATE, DEFAULT_CORRELATION_WINDOW,
+    MAX_CORRELATION_SYMBOLS, MAX_ROLLING_CORRELATION_SYMBOLS, RETURN_MATRIX_LOOKBACK_DAYS,
+)
+from utils.responses import success_response, error_response
+
+
+def _risk_free_rate(request):
+    """riskFreeRate query parameter as an annual fraction (0.04 = 4%)"""
+    value = float(request.query_params.get('riskFreeRate', RISK_FREE_RATE))
+    if not -1 < value < 1:
+        raise ValueError('riskFreeRate must be an annual fraction between -1 and 1')
+    return value
+
+
+def _window(request):
+    """window query parameter in trading days"""
+    window = int(request.query_params.get('window', DEFAULT_CORRELATION_WINDOW))
+    if not 2 <= window <= RETURN_MATRIX_LOOKBACK_DAYS:
+        raise ValueError(f'window must be between 2 and {RETURN_MATRIX_LOOKBACK_DAYS} days')
+    return window
+
+
+def _requested_symbols(request):
+    """Symbols from ?symbols=A,B or the user's portfolio / watchlist (?source=)"""
+    symbols = request.query_params.get('symbols')
+    if symbols:
+        return list(dict.fromkeys(s.strip().upper() for s in symbols.split(',') if s.strip()))
+    if request.query_params.get('source') == 'watchlist':
+        items = Watchlist.objects.filter(user=request.user)
+    else:
+        items = PortfolioHolding.objects.filter(user=request.user)
+    return sorted(items.values_list('stock_id', flat=True))
+
+
+class PortfolioAnalyticsView(APIView):
+    """Portfolio equity curve, returns, volatility, Sharpe ratio, drawdown and contributions"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """GET /api/analytics/portfolio?period=1y&riskFreeRate=0.04"""
+        period = request.query_params.get('period', '1y')
+        if period not in ANALYTICS_PERIODS:
+            return Response(
+                error_response(message=f"period must be one of: {', '.join(ANALYTICS_PERIODS)}"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            risk_free_rate = _risk_free_rate(request)
+        except ValueError as e:
+            return Response(
+                error_response(message=f"Invalid riskFreeRate: {e}"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            data = get_portfolio_analytics(request.user, period=period, risk_free_rate=risk_free_rate)
+            return Response(success_response(data=data))
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error computing portfolio analytics: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class CorrelationView(APIView):
+    """Correlation and covariance matrices of daily returns"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        GET /api/analytics/correlation?symbols=AAPL,MSFT,GOOGL&window=60&rolling=true
+        Without symbols, uses the portfolio holdings (or ?source=watchlist).
+        """
+        try:
+            window = _window(request)
+        except ValueError as e:
+            return Response(
+                error_response(message=f"Invalid window: {e}"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        symbols = _requested_symbols(request)
+        if len(symbols) < 2:
+            return Response(
+                error_response(message='At least two symbols are required'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(symbols) > MAX_CORRELATION_SYMBOLS:
+            return Response(
+                error_response(message=f'At most {MAX_CORRELATION_SYMBOLS} symbols are allowed'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rolling = str(request.query_params.get('rolling', '')).lower() in ['1', 'true']
+        if rolling and len(symbols) > MAX_ROLLING_CORRELATION_SYMBOLS:
+            return Response(
+                error_response(message=f'Rolling correlation supports at most {MAX_ROLLING_CORRELATION_SYMBOLS} symbols'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            data = correlation_report(symbols, window, rolling=rolling)
+            return Response(success_response(data=data))
+        except ReturnMatrixBuilding as e:
+            return Response(error_response(message=str(e)), status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error computing correlations: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class PortfolioRiskView(APIView):
+    """Parametric VaR and diversification ratio of the user's portfolio"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """GET /api/analytics/risk?window=252&confidence=0.95&horizon=1"""
+        try:
+            window = _window(request)
+            confidence = float(request.query_params.get('confidence', 0.95))
+            horizon = int(request.query_params.get('horizon', 1))
+            if not 0.5 < confidence < 1 or not 1 <= horizon <= 250:
+                raise ValueError('confidence must be in (0.5, 1) and horizon between 1 and 250 days')
+        except ValueError as e:
+            return Response(
+                error_response(message=f"Invalid parameters: {e}"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            holdings = list(PortfolioHolding.objects.filter(user=request.user).select_related('stock'))
+            valuations = value_holdings(holdings)
+
+            # Values in different currencies cannot be weighted together
+            groups = {}
+            for holding in holdings:
+                groups.setdefault(holding.stock.currency or 'USD', []).append(holding)
+
+            portfolios = []
+            for currency, group in sorted(groups.items()):
+                symbols = [h.stock_id for h in group]
+                values = [float(valuations[h.pk]['current_value']) for h in group]
+                if sum(values) <= 0:
+                    continue
+                risk = portfolio_risk(symbols, values, window, confidence=confidence, horizon=horizon)
+                total = sum(value for symbol, value in zip(symbols, values) if symbol in risk['symbols'])
+                risk.update({
+                    'currency': currency,
+                    'value': round(total, 2),
+                    'valueAtRiskAmount': round(total * risk['valueAtRisk'], 2) if risk['symbols'] else None,
+                })
+                portfolios.append(risk)
+
+            return Response(success_response(data={'portfolios': portfolios}))
+        except ReturnMatrixBuilding as e:
+            return Response(error_response(message=str(e)), status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error computing portfolio risk: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
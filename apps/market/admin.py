@@ -4,7 +4,7 @@
 from django.contrib import admin
 from .models import (
     Stock, StockPrice, TechnicalIndicator, 
-    MarketScanResult, NewsArticle, Sentiment, StockPrediction
+    MarketScanResult, ScanRun, NewsArticle, Sentiment, StockPrediction
 )
 
 @admin.register(Stock)
@@ -31,9 +31,17 @@ class TechnicalIndicatorAdmin(admin.ModelAdmin):
     date_hierarchy = 'timestamp'
     ordering = ['-timestamp']
 
+@admin.register(ScanRun)
+class ScanRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'timeframe', 'status', 'result_count', 'started_at', 'finished_at']
+    list_filter = ['timeframe', 'status', 'started_at']
+    date_hierarchy = 'started_at'
+    ordering = ['-started_at']
+    readonly_fields = ['started_at']
+
 @admin.register(MarketScanResult)
 class MarketScanResultAdmin(admin.ModelAdmin):
-    list_display = ['stock', 'timeframe', 'price', 'change_percent', 'volume_ratio', 'trend', 'timestamp']
+    list_display = ['stock', 'timeframe', 'scan_run', 'price', 'change_percent', 'volume_ratio', 'trend', 'timestamp']
     list_filter = ['timeframe', 'trend', 'is_unusual_volume', 'is_breakout', 'timestamp']
     search_fields = ['stock__symbol', 'stock__name']
     date_hierarchy = 'timestamp'
@@ -0,0 +1,257 @@
+"""
+Async variants of the upstream-bound market views.
+
+Same URLs, parameters and responses as their counterparts in views.py, but
+symbol resolution, quotes, history and news are awaited through the async
+fetcher and resolver, and database access goes through the async ORM, so a
+request waiting on Yahoo or NewsAPI holds no worker thread. Sync-only work
+(yfinance company info, TextBlob, the LSTM model) runs in worker threads
+within the 'blocking' concurrency limit. Routed when MARKET_ASYNC_VIEWS is on.
+"""
+import pandas as pd
+from asgiref.sync import sync_to_async
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+
+from .models import Stock, StockPrice, Sentiment
+from .views import (
+    AIPredictionView, AI_MIN_HISTORY, AI_FORECAST_STEPS,
+    _recent_news, _article_sentiments_queryset, _first_sentiment_per_article,
+    _quick_sentiments, _news_payload, _history_frame, _ai_prediction_data,
+    _insufficient_history_response, logger,
+)
+from services.external.news_api import NewsAPIService
+from services.ml.lstm_predictor import LSTMPredictor
+from services.ml.prediction_cache import (
+    InsufficientHistory, acached_prediction, prediction_key, series_fingerprint, stored_series_fingerprint
+)
+from services.market_data.async_fetcher import AsyncMarketDataFetcher, run_blocking
+from services.market_data.resolver import aresolve_symbol_or_name
+from services.market_data.stock_detail import (
+    aget_stock_detail, aget_stock_detail_version, enqueue_refresh
+)
+from utils.async_views import AsyncAPIView
+from utils.http_cache import bump_data_version, make_etag, conditional_response, set_validators
+from utils.renderer import history_renderer_classes
+from utils.responses import success_response, error_response
+
+
+class AsyncStockDetailView(AsyncAPIView):
+    """Get detailed stock information"""
+    permission_classes = [IsAuthenticated]
+    # JSON by default; msgpack / Arrow IPC when requested via Accept or ?format=
+    renderer_classes = history_renderer_classes()
+
+    async def get(self, request, symbol):
+        """GET /api/market/stock/{symbol} or company name (see StockDetailView)"""
+        try:
+            resolved = await aresolve_symbol_or_name(symbol, limit=1)
+            canonical = resolved.get('canonical')
+            if not canonical:
+                return Response(
+                    error_response(message=f'No valid stock found for: {symbol}'),
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            symbol = canonical.upper()
+        except Exception:
+            symbol = symbol.upper()
+
+        columnar = (
+            request.accepted_renderer.format != 'json'
+            or request.query_params.get('history') == 'columnar'
+        )
+        layout = 'columnar' if columnar else 'rows'
+
+        # Answer conditional requests from the snapshot version alone
+        version = await aget_stock_detail_version(symbol)
+        if version:
+            token, modified, is_stale = version
+            etag = make_etag('stock_detail', symbol, token, is_stale, layout, request.accepted_renderer.format)
+            not_modified = conditional_response(request, etag, modified)
+            if not_modified is not None:
+                if is_stale:
+                    await sync_to_async(enqueue_refresh)(symbol)
+                return not_modified
+
+        try:
+            data = await aget_stock_detail(symbol, history_layout=layout)
+            response = Response(success_response(data=data))
+
+            version = await aget_stock_detail_version(symbol)
+            if version:
+                token, modified, is_stale = version
+                etag = make_etag('stock_detail', symbol, token, is_stale, layout, request.accepted_renderer.format)
+                set_validators(response, etag, modified)
+            return response
+
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error fetching stock data: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class AsyncNewsView(AsyncAPIView):
+    """Get news articles with sentiment"""
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        """GET /api/market/news?symbol=AAPL&companyName=Apple"""
+        symbol = request.query_params.get('symbol')
+        company_name = request.query_params.get('companyName')
+        force_refresh = request.query_params.get('forceRefresh')
+
+        q = symbol or company_name
+        if q:
+            try:
+                resolved = await aresolve_symbol_or_name(q, limit=1)
+                symbol = (resolved.get('canonical') or symbol or '').upper()
+            except Exception:
+                symbol = (symbol or '').upper()
+
+        if not symbol:
+            return Response(
+                error_response(message='Symbol parameter is required'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            stock = await Stock.objects.aget(symbol=symbol.upper())
+
+            articles = [article async for article in _recent_news(stock)]
+            if (force_refresh and str(force_refresh).lower() in ['1', 'true']) or not articles:
+                await NewsAPIService().afetch_news(symbol, company_name)
+                articles = [article async for article in _recent_news(stock)]
+
+            sentiments = _first_sentiment_per_article(
+                [sentiment async for sentiment in _article_sentiments_queryset(articles)]
+            )
+
+            quick = await run_blocking(_quick_sentiments, stock, articles, sentiments)
+            if quick:
+                await Sentiment.objects.abulk_create(quick)
+                await sync_to_async(bump_data_version)('sentiment', stock.symbol)
+                sentiments.update({sentiment.news_article_id: sentiment for sentiment in quick})
+
+            data = _news_payload(stock, symbol, company_name, articles, sentiments)
+            return Response(success_response(data=data))
+
+        except Stock.DoesNotExist:
+            return Response(
+                error_response(message='Stock not found'),
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error fetching news: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class AsyncAIPredictionView(AsyncAPIView):
+    """AI-based stock prediction using LSTM"""
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        """GET /api/market/ai-prediction - Returns API documentation"""
+        return AIPredictionView.get(self, request)
+
+    async def post(self, request):
+        """POST /api/market/ai-prediction"""
+        symbol = request.data.get('symbol')
+        company_name = request.data.get('companyName')
+        historical_data = request.data.get('historicalData', [])
+
+        logger.info(f"AI Prediction Request - symbol: {symbol}, historical_data length: {len(historical_data) if historical_data else 0}")
+
+        q = symbol or company_name
+        if q:
+            try:
+                resolved = await aresolve_symbol_or_name(q, limit=1)
+                symbol = resolved.get('canonical') or symbol
+            except Exception:
+                pass
+
+        if not symbol:
+            return Response(
+                error_response(
+                    message='Symbol is required. Please provide a stock symbol in the request body.',
+                    errors={'symbol': ['This field is required']}
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            stock, created = await Stock.objects.aget_or_create(
+                symbol=symbol.upper(),
+                defaults={'name': symbol.upper()}
+            )
+
+            if historical_data:
+                df = pd.DataFrame(historical_data)
+                source = series_fingerprint(df)
+
+                async def load_history():
+                    return df
+            else:
+                prices = StockPrice.objects.filter(stock=stock).order_by('timestamp')[:500]
+                price_list = [
+                    price async for price in prices.values('timestamp', 'open', 'high', 'low', 'close', 'volume')
+                ]
+                source = stored_series_fingerprint(price_list)
+
+                async def load_history():
+                    # If not enough data in DB, fetch from Yahoo
+                    if len(price_list) < AI_MIN_HISTORY:
+                        historical = await AsyncMarketDataFetcher().fetch_historical_data(symbol, period='1y', interval='1d')
+                        if historical:
+                            return _history_frame(historical)
+                    return pd.DataFrame(price_list)
+
+            async def forecast():
+                history = await load_history()
+                if len(history) < AI_MIN_HISTORY:
+                    raise InsufficientHistory(len(history))
+
+                # CPU-bound model inference off the event loop
+                predictions = await run_blocking(LSTMPredictor().predict, history, steps=AI_FORECAST_STEPS)
+                return _ai_prediction_data(history, predictions, stock.currency)
+
+            key = prediction_key(stock.symbol, source, AI_FORECAST_STEPS, stock.currency)
+            data = await acached_prediction(key, forecast)
+            return Response(success_response(data=data))
+
+        except InsufficientHistory as e:
+            return _insufficient_history_response(e.count)
+        except Exception as e:
+            return Response(
+                error_response(message=f"Prediction failed: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class AsyncMarketSearchView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        q = request.query_params.get('q') or request.query_params.get('query')
+        limit = int(request.query_params.get('limit', 10))
+        if not q:
+            return Response(
+                error_response(message='Query parameter q is required'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            result = await aresolve_symbol_or_name(q, limit=limit)
+            data = {
+                'query': q,
+                'canonical': result['canonical'],
+                'candidates': result['candidates']
+            }
+            return Response(success_response(data=data))
+        except Exception as e:
+            return Response(
+                error_response(message=f"Search failed: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,144 @@
+"""
+Management command to benchmark the API JSON renderer
+Run with: python manage.py benchmark_renderer [--iterations 500]
+
+Renders synthetic scanner and stock-detail payloads with CamelCaseJSONRenderer
+and with the previous implementation (uncached key conversion + DRF's stdlib
+JSON encoder), checks both produce the same document and reports timings.
+"""
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from utils.renderer import CamelCaseJSONRenderer
+from utils.responses import success_response
+
+
+def _legacy_snake_to_camel(s):
+    parts = s.split('_')
+    return parts[0] + ''.join(p.title() for p in parts[1:]) if parts else s
+
+
+def _legacy_transform(obj):
+    if isinstance(obj, dict):
+        return {
+            (_legacy_snake_to_camel(k) if isinstance(k, str) else k): _legacy_transform(v)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_legacy_transform(v) for v in obj]
+    return obj
+
+
+def _legacy_render(data):
+    data = dict(data)
+    data['data'] = _legacy_transform(data.get('data'))
+    return JSONRenderer().render(data)
+
+
+def _scan_result(i, now):
+    return {
+        'symbol': f'SYM{i}',
+        'name': f'Company {i}',
+        'currency': 'USD',
+        'price': Decimal('123.4567'),
+        'change': Decimal('1.2345'),
+        'change_percent': Decimal('1.0101'),
+        'volume': 1000000 + i,
+        'avg_volume': 900000,
+        'volume_ratio': 1.11,
+        'is_unusual_volume': False,
+        'is_breakout': True,
+        'trend': 'Bullish',
+        'resistance': Decimal('130.0'),
+        'support': Decimal('110.0'),
+        'timestamp': now,
+    }
+
+
+def scanner_payload(rows=500):
+    """Full scan result list, as serialized from MarketScanResult rows"""
+    now = timezone.now()
+    return success_response(data={
+        'timeframe': 'daily',
+        'results': [_scan_result(i, now) for i in range(rows)],
+        'market_overview': {'total_scanned': rows, 'bullish': rows // 2, 'bearish': rows // 2, 'avg_change': 0.1},
+    })
+
+
+def stock_detail_payload(bars=200):
+    """Stock detail response with the 200-bar row history"""
+    now = timezone.now()
+    return success_response(data={
+        'symbol': 'AAPL',
+        'name': 'Apple Inc.',
+        'currency': 'USD',
+        'price': 190.12,
+        'change': 1.1,
+        'changePercent': 0.58,
+        'volume': 50000000,
+        'marketCap': 3000000000000,
+        'high52w': 199.6,
+        'low52w': 140.2,
+        'historicalData': [
+            {
+                'date': (now - timedelta(days=bars - i)).isoformat(),
+                'open': 180.0 + i / 10,
+                'high': 181.0 + i / 10,
+                'low': 179.0 + i / 10,
+                'close': 180.5 + i / 10,
+                'volume': 1000000 + i,
+            }
+            for i in range(bars)
+        ],
+        'indicators': {'rsi': 55.2, 'macd': 1.3, 'sma20': 185.1, 'sma50': 180.4},
+        'as_of': now,
+        'is_stale': False,
+    })
+
+
+class Command(BaseCommand):
+    help = 'Benchmark CamelCaseJSONRenderer against the previous renderer implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=500,
+            help='Renders per payload and implementation (default: 500)',
+        )
+
+    def _time(self, render, payload, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            body = render(payload)
+        elapsed = time.perf_counter() - started
+        return elapsed / iterations * 1e6, body
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        renderer = CamelCaseJSONRenderer()
+
+        payloads = {
+            'scanner (500 results)': scanner_payload(),
+            'stock detail (200 bars)': stock_detail_payload(),
+        }
+
+        for name, payload in payloads.items():
+            legacy_us, legacy_body = self._time(_legacy_render, payload, iterations)
+            current_us, current_body = self._time(
+                lambda p: renderer.render(dict(p)), payload, iterations
+            )
+
+            same = json.loads(legacy_body) == json.loads(current_body)
+            self.stdout.write(
+                f'{name}: previous {legacy_us:,.0f} us, current {current_us:,.0f} us '
+                f'({legacy_us / current_us:.1f}x), {len(current_body):,} bytes'
+            )
+            if not same:
+                self.stdout.write(self.style.WARNING('  output differs from previous renderer'))
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
@@ -0,0 +1,72 @@
+"""
+Management command to bulk-load exchange listing files into the Stock table
+Run with: python manage.py import_symbol_universe nasdaqlisted.txt otherlisted.txt
+          python manage.py import_symbol_universe EQUITY_L.csv --exchange NSE
+"""
+from django.core.management.base import BaseCommand, CommandError
+from services.market_data.symbol_universe import parse_listing, import_listings
+from utils.constants import LISTING_EXCHANGES, SYMBOL_IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Import exchange listing files (CSV or JSON) into the symbol universe'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='+',
+            type=str,
+            help='Listing files (.csv, .txt or .json)',
+        )
+        parser.add_argument(
+            '--exchange',
+            choices=sorted(LISTING_EXCHANGES),
+            help='Exchange of every listing (default: taken from the file or its exchange column)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SYMBOL_IMPORT_BATCH_SIZE,
+            help=f'Rows per insert (default: {SYMBOL_IMPORT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--deactivate-missing',
+            action='store_true',
+            help='Mark active stocks of the imported exchanges that are not listed as inactive',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Parse the files and show what would be imported without writing',
+        )
+
+    def handle(self, *args, **options):
+        stocks = {}
+        for path in options['files']:
+            try:
+                parsed, skipped = parse_listing(path, exchange=options['exchange'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Could not read {path}: {e}')
+
+            self.stdout.write(f'{path}: {len(parsed)} listings' + (f', {skipped} skipped' if skipped else ''))
+            stocks.update((stock.symbol, stock) for stock in parsed)
+
+        if not stocks:
+            self.stdout.write(self.style.WARNING('No listings found'))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'\nDRY RUN MODE - would import {len(stocks)} listings'))
+            for stock in list(stocks.values())[:10]:
+                self.stdout.write(f'  {stock.symbol} - {stock.name} ({stock.exchange}) aliases: {stock.aliases}')
+            return
+
+        counts = import_listings(
+            list(stocks.values()),
+            batch_size=options['batch_size'],
+            deactivate_missing=options['deactivate_missing'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ Imported {len(stocks)} listings: {counts['created']} created, "
+            f"{counts['updated']} updated, {counts['deactivated']} deactivated"
+        ))
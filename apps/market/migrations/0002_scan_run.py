@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timeframe', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly')], max_length=10)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('result_count', models.IntegerField(default=0)),
+                ('gainer_count', models.IntegerField(default=0)),
+                ('loser_count', models.IntegerField(default=0)),
+                ('unusual_volume_count', models.IntegerField(default=0)),
+                ('breakout_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'scan_runs',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['timeframe', 'status', 'finished_at'], name='scan_runs_timefra_0af9dc_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='marketscanresult',
+            name='scan_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='results', to='market.scanrun'),
+        ),
+    ]
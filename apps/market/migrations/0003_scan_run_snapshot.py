@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0002_scan_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanrun',
+            name='snapshot',
+            field=models.TextField(blank=True, default='', help_text='Pre-rendered scanner response for this run'),
+        ),
+    ]
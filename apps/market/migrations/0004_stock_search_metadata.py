@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0003_scan_run_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='aliases',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='search_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='stock',
+            name='symbol',
+            field=models.CharField(max_length=20, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
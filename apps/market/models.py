@@ -4,8 +4,11 @@ from decimal import Decimal
 
 class Stock(models.Model):
 
-    symbol = models.CharField(max_length=10, unique=True, primary_key=True)
+    symbol = models.CharField(max_length=20, unique=True, primary_key=True)
     name = models.CharField(max_length=255)
+    # Search metadata precomputed by the listing importer (see symbol_index)
+    search_name = models.CharField(max_length=255, blank=True, default='')
+    aliases = models.JSONField(default=list, blank=True)
     sector = models.CharField(max_length=100, blank=True, null=True)
     industry = models.CharField(max_length=100, blank=True, null=True)
     market_cap = models.BigIntegerField(null=True, blank=True)
@@ -95,19 +98,54 @@ class TechnicalIndicator(models.Model):
         return f"{self.stock.symbol} - {self.timestamp} "
     
 
-class MarketScanResult(models.Model):
+class ScanRun(models.Model):
+    """One execution of the market scanner; groups the results it produced"""
+
     TIMEFRAME_CHOICES = [
         ('daily', 'Daily'),
         ('weekly', 'Weekly'),
         ('monthly', 'Monthly')
     ]
 
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed')
+    ]
+
+    timeframe = models.CharField(max_length=10, choices=TIMEFRAME_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    result_count = models.IntegerField(default=0)
+    gainer_count = models.IntegerField(default=0)
+    loser_count = models.IntegerField(default=0)
+    unusual_volume_count = models.IntegerField(default=0)
+    breakout_count = models.IntegerField(default=0)
+    snapshot = models.TextField(blank=True, default='', help_text='Pre-rendered scanner response for this run')
+
+    class Meta:
+        db_table = 'scan_runs'
+        indexes = [
+            models.Index(fields=['timeframe', 'status', 'finished_at']),
+        ]
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.timeframe} scan #{self.pk} - {self.status}"
+
+
+class MarketScanResult(models.Model):
+    TIMEFRAME_CHOICES = ScanRun.TIMEFRAME_CHOICES
+
     TREND_CHOICES = [
         ('Bullish', 'Bullish'),
         ('Bearish', 'Bearish'),
         ('Neutral', 'Neutral')
     ]
 
+    scan_run = models.ForeignKey(ScanRun, on_delete=models.CASCADE, related_name='results', null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     timeframe = models.CharField(max_length=10, choices=TIMEFRAME_CHOICES)
     stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='scan_results')
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Stock, Sentiment, StockPrediction, TechnicalIndicator
+from utils.http_cache import bump_data_version
+from services.market_data.symbol_index import mark_symbols_changed
+
+
+@receiver(post_save, sender=Sentiment)
+def bump_sentiment_version(sender, instance, **kwargs):
+    """Invalidate sentiment ETags for the stock"""
+    bump_data_version('sentiment', instance.stock_id)
+
+
+@receiver(post_save, sender=StockPrediction)
+def bump_prediction_version(sender, instance, **kwargs):
+    """Invalidate prediction ETags for the stock"""
+    bump_data_version('prediction', instance.stock_id)
+
+
+@receiver(post_save, sender=TechnicalIndicator)
+def bump_indicator_version(sender, instance, **kwargs):
+    """Indicators are part of the prediction payload"""
+    bump_data_version('indicator', instance.stock_id)
+
+
+@receiver(post_save, sender=Stock)
+def reindex_saved_stock(sender, instance, **kwargs):
+    """Symbol search indexes pick up the row on their next check"""
+    mark_symbols_changed()
+
+
+@receiver(post_delete, sender=Stock)
+def reindex_deleted_stock(sender, instance, **kwargs):
+    mark_symbols_changed(deleted=True)
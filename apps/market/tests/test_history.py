@@ -0,0 +1,36 @@
+import numpy as np
+from django.test import SimpleTestCase
+from services.market_data.history import downsample, lttb_indices
+
+
+def make_bars(n):
+    t = np.arange(n, dtype=np.int64) * 86400
+    c = np.sin(np.arange(n) / 5.0) + 10
+    return {'t': t, 'o': c, 'h': c + 1, 'l': c - 1, 'c': c, 'v': np.arange(n, dtype=np.int64)}
+
+
+class DownsampleTests(SimpleTestCase):
+    def test_lttb_keeps_at_most_threshold_points_with_both_ends(self):
+        bars = make_bars(500)
+        for threshold in (3, 10, 100):
+            keep = lttb_indices(bars['t'].astype(float), bars['c'], threshold)
+            self.assertEqual(len(keep), threshold)
+            self.assertEqual((keep[0], keep[-1]), (0, 499))
+            self.assertTrue(np.all(np.diff(keep) > 0))
+
+    def test_one_or_two_points_are_the_last_or_both_ends(self):
+        bars = make_bars(500)
+        self.assertEqual(lttb_indices(bars['t'].astype(float), bars['c'], 1).tolist(), [499])
+        self.assertEqual(lttb_indices(bars['t'].astype(float), bars['c'], 2).tolist(), [0, 499])
+        self.assertEqual(len(downsample(bars, 1)['t']), 1)
+        self.assertEqual(downsample(bars, 2)['t'].tolist(), [0, 499 * 86400])
+
+    def test_ohlc_buckets_cover_every_bar(self):
+        bars = make_bars(500)
+        merged = downsample(bars, 2, method='ohlc')
+        self.assertEqual(len(merged['t']), 2)
+        self.assertEqual(int(merged['v'].sum()), int(bars['v'].sum()))
+
+    def test_short_series_is_returned_unchanged(self):
+        bars = make_bars(5)
+        self.assertIs(downsample(bars, 10), bars)
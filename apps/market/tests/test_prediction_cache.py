@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from services.ml.prediction_cache import (
+    InsufficientHistory, _insufficient_key, _lock_key, acached_prediction, cached_prediction
+)
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+KEY = 'ai_prediction:test:AAPL:30:USD:db-10'
+
+
+def too_short():
+    raise InsufficientHistory(10)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PredictionCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_result_is_computed_once(self):
+        compute = mock.Mock(return_value={'price': 1})
+        self.assertEqual(cached_prediction(KEY, compute), {'price': 1})
+        self.assertEqual(cached_prediction(KEY, compute), {'price': 1})
+        compute.assert_called_once()
+
+    def test_insufficient_history_is_remembered(self):
+        with self.assertRaises(InsufficientHistory):
+            cached_prediction(KEY, too_short)
+        compute = mock.Mock()
+        with self.assertRaises(InsufficientHistory) as raised:
+            cached_prediction(KEY, compute)
+        self.assertEqual(raised.exception.count, 10)
+        compute.assert_not_called()
+        self.assertFalse(cache.get(_lock_key(KEY)))
+
+    def test_waiters_fail_as_soon_as_the_owner_finds_too_little_history(self):
+        # Another request holds the lock and then finds too little history
+        cache.add(_lock_key(KEY), True, 60)
+        timer = threading.Timer(0.2, lambda: cache.set(_insufficient_key(KEY), 10, 60))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        started = time.monotonic()
+        with self.assertRaises(InsufficientHistory):
+            cached_prediction(KEY, mock.Mock())
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_async_insufficient_history_is_remembered(self):
+        async def too_short_async():
+            too_short()
+
+        with self.assertRaises(InsufficientHistory):
+            asyncio.run(acached_prediction(KEY, too_short_async))
+        with self.assertRaises(InsufficientHistory):
+            asyncio.run(acached_prediction(KEY, mock.AsyncMock()))
@@ -0,0 +1,92 @@
+import asyncio
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from services.market_data import resolver
+from services.market_data.symbol_index import SymbolIndex
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+STOCKS = [
+    ('MSFT', 'Microsoft Corporation', 'NASDAQ'),
+    ('TCS.NS', 'Tata Consultancy Services Limited', 'NSE'),
+    ('AAP', 'Advance Auto Parts Inc', 'NYSE'),
+    ('AAPL', 'Apple Inc', 'NASDAQ'),
+]
+
+YAHOO_QUOTES = {
+    'MS': [{'symbol': 'MS', 'shortname': 'Morgan Stanley', 'exchange': 'NYQ', 'quoteType': 'EQUITY', 'score': 0.9}],
+    'AA': [{'symbol': 'AA', 'shortname': 'Alcoa Corporation', 'exchange': 'NYQ', 'quoteType': 'EQUITY', 'score': 0.9}],
+}
+
+
+def build_index():
+    index = SymbolIndex()
+    for symbol, name, exchange in STOCKS:
+        index._add(symbol, name, exchange)
+    index._loaded = True
+    index._checked_at = float('inf')  # never due for a database check
+    return index
+
+
+def yahoo_response(url, params=None, timeout=None):
+    quotes = YAHOO_QUOTES.get(params['q'])
+    if quotes is None:
+        raise ConnectionError('Yahoo search unavailable')
+    response = mock.Mock()
+    response.json.return_value = {'quotes': quotes}
+    return response
+
+
+async def async_yahoo_search(query, quotes_count=10):
+    return yahoo_response(None, params={'q': query}).json()['quotes']
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResolverTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        for target, value in (
+            ('get_symbol_index', mock.Mock(return_value=build_index())),
+            ('_schedule_checks', mock.Mock()),
+            ('requests.get', mock.Mock(side_effect=yahoo_response)),
+            ('yahoo_search', mock.Mock(side_effect=async_yahoo_search)),
+        ):
+            patcher = mock.patch(f'services.market_data.resolver.{target}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def resolve(self, query, limit=10):
+        return resolver.resolve_symbol_or_name(query, limit=limit)
+
+    def test_exact_symbol_name_and_base_resolve_from_the_index(self):
+        self.assertEqual(self.resolve('AAPL')['canonical'], 'AAPL')
+        self.assertEqual(self.resolve('microsoft')['canonical'], 'MSFT')
+        self.assertEqual(self.resolve('tcs')['canonical'], 'TCS.NS')
+        resolver.requests.get.assert_not_called()
+
+    def test_short_ticker_missing_from_the_db_asks_yahoo(self):
+        result = self.resolve('MS')
+        self.assertEqual(result['canonical'], 'MS')
+        # The partial index hit is still offered as a candidate
+        self.assertIn('MSFT', [c['symbol'] for c in result['candidates']])
+
+    def test_prefix_of_an_indexed_symbol_is_not_canonical(self):
+        self.assertEqual(self.resolve('AA')['canonical'], 'AA')
+        self.assertEqual(self.resolve('AA', limit=1)['candidates'][0]['symbol'], 'AA')
+
+    def test_bare_symbol_when_yahoo_has_no_answer(self):
+        for query in ('T', 'A'):
+            result = self.resolve(query)
+            self.assertEqual(result['canonical'], query)
+            self.assertEqual(result['candidates'][0]['symbol'], query)
+
+    def test_fuzzy_hits_are_not_canonical(self):
+        result = self.resolve('microsft')
+        self.assertEqual(result['canonical'], 'MICROSFT')
+        self.assertIn('MSFT', [c['symbol'] for c in result['candidates']])
+
+    def test_async_resolver_matches(self):
+        for query, canonical in (('MS', 'MS'), ('T', 'T'), ('microsoft', 'MSFT')):
+            result = asyncio.run(resolver.aresolve_symbol_or_name(query, limit=1))
+            self.assertEqual(result['canonical'], canonical)
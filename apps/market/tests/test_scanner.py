@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from apps.market.models import Stock, StockPrice
+from services.market_data.scanner import MarketScanner
+
+
+def add_bars(symbol, bars, is_active=True):
+    """bars: (days ago, close, volume)"""
+    stock = Stock.objects.create(symbol=symbol, name=f'{symbol} Inc', is_active=is_active)
+    now = timezone.now()
+    StockPrice.objects.bulk_create(
+        StockPrice(
+            stock=stock, timestamp=now - timedelta(days=days_ago),
+            open=close, high=close, low=close, close=close, volume=volume,
+        )
+        for days_ago, close, volume in bars
+    )
+
+
+class ScanSnapshotTests(TestCase):
+    def snapshot(self):
+        return {row[0]: row[3:] for row in MarketScanner()._load_snapshot()}
+
+    def test_latest_two_bars_and_recent_average_volume(self):
+        add_bars('NEW', [(1, 12, 300), (2, 10, 100), (5, 9, 200), (40, 8, 10_000)])
+        close, prev_close, volume, avg_volume = self.snapshot()['NEW']
+        self.assertEqual((float(close), float(prev_close), volume), (12, 10, 300))
+        self.assertAlmostEqual(float(avg_volume), 200)
+
+    def test_stock_without_recent_bars_is_still_scanned(self):
+        add_bars('OLD', [(40, 21, 500), (41, 20, 400), (60, 19, 300)])
+        close, prev_close, volume, avg_volume = self.snapshot()['OLD']
+        self.assertEqual((float(close), float(prev_close), volume), (21, 20, 500))
+        self.assertIsNone(avg_volume)
+
+    def test_single_bar_and_inactive_stocks_are_skipped(self):
+        add_bars('ONE', [(1, 5, 100)])
+        add_bars('GONE', [(1, 5, 100), (2, 4, 100)], is_active=False)
+        self.assertEqual(self.snapshot(), {})
@@ -0,0 +1,155 @@
+from unittest import mock
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.market.views import StockScreenerView
+from services.market_data.screener import (
+    FIELDS, ScreenerSyntaxError, StockScreener, compile_mask, parse_expression
+)
+
+
+def make_panel(rows):
+    """Screener panel from a list of {field: value} dicts (missing fields are NaN)"""
+    panel = {
+        'symbol': np.array([row['symbol'] for row in rows], dtype=object),
+        'name': np.array([row['symbol'] + ' Inc' for row in rows], dtype=object),
+        'currency': np.array(['USD'] * len(rows), dtype=object),
+    }
+    for field in FIELDS:
+        panel[field] = np.array([row.get(field, np.nan) for row in rows], dtype=float)
+    return panel
+
+
+PANEL = make_panel([
+    {'symbol': 'AAA', 'close': 10, 'change': 1, 'change_percent': 10, 'volume': 100, 'volume_ratio': 3, 'rsi_14': 25},
+    {'symbol': 'BBB', 'close': 20, 'change': -1, 'change_percent': -5, 'volume': 200, 'volume_ratio': 1, 'rsi_14': 75},
+    {'symbol': 'CCC', 'close': 30, 'change': 0, 'change_percent': 0, 'volume': 300, 'volume_ratio': 2},
+    {'symbol': 'DDD', 'close': 40, 'change': 2, 'change_percent': 5, 'volume': 400, 'volume_ratio': 4, 'rsi_14': 50},
+])
+
+
+def symbols_matching(expression):
+    ast, _ = parse_expression(expression)
+    return list(PANEL['symbol'][compile_mask(ast, PANEL)])
+
+
+class ParseExpressionTests(SimpleTestCase):
+    def test_returns_ast_and_referenced_fields(self):
+        ast, fields = parse_expression('rsi_14 < 30 AND price > 5')
+        self.assertEqual(ast, ('and', ('cmp', '<', ('field', 'rsi_14'), ('num', 30.0)),
+                                      ('cmp', '>', ('field', 'close'), ('num', 5.0))))
+        self.assertEqual(fields, {'rsi_14', 'close'})
+
+    def test_and_binds_tighter_than_or(self):
+        ast, _ = parse_expression('close > 1 OR close > 2 AND close > 3')
+        self.assertEqual(ast[0], 'or')
+        self.assertEqual(ast[2][0], 'and')
+
+    def test_keywords_are_case_insensitive(self):
+        ast, _ = parse_expression('not (close > 1 and volume < 5)')
+        self.assertEqual(ast[0], 'not')
+
+    def test_rejects_malformed_expressions(self):
+        for expression in (
+            '', '   ', 'close >', 'close 5', '(close > 1', 'close > 1)', '1 < 2',
+            'unknown_field > 1', 'close > 1 AND', '__import__("os")', 'close > 1; drop',
+            'x' * 600,
+        ):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ScreenerSyntaxError):
+                    parse_expression(expression)
+
+    def test_rejects_non_string_expressions(self):
+        for expression in (None, 5, ['close > 1'], {'close': 1}):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ScreenerSyntaxError):
+                    parse_expression(expression)
+
+
+class CompileMaskTests(SimpleTestCase):
+    def test_comparisons(self):
+        self.assertEqual(symbols_matching('close >= 30'), ['CCC', 'DDD'])
+        self.assertEqual(symbols_matching('20 > close'), ['AAA'])
+        self.assertEqual(symbols_matching('change = 0'), ['CCC'])
+        self.assertEqual(symbols_matching('change != 0'), ['AAA', 'BBB', 'DDD'])
+
+    def test_boolean_operators(self):
+        self.assertEqual(symbols_matching('close < 15 OR close > 35'), ['AAA', 'DDD'])
+        self.assertEqual(symbols_matching('volume_ratio > 1 AND change_percent > 0'), ['AAA', 'DDD'])
+        self.assertEqual(symbols_matching('NOT (close < 15 OR close > 35)'), ['BBB', 'CCC'])
+
+    def test_field_to_field_comparison(self):
+        self.assertEqual(symbols_matching('volume_ratio > change_percent'), ['BBB', 'CCC'])
+
+    def test_missing_values_never_match(self):
+        self.assertEqual(symbols_matching('rsi_14 < 100'), ['AAA', 'BBB', 'DDD'])
+        self.assertEqual(symbols_matching('rsi_14 >= 0 OR rsi_14 < 0'), ['AAA', 'BBB', 'DDD'])
+
+
+@mock.patch('services.market_data.screener.get_panel', return_value=PANEL)
+class StockScreenerTests(SimpleTestCase):
+    def test_default_sort_is_descending_volume_ratio(self, _):
+        data = StockScreener().screen('close > 0')
+        self.assertEqual([r['symbol'] for r in data['results']], ['DDD', 'AAA', 'CCC', 'BBB'])
+
+    def test_ascending_sort_puts_missing_values_last(self, _):
+        data = StockScreener().screen('close > 0', sort='rsi_14')
+        self.assertEqual([r['symbol'] for r in data['results']], ['AAA', 'DDD', 'BBB', 'CCC'])
+        self.assertIsNone(data['results'][-1]['rsi_14'])
+
+    def test_descending_sort_puts_missing_values_last(self, _):
+        data = StockScreener().screen('close > 0', sort='-rsi_14')
+        self.assertEqual([r['symbol'] for r in data['results']], ['BBB', 'DDD', 'AAA', 'CCC'])
+
+    def test_pagination(self, _):
+        first = StockScreener().screen('close > 0', page=1, page_size=3, sort='close')
+        second = StockScreener().screen('close > 0', page=2, page_size=3, sort='close')
+        beyond = StockScreener().screen('close > 0', page=3, page_size=3, sort='close')
+        self.assertEqual([r['symbol'] for r in first['results']], ['AAA', 'BBB', 'CCC'])
+        self.assertEqual([r['symbol'] for r in second['results']], ['DDD'])
+        self.assertEqual(beyond['results'], [])
+        self.assertEqual((first['total'], first['total_pages']), (4, 2))
+
+    def test_rows_include_referenced_fields(self, _):
+        data = StockScreener().screen('rsi_14 < 30')
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['results'][0]['rsi_14'], 25.0)
+        self.assertEqual(data['results'][0]['symbol'], 'AAA')
+
+    def test_unknown_sort_field(self, _):
+        with self.assertRaises(ScreenerSyntaxError):
+            StockScreener().screen('close > 0', sort='-nope')
+
+    def test_empty_universe(self, get_panel):
+        get_panel.return_value = None
+        data = StockScreener().screen('close > 0')
+        self.assertEqual((data['total'], data['results']), (0, []))
+
+
+class StockScreenerViewTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = get_user_model()(email='screener@example.com')
+
+    def post(self, body):
+        request = self.factory.post('/api/market/screener', body, format='json')
+        force_authenticate(request, user=self.user)
+        return StockScreenerView.as_view()(request)
+
+    def test_non_string_expression_is_rejected(self):
+        for expression in (5, ['close > 1'], {'close': 1}):
+            with self.subTest(expression=expression):
+                self.assertEqual(self.post({'expression': expression}).status_code, 400)
+
+    def test_non_string_sort_is_rejected(self):
+        self.assertEqual(self.post({'expression': 'close > 1', 'sort': 1}).status_code, 400)
+
+    def test_invalid_expression_is_rejected(self):
+        self.assertEqual(self.post({'expression': 'close >'}).status_code, 400)
+
+    @mock.patch('services.market_data.screener.get_panel', return_value=PANEL)
+    def test_screen(self, _):
+        response = self.post({'expression': 'close > 25', 'sort': 'close'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['symbol'] for r in response.data['data']['results']], ['CCC', 'DDD'])
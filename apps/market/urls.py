@@ -1,7 +1,12 @@
+from django.conf import settings
 from django.urls import path, re_path
 from .views import (
     StockDetailView,
+    StockIndicatorView,
+    StockHistoryView,
+    BatchQuoteView,
     MarketScannerView,
+    StockScreenerView,
     NewsView,
     SentimentView,
     AIPredictionView,
@@ -9,6 +14,14 @@ from .views import (
     MarketSearchView
 )
 
+if settings.MARKET_ASYNC_VIEWS:
+    from .async_views import (
+        AsyncStockDetailView as StockDetailView,
+        AsyncNewsView as NewsView,
+        AsyncAIPredictionView as AIPredictionView,
+        AsyncMarketSearchView as MarketSearchView,
+    )
+
 app_name = 'market'
 
 urlpatterns = [
@@ -32,10 +45,18 @@ urlpatterns = [
     # Stock data
     path('stock/<str:symbol>/', StockDetailView.as_view(), name='stock-detail'),
     re_path(r'^stock/(?P<symbol>[^/]+)/?$', StockDetailView.as_view(), name='stock-detail-noslash'),
+    path('stock/<str:symbol>/indicators/', StockIndicatorView.as_view(), name='stock-indicators'),
+    re_path(r'^stock/(?P<symbol>[^/]+)/indicators/?$', StockIndicatorView.as_view(), name='stock-indicators-noslash'),
+    path('stock/<str:symbol>/history/', StockHistoryView.as_view(), name='stock-history'),
+    re_path(r'^stock/(?P<symbol>[^/]+)/history/?$', StockHistoryView.as_view(), name='stock-history-noslash'),
+    path('quotes/', BatchQuoteView.as_view(), name='batch-quotes'),
+    re_path(r'^quotes/?$', BatchQuoteView.as_view(), name='batch-quotes-noslash'),
     
     # Market scanner
     path('scanner/', MarketScannerView.as_view(), name='market-scanner'),
     re_path(r'^scanner/?$', MarketScannerView.as_view(), name='market-scanner-noslash'),
+    path('screener/', StockScreenerView.as_view(), name='stock-screener'),
+    re_path(r'^screener/?$', StockScreenerView.as_view(), name='stock-screener-noslash'),
     
     # News and sentiment
     path('news/', NewsView.as_view(), name='news'),
@@ -3,35 +3,64 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.core.cache import cache
-from django.db.models import Avg
+from django.http import HttpResponse
 from datetime import datetime, timedelta
+import logging
 import pandas as pd
 from decimal import Decimal
 
 from .models import (
     Stock, StockPrice, TechnicalIndicator, 
-    MarketScanResult, NewsArticle, Sentiment, StockPrediction
+    ScanRun, NewsArticle, Sentiment, StockPrediction
 )
 from .serializers import (
     StockSerializer, StockPriceSerializer, TechnicalIndicatorSerializer,
-    MarketScanResultSerializer, NewsArticleSerializer, 
+    NewsArticleSerializer,
     SentimentSerializer, StockPredictionSerializer
 )
-from services.market_data.fetcher import MarketDataFetcher
-from services.market_data.indicators import TechnicalIndicatorCalculator
+from services.market_data.window_indicators import WindowIndicatorCalculator
 from services.external.news_api import NewsAPIService
 from services.external.gemini_api import GeminiSentimentAnalyzer
 from textblob import TextBlob
 from services.ml.lstm_predictor import LSTMPredictor
+from services.ml.prediction_cache import (
+    InsufficientHistory, cached_prediction, prediction_key, series_fingerprint, stored_series_fingerprint
+)
 from utils.responses import success_response, error_response
+from utils.renderer import history_renderer_classes
+from utils.http_cache import (
+    get_data_version, set_data_version, bump_data_version, make_etag, conditional_response, set_validators
+)
 from services.market_data.resolver import resolve_symbol_or_name
+from services.market_data.live_scanner import LiveMarketScanner
+from services.market_data.stock_detail import get_stock_detail, get_stock_detail_version, enqueue_refresh
+from services.market_data.quotes import get_batch_quotes, QUOTE_FIELDS, DEFAULT_QUOTE_FIELDS
+from services.market_data.history import get_price_history, INTERVALS, DOWNSAMPLE_METHODS
+from services.market_data.screener import StockScreener, ScreenerSyntaxError, MAX_PAGE_SIZE
+from services.market_data.scan_snapshot import (
+    get_scan_snapshot, publish_scan_snapshot, rebuild_snapshot_for_run
+)
+from utils.constants import (
+    MAX_INDICATOR_WINDOW, MAX_INDICATOR_POINTS, MAX_BATCH_SYMBOLS,
+    DEFAULT_HISTORY_POINTS, MAX_HISTORY_POINTS, MAX_HISTORY_PAGE_SIZE
+)
+
+logger = logging.getLogger(__name__)
 
 class StockDetailView(APIView):
     """Get detailed stock information"""
     permission_classes = [IsAuthenticated]
+    # JSON by default; msgpack / Arrow IPC when requested via Accept or ?format=
+    renderer_classes = history_renderer_classes()
     
     def get(self, request, symbol):
-        """GET /api/market/stock/{symbol} or company name"""
+        """
+        GET /api/market/stock/{symbol} or company name
+
+        ?history=columnar returns the price history as `history`
+        ({t, o, h, l, c, v} columns) instead of `historicalData`; binary
+        formats always use the columnar layout.
+        """
         # Resolve to canonical symbol if a company name or ambiguous input is provided
         try:
             resolved = resolve_symbol_or_name(symbol, limit=1)
@@ -45,144 +74,253 @@ class StockDetailView(APIView):
         except Exception:
             symbol = symbol.upper()
 
-        # Check cache first (by canonical symbol)
-        cache_key = f"stock_detail_{symbol}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(success_response(data=cached_data))
-        
+        columnar = (
+            request.accepted_renderer.format != 'json'
+            or request.query_params.get('history') == 'columnar'
+        )
+        layout = 'columnar' if columnar else 'rows'
+
+        # Answer conditional requests from the snapshot version alone
+        version = get_stock_detail_version(symbol)
+        if version:
+            token, modified, is_stale = version
+            etag = make_etag('stock_detail', symbol, token, is_stale, layout, request.accepted_renderer.format)
+            not_modified = conditional_response(request, etag, modified)
+            if not_modified is not None:
+                if is_stale:
+                    enqueue_refresh(symbol)
+                return not_modified
+
         try:
-            # First fetch real-time data to validate symbol
-            fetcher = MarketDataFetcher()
-            quote = fetcher.fetch_real_time_quote(symbol)
-            
-            # Don't require real-time data to exist; some symbols may be cached or DB-only
-            # Only reject if symbol is invalid (resolution failed earlier)
-            
-            # Try to get or create stock
-            stock = Stock.objects.filter(symbol=symbol).first()
-            if not stock:
-                # Fetch company overview before creating
-                overview = fetcher.fetch_company_overview(symbol)
-                if overview and overview.get('name'):
-                    stock = Stock.objects.create(
-                        symbol=symbol,
-                        name=overview['name'],
-                        sector=overview.get('sector', ''),
-                        industry=overview.get('industry', ''),
-                        market_cap=overview.get('marketCap'),
-                        currency=overview.get('currency', 'USD'),
-                        exchange=overview.get('exchange', '')
-                    )
-                else:
-                    # Create with minimal data if overview fails
-                    # Detect currency from symbol suffix
-                    currency = 'USD'
-                    if '.NS' in symbol or '.BO' in symbol:
-                        currency = 'INR'
-                    elif '.L' in symbol:
-                        currency = 'GBP'
-                    elif '.T' in symbol:
-                        currency = 'JPY'
-                    
-                    stock = Stock.objects.create(
-                        symbol=symbol,
-                        name=symbol,
-                        currency=currency
-                    )
-            
-            # Save the validated price data if available
-            if quote and quote.get('price', 0) > 0:
-                fetcher.save_stock_price(symbol, quote)
-            
-            # Get latest price (may be None if fetch failed)
-            latest_price = StockPrice.objects.filter(stock=stock).order_by('-timestamp').first()
-            
-            # Get historical data (last 200 candles)
-            historical = StockPrice.objects.filter(
-                stock=stock
-            ).order_by('-timestamp')[:200]
-            historical_data = [
-                {
-                    'date': price.timestamp.isoformat(),
-                    'open': float(price.open),
-                    'high': float(price.high),
-                    'low': float(price.low),
-                    'close': float(price.close),
-                    'volume': price.volume
-                }
-                for price in reversed(list(historical))
-            ]
-            
-            # Get latest indicators
-            latest_indicator = TechnicalIndicator.objects.filter(
-                stock=stock
-            ).order_by('-timestamp').first()
+            # Last known snapshot; refreshed in the background once stale
+            data = get_stock_detail(symbol, history_layout=layout)
+            response = Response(success_response(data=data))
 
-            # Calculate indicators on-demand if missing or stale
-            try:
-                needs_calc = False
-                if not latest_indicator:
-                    needs_calc = True
-                elif latest_price and latest_indicator.timestamp < latest_price.timestamp:
-                    needs_calc = True
-
-                if needs_calc:
-                    tic = TechnicalIndicatorCalculator()
-                    tic.calculate_indicators(stock.symbol)
-                    latest_indicator = TechnicalIndicator.objects.filter(
-                        stock=stock
-                    ).order_by('-timestamp').first()
-            except Exception:
-                pass
+            version = get_stock_detail_version(symbol)
+            if version:
+                token, modified, is_stale = version
+                etag = make_etag('stock_detail', symbol, token, is_stale, layout, request.accepted_renderer.format)
+                set_validators(response, etag, modified)
+            return response
             
-            indicators = {}
-            if latest_indicator:
-                indicators = {
-                    'rsi': latest_indicator.rsi_14,
-                    'macd': latest_indicator.macd,
-                    'sma20': latest_indicator.sma_20,
-                    'sma50': latest_indicator.sma_50,
-                }
-            
-            # Calculate 52-week high/low
-            from django.utils import timezone
-            year_ago = timezone.now() - timedelta(days=365)
-            year_prices = StockPrice.objects.filter(
-                stock=stock,
-                timestamp__gte=year_ago
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error fetching stock data: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-            
-            high_52w = 0
-            low_52w = 0
-            if year_prices.exists():
-                high_52w = float(year_prices.order_by('-high').first().high)
-                low_52w = float(year_prices.order_by('low').first().low)
-            
-            # Prepare response
+
+def _parse_time_param(value, end_of_day=False):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    from django.utils import timezone
+    from django.utils.dateparse import parse_date, parse_datetime
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date '{value}'")
+        parsed = datetime.combine(day, datetime.max.time() if end_of_day else datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class StockHistoryView(APIView):
+    """Price history for any range, downsampled or keyset-paginated"""
+    permission_classes = [IsAuthenticated]
+    renderer_classes = history_renderer_classes()
+
+    def get(self, request, symbol):
+        """
+        GET /api/market/stock/{symbol}/history?from=2015-01-01&to=2025-01-01&interval=1d&max_points=1000
+
+        max_points=0 returns raw daily bars in pages of page_size; pass the
+        returned nextCursor as cursor to get the following page.
+        """
+        params = request.query_params
+        interval = params.get('interval', '1d')
+        method = params.get('method', 'lttb')
+        try:
+            start = _parse_time_param(params['from']) if params.get('from') else None
+            end = _parse_time_param(params['to'], end_of_day=True) if params.get('to') else None
+            # An unencoded '+' in the cursor's UTC offset arrives as a space
+            cursor = _parse_time_param(params['cursor'].replace(' ', '+')) if params.get('cursor') else None
+        except ValueError as e:
+            return Response(
+                error_response(message=str(e)),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            max_points = int(params.get('max_points', DEFAULT_HISTORY_POINTS))
+            page_size = int(params.get('page_size', DEFAULT_HISTORY_POINTS))
+        except ValueError:
+            return Response(
+                error_response(message='max_points and page_size must be integers'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if interval not in INTERVALS or method not in DOWNSAMPLE_METHODS:
+            return Response(
+                error_response(
+                    message='Unsupported interval or method',
+                    errors={'interval': list(INTERVALS), 'method': list(DOWNSAMPLE_METHODS)}
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= max_points <= MAX_HISTORY_POINTS or not 1 <= page_size <= MAX_HISTORY_PAGE_SIZE:
+            return Response(
+                error_response(
+                    message=f'max_points must be 0-{MAX_HISTORY_POINTS} and page_size 1-{MAX_HISTORY_PAGE_SIZE}'
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            resolved = resolve_symbol_or_name(symbol, limit=1)
+            symbol = (resolved.get('canonical') or symbol).upper()
+        except Exception:
+            symbol = symbol.upper()
+
+        if not Stock.objects.filter(symbol=symbol).exists():
+            return Response(
+                error_response(message='Stock not found'),
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            data = get_price_history(
+                symbol, start=start, end=end, interval=interval,
+                max_points=max_points, method=method,
+                cursor=cursor, page_size=page_size
+            )
+            return Response(success_response(data=data))
+
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error fetching price history: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class BatchQuoteView(APIView):
+    """Quotes for many symbols in one request"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """GET /api/market/quotes?symbols=AAPL,MSFT&fields=price,changePercent"""
+        return self._quotes(
+            request.query_params.get('symbols', '').split(','),
+            request.query_params.get('fields', '').split(',')
+        )
+
+    def post(self, request):
+        """POST /api/market/quotes with {"symbols": [...], "fields": [...]} (or comma-separated strings)"""
+        symbols = request.data.get('symbols') or []
+        fields = request.data.get('fields') or []
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        if not isinstance(symbols, list) or not isinstance(fields, list):
+            return Response(
+                error_response(message='symbols and fields must be lists or comma-separated strings'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self._quotes(symbols, fields)
+
+    def _quotes(self, symbols, fields):
+        # Normalize and de-duplicate, keeping the requested order
+        symbols = list(dict.fromkeys(
+            str(s).strip().upper() for s in symbols if s and str(s).strip()
+        ))
+        if not symbols:
+            return Response(
+                error_response(message='symbols is required'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(symbols) > MAX_BATCH_SYMBOLS:
+            return Response(
+                error_response(message=f'At most {MAX_BATCH_SYMBOLS} symbols per request'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fields = [str(f).strip() for f in fields if f and str(f).strip()]
+        unknown = [f for f in fields if f not in QUOTE_FIELDS]
+        if unknown:
+            return Response(
+                error_response(
+                    message=f"Unsupported fields: {', '.join(unknown)}",
+                    errors={'fields': list(QUOTE_FIELDS)}
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fields = ['symbol'] + [f for f in fields if f != 'symbol'] if fields else list(DEFAULT_QUOTE_FIELDS)
+
+        try:
+            quotes, missing = get_batch_quotes(symbols, fields=fields)
+            return Response(success_response(data={'quotes': quotes, 'missing': missing}))
+
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error fetching quotes: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class StockIndicatorView(APIView):
+    """On-demand indicators for any window length"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, symbol):
+        """GET /api/market/stock/{symbol}/indicators?type=sma&window=30&limit=200"""
+        indicator = request.query_params.get('type', 'sma').lower()
+        try:
+            window = int(request.query_params.get('window', 20))
+            limit = int(request.query_params.get('limit', 200))
+        except ValueError:
+            return Response(
+                error_response(message='window and limit must be integers'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if indicator not in WindowIndicatorCalculator.INDICATORS:
+            return Response(
+                error_response(
+                    message=f"Unsupported indicator '{indicator}'",
+                    errors={'type': list(WindowIndicatorCalculator.INDICATORS)}
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= window <= MAX_INDICATOR_WINDOW or not 1 <= limit <= MAX_INDICATOR_POINTS:
+            return Response(
+                error_response(
+                    message=f'window must be 1-{MAX_INDICATOR_WINDOW} and limit 1-{MAX_INDICATOR_POINTS}'
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            resolved = resolve_symbol_or_name(symbol, limit=1)
+            symbol = (resolved.get('canonical') or symbol).upper()
+        except Exception:
+            symbol = symbol.upper()
+
+        try:
+            calculator = WindowIndicatorCalculator()
+            points = calculator.calculate(symbol, indicator, window, limit=limit)
             data = {
-                'symbol': stock.symbol,
-                'name': stock.name,
-                'currency': stock.currency,
-                'price': float(latest_price.close) if latest_price else 0,
-                'change': float(latest_price.change) if latest_price else 0,
-                'changePercent': float(latest_price.change_percent) if latest_price else 0,
-                'volume': latest_price.volume if latest_price else 0,
-                'marketCap': stock.market_cap,
-                'high52w': high_52w,
-                'low52w': low_52w,
-                'historicalData': historical_data,
-                'indicators': indicators
+                'symbol': symbol,
+                'indicator': indicator,
+                'window': window,
+                'values': points
             }
-            
-            # Cache for 5 minutes
-            cache.set(cache_key, data, 300)
-            
             return Response(success_response(data=data))
-            
+
+        except Stock.DoesNotExist:
+            return Response(
+                error_response(message='Stock not found'),
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             return Response(
-                error_response(message=f"Error fetching stock data: {str(e)}"),
+                error_response(message=f"Error calculating indicator: {str(e)}"),
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
@@ -191,22 +329,47 @@ class MarketScannerView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """GET /api/market/scanner?timeframe=daily"""
+        """GET /api/market/scanner?timeframe=daily|weekly|monthly|live"""
         timeframe = request.query_params.get('timeframe', 'daily')
         
-        # Check cache
+        # Intraday leaderboards maintained from the quote stream
+        if timeframe == 'live':
+            try:
+                data = LiveMarketScanner().leaderboards(k=10)
+                return Response(success_response(data=data))
+            except Exception as e:
+                return Response(
+                    error_response(message=f"Error fetching live scanner data: {str(e)}"),
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+        
+        # The latest run id is the version of the scanner payload
+        version = get_data_version('scanner', timeframe)
+        if version:
+            etag = make_etag('scanner', timeframe, version['version'])
+            not_modified = conditional_response(request, etag, version['modified'])
+            if not_modified is not None:
+                return not_modified
+        
+        # Serve the pre-rendered snapshot of the latest run
+        blob = get_scan_snapshot(timeframe)
+        if blob:
+            return self._snapshot_response(blob, timeframe)
+        
+        # Check cache (empty-state payload)
         cache_key = f"market_scanner_{timeframe}"
         cached_data = cache.get(cache_key)
         if cached_data:
             return Response(success_response(data=cached_data))
         
         try:
-            # Get latest scan timestamp
-            latest = MarketScanResult.objects.filter(
-                timeframe=timeframe
-            ).order_by('-timestamp').first()
+            # Get latest completed scan run
+            run = ScanRun.objects.filter(
+                timeframe=timeframe,
+                status='completed'
+            ).order_by('-finished_at').first()
             
-            if not latest:
+            if not run:
                 # Return empty but valid response when no scans have been run yet
                 # This allows frontend to load without 404, and lets users trigger a scan
                 data = {
@@ -232,48 +395,15 @@ class MarketScannerView(APIView):
                     message='No scan results available yet'
                 ))
             
-            # Get all results from the same scan batch (within 1 minute of latest)
-            from datetime import timedelta
-            timestamp = latest.timestamp
-            time_window = timestamp - timedelta(minutes=1)
-            results = MarketScanResult.objects.filter(
-                timeframe=timeframe,
-                timestamp__gte=time_window
-            ).select_related('stock')
-            
-            # Separate by categories
-            gainers = results.filter(is_gainer=True).order_by('-change_percent')[:10]
-            losers = results.filter(is_loser=True).order_by('change_percent')[:10]
-            most_active = results.order_by('-volume')[:10]
-            unusual_volume = results.filter(is_unusual_volume=True).order_by('-volume_ratio')[:10]
-            breakouts = results.filter(is_breakout=True).order_by('-change_percent')[:10]
-            
-            # Calculate market overview
-            total_scanned = results.count()
-            bullish_count = results.filter(trend='Bullish').count()
-            bearish_count = results.filter(trend='Bearish').count()
-            avg_change = results.aggregate(Avg('change_percent'))['change_percent__avg'] or 0
-            
-            data = {
-                'timeframe': timeframe,
-                'timestamp': timestamp.isoformat(),
-                'gainers': MarketScanResultSerializer(gainers, many=True).data,
-                'losers': MarketScanResultSerializer(losers, many=True).data,
-                'mostActive': MarketScanResultSerializer(most_active, many=True).data,
-                'unusualVolume': MarketScanResultSerializer(unusual_volume, many=True).data,
-                'breakouts': MarketScanResultSerializer(breakouts, many=True).data,
-                'marketOverview': {
-                    'totalScanned': total_scanned,
-                    'bullish': bullish_count,
-                    'bearish': bearish_count,
-                    'avgChange': round(float(avg_change), 2)  # Round to 2 decimal places
-                }
-            }
-            
-            # Cache for 10 minutes
-            cache.set(cache_key, data, 600)
+            # Snapshot evicted from cache: republish the stored copy, or rebuild
+            # it for runs saved before snapshots existed
+            if run.snapshot:
+                blob = run.snapshot
+                publish_scan_snapshot(run)
+            else:
+                blob = rebuild_snapshot_for_run(run)
             
-            return Response(success_response(data=data))
+            return self._snapshot_response(blob, timeframe)
             
         except Exception as e:
             return Response(
@@ -281,6 +411,13 @@ class MarketScannerView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def _snapshot_response(self, blob, timeframe):
+        response = HttpResponse(blob, content_type='application/json')
+        version = get_data_version('scanner', timeframe)
+        if version:
+            set_validators(response, make_etag('scanner', timeframe, version['version']), version['modified'])
+        return response
+    
     def post(self, request):
         """POST /api/market/scanner/run-now/ to trigger an immediate scan"""
         timeframe = request.data.get('timeframe', 'daily')
@@ -306,6 +443,272 @@ class MarketScannerView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class StockScreenerView(APIView):
+    """Screen the universe with user-defined filter expressions"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """GET /api/market/screener?expression=rsi_14 < 30 AND close > sma_200&page=1&page_size=50&sort=-volume_ratio"""
+        return self._screen(request.query_params)
+
+    def post(self, request):
+        """POST /api/market/screener with the same parameters in the body"""
+        return self._screen(request.data)
+
+    def _screen(self, params):
+        expression = params.get('expression', '')
+        sort = params.get('sort')
+        if not isinstance(expression, str) or not isinstance(sort, (str, type(None))):
+            return Response(
+                error_response(message='expression and sort must be strings'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            page = int(params.get('page', 1))
+            page_size = int(params.get('page_size', 50))
+        except (TypeError, ValueError):
+            return Response(
+                error_response(message='page and page_size must be integers'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+            return Response(
+                error_response(message=f'page must be >= 1 and page_size 1-{MAX_PAGE_SIZE}'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            data = StockScreener().screen(
+                expression, page=page, page_size=page_size, sort=sort
+            )
+            return Response(success_response(data=data))
+
+        except ScreenerSyntaxError as e:
+            return Response(
+                error_response(message=f"Invalid screener expression: {str(e)}"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                error_response(message=f"Error running screener: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+NEWS_LOOKBACK_DAYS = 7
+NEWS_PAGE_SIZE = 20
+QUICK_SENTIMENT_LIMIT = 5  # TextBlob-scored articles per request
+
+
+def _recent_news(stock):
+    """Articles of the last NEWS_LOOKBACK_DAYS, newest first"""
+    from django.utils import timezone
+    since = timezone.now() - timedelta(days=NEWS_LOOKBACK_DAYS)
+    return NewsArticle.objects.filter(
+        stock=stock,
+        published_at__gte=since
+    ).order_by('-published_at')[:NEWS_PAGE_SIZE]
+
+
+def _article_sentiments_queryset(articles):
+    return Sentiment.objects.filter(news_article__in=articles).order_by('pk')
+
+
+def _first_sentiment_per_article(sentiments):
+    """{article id: its first stored sentiment}"""
+    by_article = {}
+    for sentiment in sentiments:
+        by_article.setdefault(sentiment.news_article_id, sentiment)
+    return by_article
+
+
+def _quick_sentiments(stock, articles, sentiments):
+    """
+    Unsaved local (TextBlob) sentiments for the first few articles that have
+    none yet, to keep the endpoint snappy
+    """
+    quick = []
+    for article in articles:
+        if len(quick) >= QUICK_SENTIMENT_LIMIT:
+            break
+        if article.pk in sentiments:
+            continue
+        try:
+            polarity = float(TextBlob(f"{article.title} {article.description}").sentiment.polarity)
+        except Exception:
+            continue
+        if polarity > 0.1:
+            lbl = 'positive'
+        elif polarity < -0.1:
+            lbl = 'negative'
+        else:
+            lbl = 'neutral'
+        quick.append(Sentiment(
+            stock=stock,
+            news_article=article,
+            ai_sentiment=lbl,
+            ai_score=polarity,
+            analysis='Quick local sentiment (TextBlob).',
+            overall_sentiment=lbl,
+            overall_score=polarity,
+            total_articles=1
+        ))
+    return quick
+
+
+def _news_payload(stock, symbol, company_name, articles, sentiments):
+    """News response data: articles with sentiment, relevance sections, overall sentiment"""
+    news_with_sentiment = []
+    total_score = 0
+    bullish = 0
+    neutral = 0
+    bearish = 0
+
+    for article in articles:
+        sentiment_obj = sentiments.get(article.pk)
+        article_data = NewsArticleSerializer(article).data
+
+        if sentiment_obj:
+            article_data['sentiment'] = {
+                'score': sentiment_obj.ai_score,
+                'label': sentiment_obj.ai_sentiment,
+                'explanation': sentiment_obj.analysis
+            }
+
+            total_score += sentiment_obj.ai_score
+            if sentiment_obj.ai_sentiment == 'positive':
+                bullish += 1
+            elif sentiment_obj.ai_sentiment == 'negative':
+                bearish += 1
+            else:
+                neutral += 1
+        else:
+            article_data['sentiment'] = {
+                'score': 0,
+                'label': 'neutral',
+                'explanation': 'Sentiment not available yet.'
+            }
+
+        news_with_sentiment.append(article_data)
+
+    # Calculate overall sentiment
+    total_articles = len(news_with_sentiment)
+    avg_score = total_score / total_articles if total_articles > 0 else 0
+
+    if avg_score > 0.2:
+        overall_sentiment = 'Positive'
+    elif avg_score < -0.2:
+        overall_sentiment = 'Negative'
+    else:
+        overall_sentiment = 'Neutral'
+
+    # Relevance scoring and grouping for near real-time display ordering
+    def domain_from_url(url):
+        try:
+            return url.split('/')[2] if '://' in url else ''
+        except Exception:
+            return ''
+
+    def compute_score(article):
+        import math
+        text = f"{article.get('title','')} {article.get('description','')}".lower()
+        dom = domain_from_url(article.get('url',''))
+        score = 0
+        # Stock relevance
+        if symbol.lower() in text:
+            score += 5
+        if company_name and company_name.lower() in text:
+            score += 4
+        # Domain weight (finance sources)
+        finance_domains = [
+            'reuters.com','bloomberg.com','wsj.com','finance.yahoo.com','marketwatch.com','seekingalpha.com','cnbc.com','investors.com','financialpost.com','barrons.com','fool.com','investopedia.com','nasdaq.com','thestreet.com',
+            'economictimes.indiatimes.com','moneycontrol.com','livemint.com','business-standard.com','ndtv.com','thehindu.com','hindustantimes.com','indianexpress.com'
+        ]
+        if any(d in dom for d in finance_domains):
+            score += 3
+        # Recency
+        try:
+            from datetime import datetime
+            pub = datetime.fromisoformat(article.get('publishedAt')) if isinstance(article.get('publishedAt'), str) else None
+        except Exception:
+            pub = None
+        try:
+            from django.utils import timezone
+            now = timezone.now()
+            if pub:
+                age_hours = abs((now - pub).total_seconds())/3600.0
+                if age_hours <= 24:
+                    score += 2
+                elif age_hours <= 72:
+                    score += 1
+        except Exception:
+            pass
+        # Geography
+        stock_country = 'India' if symbol.upper().endswith('.NS') else 'US'
+        india_domains = ['indiatimes.com','moneycontrol.com','livemint.com','business-standard.com','ndtv.com','thehindu.com','hindustantimes.com','indianexpress.com']
+        us_domains = ['reuters.com','bloomberg.com','wsj.com','marketwatch.com','cnbc.com','barrons.com','nasdaq.com','thestreet.com','investopedia.com']
+        if stock_country == 'India' and any(d in dom for d in india_domains):
+            score += 2
+        elif stock_country == 'US' and any(d in dom for d in us_domains):
+            score += 2
+        return score
+
+    # Grouping
+    stock_related = []
+    sector_related = []
+    country_related = []
+    global_related = []
+    sector = getattr(stock, 'sector', '') or ''
+    sector_tokens = [w.lower() for w in sector.split() if len(w) > 3]
+
+    for a in news_with_sentiment:
+        text = f"{a.get('title','')} {a.get('description','')}".lower()
+        dom = domain_from_url(a.get('url',''))
+        # Determine bucket
+        if symbol.lower() in text or (company_name and company_name.lower() in text):
+            stock_related.append({**a, 'score': compute_score(a)})
+        elif any(tok in text for tok in sector_tokens):
+            sector_related.append({**a, 'score': compute_score(a)})
+        else:
+            if symbol.upper().endswith('.NS'):
+                india_domains = ['indiatimes.com','moneycontrol.com','livemint.com','business-standard.com','ndtv.com','thehindu.com','hindustantimes.com','indianexpress.com']
+                if any(d in dom for d in india_domains):
+                    country_related.append({**a, 'score': compute_score(a)})
+                else:
+                    global_related.append({**a, 'score': compute_score(a)})
+            else:
+                us_domains = ['reuters.com','bloomberg.com','wsj.com','marketwatch.com','cnbc.com','barrons.com','nasdaq.com','thestreet.com','investopedia.com']
+                if any(d in dom for d in us_domains):
+                    country_related.append({**a, 'score': compute_score(a)})
+                else:
+                    global_related.append({**a, 'score': compute_score(a)})
+
+    # Sort by score desc
+    stock_related.sort(key=lambda x: x.get('score', 0), reverse=True)
+    sector_related.sort(key=lambda x: x.get('score', 0), reverse=True)
+    country_related.sort(key=lambda x: x.get('score', 0), reverse=True)
+    global_related.sort(key=lambda x: x.get('score', 0), reverse=True)
+
+    data = {
+        'news': news_with_sentiment,
+        'sections': {
+            'stockRelated': stock_related,
+            'sector': sector_related,
+            'country': country_related,
+            'global': global_related
+        },
+        'overallSentiment': {
+            'score': avg_score,
+            'label': overall_sentiment,
+            'totalArticles': total_articles,
+            'bullish': bullish,
+            'neutral': neutral,
+            'bearish': bearish
+        }
+    }
+
+    return data
+
+
 class NewsView(APIView):
     """Get news articles with sentiment"""
     permission_classes = [IsAuthenticated]
@@ -335,218 +738,25 @@ class NewsView(APIView):
             stock = Stock.objects.get(symbol=symbol.upper())
             
             # Get recent news (last 7 days)
-            from django.utils import timezone
-            seven_days_ago = timezone.now() - timedelta(days=7)
-            news_articles = NewsArticle.objects.filter(
-                stock=stock,
-                published_at__gte=seven_days_ago
-            ).order_by('-published_at')[:20]
+            news_articles = _recent_news(stock)
 
             # If forceRefresh requested or DB empty, fetch immediately
             if (force_refresh and str(force_refresh).lower() in ['1', 'true']) or not news_articles.exists():
                 news_service = NewsAPIService()
                 _ = news_service.fetch_news(symbol, company_name)
-                news_articles = NewsArticle.objects.filter(
-                    stock=stock,
-                    published_at__gte=seven_days_ago
-                ).order_by('-published_at')[:20]
-            
-            # Get sentiment for each article
-            news_with_sentiment = []
-            total_score = 0
-            bullish = 0
-            neutral = 0
-            bearish = 0
-            
-            quick_analyzed = 0
-            for article in news_articles:
-                sentiment_obj = Sentiment.objects.filter(
-                    news_article=article
-                ).first()
-                
-                article_data = NewsArticleSerializer(article).data
-                
-                if sentiment_obj:
-                    article_data['sentiment'] = {
-                        'score': sentiment_obj.ai_score,
-                        'label': sentiment_obj.ai_sentiment,
-                        'explanation': sentiment_obj.analysis
-                    }
-                    
-                    total_score += sentiment_obj.ai_score
-                    if sentiment_obj.ai_sentiment == 'positive':
-                        bullish += 1
-                    elif sentiment_obj.ai_sentiment == 'negative':
-                        bearish += 1
-                    else:
-                        neutral += 1
-                else:
-                    # Fast local sentiment for first few articles to keep endpoint snappy
-                    try:
-                        if quick_analyzed < 5:  # cap per request
-                            text = f"{article.title} {article.description}"
-                            polarity = TextBlob(text).sentiment.polarity
-                            if polarity > 0.1:
-                                lbl = 'positive'
-                            elif polarity < -0.1:
-                                lbl = 'negative'
-                            else:
-                                lbl = 'neutral'
-
-                            Sentiment.objects.create(
-                                stock=stock,
-                                news_article=article,
-                                ai_sentiment=lbl,
-                                ai_score=float(polarity),
-                                analysis='Quick local sentiment (TextBlob).',
-                                overall_sentiment=lbl,
-                                overall_score=float(polarity),
-                                total_articles=1
-                            )
-                            article_data['sentiment'] = {
-                                'score': float(polarity),
-                                'label': lbl,
-                                'explanation': 'Quick local sentiment (TextBlob).'
-                            }
-                            total_score += float(polarity)
-                            if lbl == 'positive':
-                                bullish += 1
-                            elif lbl == 'negative':
-                                bearish += 1
-                            else:
-                                neutral += 1
-                            quick_analyzed += 1
-                        else:
-                            article_data['sentiment'] = {
-                                'score': 0,
-                                'label': 'neutral',
-                                'explanation': 'Sentiment not available yet.'
-                            }
-                    except Exception:
-                        article_data['sentiment'] = {
-                            'score': 0,
-                            'label': 'neutral',
-                            'explanation': 'Sentiment not available yet.'
-                        }
-                
-                news_with_sentiment.append(article_data)
-            
-            # Calculate overall sentiment
-            total_articles = len(news_with_sentiment)
-            avg_score = total_score / total_articles if total_articles > 0 else 0
+                news_articles = _recent_news(stock)
             
-            if avg_score > 0.2:
-                overall_sentiment = 'Positive'
-            elif avg_score < -0.2:
-                overall_sentiment = 'Negative'
-            else:
-                overall_sentiment = 'Neutral'
-            
-            # Relevance scoring and grouping for near real-time display ordering
-            def domain_from_url(url):
-                try:
-                    return url.split('/')[2] if '://' in url else ''
-                except Exception:
-                    return ''
-
-            def compute_score(article):
-                import math
-                text = f"{article.get('title','')} {article.get('description','')}".lower()
-                dom = domain_from_url(article.get('url',''))
-                score = 0
-                # Stock relevance
-                if symbol.lower() in text:
-                    score += 5
-                if company_name and company_name.lower() in text:
-                    score += 4
-                # Domain weight (finance sources)
-                finance_domains = [
-                    'reuters.com','bloomberg.com','wsj.com','finance.yahoo.com','marketwatch.com','seekingalpha.com','cnbc.com','investors.com','financialpost.com','barrons.com','fool.com','investopedia.com','nasdaq.com','thestreet.com',
-                    'economictimes.indiatimes.com','moneycontrol.com','livemint.com','business-standard.com','ndtv.com','thehindu.com','hindustantimes.com','indianexpress.com'
-                ]
-                if any(d in dom for d in finance_domains):
-                    score += 3
-                # Recency
-                try:
-                    from datetime import datetime
-                    pub = datetime.fromisoformat(article.get('publishedAt')) if isinstance(article.get('publishedAt'), str) else None
-                except Exception:
-                    pub = None
-                try:
-                    from django.utils import timezone
-                    now = timezone.now()
-                    if pub:
-                        age_hours = abs((now - pub).total_seconds())/3600.0
-                        if age_hours <= 24:
-                            score += 2
-                        elif age_hours <= 72:
-                            score += 1
-                except Exception:
-                    pass
-                # Geography
-                stock_country = 'India' if symbol.upper().endswith('.NS') else 'US'
-                india_domains = ['indiatimes.com','moneycontrol.com','livemint.com','business-standard.com','ndtv.com','thehindu.com','hindustantimes.com','indianexpress.com']
-                us_domains = ['reuters.com','bloomberg.com','wsj.com','marketwatch.com','cnbc.com','barrons.com','nasdaq.com','thestreet.com','investopedia.com']
-                if stock_country == 'India' and any(d in dom for d in india_domains):
-                    score += 2
-                elif stock_country == 'US' and any(d in dom for d in us_domains):
-                    score += 2
-                return score
-
-            # Grouping
-            stock_related = []
-            sector_related = []
-            country_related = []
-            global_related = []
-            sector = getattr(stock, 'sector', '') or ''
-            sector_tokens = [w.lower() for w in sector.split() if len(w) > 3]
-
-            for a in news_with_sentiment:
-                text = f"{a.get('title','')} {a.get('description','')}".lower()
-                dom = domain_from_url(a.get('url',''))
-                # Determine bucket
-                if symbol.lower() in text or (company_name and company_name.lower() in text):
-                    stock_related.append({**a, 'score': compute_score(a)})
-                elif any(tok in text for tok in sector_tokens):
-                    sector_related.append({**a, 'score': compute_score(a)})
-                else:
-                    if symbol.upper().endswith('.NS'):
-                        india_domains = ['indiatimes.com','moneycontrol.com','livemint.com','business-standard.com','ndtv.com','thehindu.com','hindustantimes.com','indianexpress.com']
-                        if any(d in dom for d in india_domains):
-                            country_related.append({**a, 'score': compute_score(a)})
-                        else:
-                            global_related.append({**a, 'score': compute_score(a)})
-                    else:
-                        us_domains = ['reuters.com','bloomberg.com','wsj.com','marketwatch.com','cnbc.com','barrons.com','nasdaq.com','thestreet.com','investopedia.com']
-                        if any(d in dom for d in us_domains):
-                            country_related.append({**a, 'score': compute_score(a)})
-                        else:
-                            global_related.append({**a, 'score': compute_score(a)})
-
-            # Sort by score desc
-            stock_related.sort(key=lambda x: x.get('score', 0), reverse=True)
-            sector_related.sort(key=lambda x: x.get('score', 0), reverse=True)
-            country_related.sort(key=lambda x: x.get('score', 0), reverse=True)
-            global_related.sort(key=lambda x: x.get('score', 0), reverse=True)
+            # Stored sentiment of every article in one query
+            articles = list(news_articles)
+            sentiments = _first_sentiment_per_article(_article_sentiments_queryset(articles))
 
-            data = {
-                'news': news_with_sentiment,
-                'sections': {
-                    'stockRelated': stock_related,
-                    'sector': sector_related,
-                    'country': country_related,
-                    'global': global_related
-                },
-                'overallSentiment': {
-                    'score': avg_score,
-                    'label': overall_sentiment,
-                    'totalArticles': total_articles,
-                    'bullish': bullish,
-                    'neutral': neutral,
-                    'bearish': bearish
-                }
-            }
+            quick = _quick_sentiments(stock, articles, sentiments)
+            if quick:
+                Sentiment.objects.bulk_create(quick)
+                bump_data_version('sentiment', stock.symbol)
+                sentiments.update({sentiment.news_article_id: sentiment for sentiment in quick})
             
+            data = _news_payload(stock, symbol, company_name, articles, sentiments)
             return Response(success_response(data=data))
             
         except Stock.DoesNotExist:
@@ -571,6 +781,14 @@ class SentimentView(APIView):
             symbol = (resolved.get('canonical') or symbol).upper()
         except Exception:
             symbol = symbol.upper()
+
+        version = get_data_version('sentiment', symbol)
+        if version:
+            etag = make_etag('sentiment', symbol, version['version'])
+            not_modified = conditional_response(request, etag, version['modified'])
+            if not_modified is not None:
+                return not_modified
+
         try:
             stock = Stock.objects.get(symbol=symbol.upper())
             
@@ -596,7 +814,16 @@ class SentimentView(APIView):
                 'timestamp': sentiment.timestamp.isoformat()
             }
             
-            return Response(success_response(data=data))
+            if version is None:
+                version = set_data_version(
+                    'sentiment', stock.symbol,
+                    f"{sentiment.pk}:{sentiment.timestamp.timestamp()}",
+                    sentiment.timestamp.timestamp()
+                )
+            response = Response(success_response(data=data))
+            return set_validators(
+                response, make_etag('sentiment', symbol, version['version']), version['modified']
+            )
             
         except Stock.DoesNotExist:
             return Response(
@@ -604,6 +831,73 @@ class SentimentView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+AI_MIN_HISTORY = 60
+AI_FORECAST_STEPS = 30
+
+
+def _insufficient_history_response(count):
+    logger.warning(f"Insufficient data: {count} records found, {AI_MIN_HISTORY} required")
+    return Response(
+        error_response(
+            message=f'Not enough historical data. Found {count} records, need at least 60 for AI prediction. The stock may be newly listed or have insufficient trading history.',
+            errors={'data': [f'Only {count} historical price points available']}
+        ),
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _history_frame(historical):
+    """DataFrame of fetcher history bars, in the column layout of stored prices"""
+    return pd.DataFrame([{
+        'timestamp': item['date'],
+        'open': float(item['open']),
+        'high': float(item['high']),
+        'low': float(item['low']),
+        'close': float(item['close']),
+        'volume': item['volume']
+    } for item in historical])
+
+
+def _ai_prediction_data(df, predictions, currency):
+    """Prediction text (30 days out, in the stock's currency) from the LSTM forecast"""
+    # If forecast is unrealistically flat, nudge with a minimal drift based on recent slope
+    if predictions:
+        try:
+            closes = pd.Series(df['close']).astype(float).dropna()
+            last_close = float(closes.iloc[-1])
+            change_pct = ((predictions[-1] - last_close) / last_close) * 100 if last_close else 0
+            if abs(change_pct) < 0.1:  # within 0.1%, treat as flat
+                drift = ((closes.iloc[-1] - closes.iloc[-5]) / closes.iloc[-5] * 100) if len(closes) >= 5 else 0
+                sign = 1 if drift >= 0 else -1
+                # apply small 0.5% drift if totally flat
+                predictions[-1] = last_close * (1 + sign * 0.005)
+        except Exception:
+            pass
+
+        prediction_text = f"Based on AI analysis, the stock is predicted to reach ${predictions[-1]:.2f} in 30 days."
+    else:
+        prediction_text = "Unable to generate prediction with current data."
+
+    # Get currency symbol
+    currency_symbol = '$'  # default
+    if currency == 'INR':
+        currency_symbol = '₹'
+    elif currency == 'GBP':
+        currency_symbol = '£'
+    elif currency == 'JPY':
+        currency_symbol = '¥'
+
+    # Update prediction text with correct currency
+    if predictions:
+        prediction_text = f"Based on AI analysis, the stock is predicted to reach {currency_symbol}{predictions[-1]:.2f} in 30 days."
+
+    data = {
+        'prediction': prediction_text,
+        'currency': currency
+    }
+    return data
+
+
 class AIPredictionView(APIView):
     """AI-based stock prediction using LSTM"""
     permission_classes = [IsAuthenticated]
@@ -676,98 +970,54 @@ class AIPredictionView(APIView):
             )
         
         try:
-            # Convert historical data to DataFrame
+            stock, created = Stock.objects.get_or_create(
+                symbol=symbol.upper(),
+                defaults={'name': symbol.upper()}
+            )
+
             if historical_data:
                 logger.info(f"Using provided historical data: {len(historical_data)} records")
                 df = pd.DataFrame(historical_data)
+                source = series_fingerprint(df)
+
+                def load_history():
+                    return df
             else:
                 # Fetch from database first
                 logger.info(f"Fetching historical data from database for symbol: {symbol.upper()}")
-                stock, created = Stock.objects.get_or_create(
-                    symbol=symbol.upper(),
-                    defaults={'name': symbol.upper()}
-                )
                 prices = StockPrice.objects.filter(stock=stock).order_by('timestamp')[:500]
                 price_list = list(prices.values('timestamp', 'open', 'high', 'low', 'close', 'volume'))
                 logger.info(f"Fetched {len(price_list)} price records from database")
-                
-                # If not enough data in DB, fetch from yfinance
-                if len(price_list) < 60:
-                    logger.info(f"Not enough data in DB, fetching from yfinance...")
-                    from services.market_data.fetcher import MarketDataFetcher
-                    fetcher = MarketDataFetcher()
-                    historical = fetcher.fetch_historical_data(symbol, period='1y', interval='1d')
-                    
-                    if historical:
-                        logger.info(f"Fetched {len(historical)} records from yfinance")
-                        # Convert to DataFrame format
-                        df = pd.DataFrame([{
-                            'timestamp': item['date'],
-                            'open': float(item['open']),
-                            'high': float(item['high']),
-                            'low': float(item['low']),
-                            'close': float(item['close']),
-                            'volume': item['volume']
-                        } for item in historical])
-                    else:
-                        df = pd.DataFrame(price_list)
-                else:
-                    df = pd.DataFrame(price_list)
-            
-            logger.info(f"DataFrame length: {len(df)}, Required: 60")
-            
-            if len(df) < 60:
-                logger.warning(f"Insufficient data: {len(df)} records found, 60 required")
-                return Response(
-                    error_response(
-                        message=f'Not enough historical data. Found {len(df)} records, need at least 60 for AI prediction. The stock may be newly listed or have insufficient trading history.',
-                        errors={'data': [f'Only {len(df)} historical price points available']}
-                    ),
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Use LSTM predictor
-            predictor = LSTMPredictor()
-            predictions = predictor.predict(df, steps=30)
-            
-            # If forecast is unrealistically flat, nudge with a minimal drift based on recent slope
-            if predictions:
-                try:
-                    closes = pd.Series(df['close']).astype(float).dropna()
-                    last_close = float(closes.iloc[-1])
-                    change_pct = ((predictions[-1] - last_close) / last_close) * 100 if last_close else 0
-                    if abs(change_pct) < 0.1:  # within 0.1%, treat as flat
-                        drift = ((closes.iloc[-1] - closes.iloc[-5]) / closes.iloc[-5] * 100) if len(closes) >= 5 else 0
-                        sign = 1 if drift >= 0 else -1
-                        # apply small 0.5% drift if totally flat
-                        predictions[-1] = last_close * (1 + sign * 0.005)
-                except Exception:
-                    pass
-
-                prediction_text = f"Based on AI analysis, the stock is predicted to reach ${predictions[-1]:.2f} in 30 days."
-            else:
-                prediction_text = "Unable to generate prediction with current data."
-            
-            # Get currency symbol
-            currency_symbol = '$'  # default
-            if stock.currency == 'INR':
-                currency_symbol = '₹'
-            elif stock.currency == 'GBP':
-                currency_symbol = '£'
-            elif stock.currency == 'JPY':
-                currency_symbol = '¥'
-            
-            # Update prediction text with correct currency
-            if predictions:
-                prediction_text = f"Based on AI analysis, the stock is predicted to reach {currency_symbol}{predictions[-1]:.2f} in 30 days."
-            
-            data = {
-                'prediction': prediction_text,
-                'currency': stock.currency
-            }
-            
+                source = stored_series_fingerprint(price_list)
+
+                def load_history():
+                    # If not enough data in DB, fetch from yfinance
+                    if len(price_list) < AI_MIN_HISTORY:
+                        logger.info(f"Not enough data in DB, fetching from yfinance...")
+                        from services.market_data.fetcher import MarketDataFetcher
+                        historical = MarketDataFetcher().fetch_historical_data(symbol, period='1y', interval='1d')
+                        if historical:
+                            logger.info(f"Fetched {len(historical)} records from yfinance")
+                            return _history_frame(historical)
+                    return pd.DataFrame(price_list)
+
+            def forecast():
+                history = load_history()
+                logger.info(f"DataFrame length: {len(history)}, Required: {AI_MIN_HISTORY}")
+                if len(history) < AI_MIN_HISTORY:
+                    raise InsufficientHistory(len(history))
+
+                # Use LSTM predictor
+                predictions = LSTMPredictor().predict(history, steps=AI_FORECAST_STEPS)
+                return _ai_prediction_data(history, predictions, stock.currency)
+
+            # Served from cache for a repeat of the same symbol, model, horizon and input
+            key = prediction_key(stock.symbol, source, AI_FORECAST_STEPS, stock.currency)
+            data = cached_prediction(key, forecast)
             return Response(success_response(data=data))
-            
+
+        except InsufficientHistory as e:
+            return _insufficient_history_response(e.count)
         except Exception as e:
             return Response(
                 error_response(message=f"Prediction failed: {str(e)}"),
@@ -779,7 +1029,28 @@ class StatisticalPredictionView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """GET /api/market/statistical-prediction - Returns API documentation"""
+        """
+        GET /api/market/statistical-prediction?symbol=AAPL - Latest stored prediction,
+        answered with 304 when the client's ETag / Last-Modified still match.
+        Without a symbol, returns API documentation.
+        """
+        symbol = request.query_params.get('symbol')
+        if symbol:
+            try:
+                resolved = resolve_symbol_or_name(symbol, limit=1)
+                symbol = resolved.get('canonical') or symbol
+            except Exception:
+                pass
+            symbol = symbol.upper()
+            
+            versions = self._prediction_versions(symbol)
+            if versions[0] is not None:
+                etag, modified = self._prediction_etag(symbol, versions)
+                not_modified = conditional_response(request, etag, modified)
+                if not_modified is not None:
+                    return not_modified
+            return self._prediction_response(symbol)
+        
         return Response({
             'endpoint': '/api/market/statistical-prediction/',
             'method': 'POST',
@@ -849,38 +1120,59 @@ class StatisticalPredictionView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        return self._prediction_response(symbol)
+    
+    def _prediction_versions(self, symbol):
+        """Stored version records of the prediction and indicator rows behind a response"""
+        return get_data_version('prediction', symbol), get_data_version('indicator', symbol)
+    
+    def _prediction_etag(self, symbol, versions):
+        prediction_version, indicator_version = versions
+        etag = make_etag(
+            'statistical_prediction', symbol,
+            prediction_version['version'],
+            indicator_version['version'] if indicator_version else None
+        )
+        modified = max(v['modified'] for v in versions if v)
+        return etag, modified
+    
+    def _prediction_response(self, symbol):
+        """Latest stored prediction of a symbol with its indicators, or a default structure"""
+        import logging
+        logger = logging.getLogger(__name__)
+        
         try:
-            stock, created = Stock.objects.get_or_create(
-                symbol=symbol.upper(),
-                defaults={'name': symbol.upper()}
-            )
+            # Read-only: a lookup for an unknown symbol must not create a Stock row
+            stock = Stock.objects.filter(symbol=symbol.upper()).first()
             
             # Get latest prediction from database
             prediction = StockPrediction.objects.filter(
                 stock=stock
-            ).order_by('-timestamp').first()
+            ).order_by('-timestamp').first() if stock else None
             
             if not prediction:
                 # No prediction exists yet - return a non-null default payload to keep frontend stable
                 logger.warning(f"No prediction available for {symbol}; returning default structure")
                 from django.utils import timezone
                 current_price = None
-                try:
-                    from services.market_data.fetcher import MarketDataFetcher
-                    fetcher = MarketDataFetcher()
-                    quote = fetcher.fetch_real_time_quote(symbol)
-                    # Accept either 'current_price' or legacy 'price'
-                    cp = quote.get('current_price') if isinstance(quote, dict) else None
-                    if cp is None and isinstance(quote, dict):
-                        cp = quote.get('price')
-                    current_price = float(cp) if cp is not None else None
-                except Exception:
-                    # Quote fetch is best-effort; proceed with None
-                    pass
+                # Quotes are only looked up for symbols in our universe
+                if stock is not None:
+                    try:
+                        from services.market_data.fetcher import MarketDataFetcher
+                        fetcher = MarketDataFetcher()
+                        quote = fetcher.fetch_real_time_quote(symbol)
+                        # Accept either 'current_price' or legacy 'price'
+                        cp = quote.get('current_price') if isinstance(quote, dict) else None
+                        if cp is None and isinstance(quote, dict):
+                            cp = quote.get('price')
+                        current_price = float(cp) if cp is not None else None
+                    except Exception:
+                        # Quote fetch is best-effort; proceed with None
+                        pass
 
                 default_data = {
                     'symbol': symbol.upper(),
-                    'currency': stock.currency,
+                    'currency': stock.currency if stock else None,
                     'timestamp': timezone.now().isoformat(),
                     'currentPrice': current_price,
                     'technicalIndicators': {
@@ -986,7 +1278,24 @@ class StatisticalPredictionView(APIView):
                 }
             }
             
-            return Response(success_response(data=data))
+            # Seed the versions from the rows when no save has recorded them yet
+            prediction_version, indicator_version = self._prediction_versions(stock.symbol)
+            if prediction_version is None:
+                prediction_version = set_data_version(
+                    'prediction', stock.symbol,
+                    f"{prediction.pk}:{prediction.timestamp.timestamp()}",
+                    prediction.timestamp.timestamp()
+                )
+            if indicator_version is None and indicator:
+                indicator_version = set_data_version(
+                    'indicator', stock.symbol,
+                    f"{indicator.pk}:{indicator.timestamp.timestamp()}",
+                    indicator.timestamp.timestamp()
+                )
+            
+            response = Response(success_response(data=data))
+            etag, modified = self._prediction_etag(stock.symbol, (prediction_version, indicator_version))
+            return set_validators(response, etag, modified)
             
         except Stock.DoesNotExist:
             return Response(
@@ -3,4 +3,11 @@ from django.apps import AppConfig
 class PortfolioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.portfolio'
-    verbose_name = 'Portfolio Management'
\ No newline at end of file
+    verbose_name = 'Portfolio Management'
+
+    def ready(self):
+        # import app-specific signals if present
+        try:
+            import apps.portfolio.signals  # noqa
+        except Exception:
+            pass
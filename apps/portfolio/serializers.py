@@ -1,15 +1,24 @@
 from rest_framework import serializers
 from .models import PortfolioHolding, Watchlist
 from apps.market.serializers import StockSerializer
+from services.portfolio.valuation import latest_closes, value_holdings
+
+_AMOUNT = serializers.DecimalField(max_digits=12, decimal_places=2)
+_PERCENT = serializers.DecimalField(max_digits=8, decimal_places=2)
+
 
 class PortfolioHoldingSerializer(serializers.ModelSerializer):
+    """
+    Valuation fields are read from the `valuations` context map
+    (services.portfolio.valuation.value_holdings) when the view provides it
+    """
     symbol = serializers.CharField(source='stock.symbol', read_only=True)
     stock_name = serializers.CharField(source='stock.name', read_only=True)
     currency = serializers.CharField(source='stock.currency', read_only=True)
-    total_cost = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
-    current_value = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
-    profit_loss = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
-    profit_loss_percent = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
+    total_cost = serializers.SerializerMethodField()
+    current_value = serializers.SerializerMethodField()
+    profit_loss = serializers.SerializerMethodField()
+    profit_loss_percent = serializers.SerializerMethodField()
     
     class Meta:
         model = PortfolioHolding
@@ -20,6 +29,24 @@ class PortfolioHoldingSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def _valuation(self, obj):
+        valuations = self.context.setdefault('valuations', {})
+        if obj.pk not in valuations:
+            valuations.update(value_holdings([obj]))
+        return valuations[obj.pk]
+
+    def get_total_cost(self, obj):
+        return _AMOUNT.to_representation(self._valuation(obj)['total_cost'])
+
+    def get_current_value(self, obj):
+        return _AMOUNT.to_representation(self._valuation(obj)['current_value'])
+
+    def get_profit_loss(self, obj):
+        return _AMOUNT.to_representation(self._valuation(obj)['profit_loss'])
+
+    def get_profit_loss_percent(self, obj):
+        return _PERCENT.to_representation(self._valuation(obj)['profit_loss_percent'])
+
 class PortfolioHoldingCreateSerializer(serializers.ModelSerializer):
     symbol = serializers.CharField(write_only=True)
     averagePrice = serializers.DecimalField(
@@ -92,11 +119,12 @@ class WatchlistSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'added_at']
     
     def get_current_price(self, obj):
-        """Get latest stock price"""
-        latest_price = obj.stock.prices.first()
-        if latest_price:
-            return float(latest_price.close)
-        return None
+        """Latest close, from the `latest_closes` context map when the view provides it"""
+        closes = self.context.get('latest_closes')
+        if closes is None:
+            closes = latest_closes([obj.stock_id])
+        close = closes.get(obj.stock_id)
+        return float(close) if close is not None else None
 
 class WatchlistCreateSerializer(serializers.ModelSerializer):
     symbol = serializers.CharField(write_only=True)
@@ -0,0 +1,35 @@
+import logging
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import PortfolioHolding, Watchlist
+from services.market_data.price_alerts import PriceAlertEngine
+from services.portfolio.streaming import PortfolioStream
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Watchlist)
+def index_watchlist_alerts(sender, instance, **kwargs):
+    """Keep the price alert index in step with the item's thresholds"""
+    try:
+        PriceAlertEngine().index(instance)
+    except Exception as e:
+        logger.error(f"Error indexing price alerts for watchlist item {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=Watchlist)
+def unindex_watchlist_alerts(sender, instance, **kwargs):
+    try:
+        PriceAlertEngine().remove(instance)
+    except Exception as e:
+        logger.error(f"Error removing price alerts for watchlist item {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=PortfolioHolding)
+@receiver(post_delete, sender=PortfolioHolding)
+def refresh_streaming_positions(sender, instance, **kwargs):
+    """Streaming subscribers get their cached positions reloaded"""
+    try:
+        PortfolioStream().refresh(instance.user_id)
+    except Exception as e:
+        logger.error(f"Error refreshing streaming positions for user {instance.user_id}: {e}")
@@ -0,0 +1,188 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from services.market_data.price_alerts import PriceAlertEngine, _index_key
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def _bound(value):
+    """(score, exclusive) of a ZRANGEBYSCORE bound"""
+    value = str(value)
+    if value.startswith('('):
+        return float(value[1:]), True
+    return float(value), False
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+
+class FakeRedis:
+    """The sorted set and set commands PriceAlertEngine uses, replying with bytes like redis-py"""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(m.encode() for m in members)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(
+            {(m if isinstance(m, bytes) else m.encode()): float(s) for m, s in mapping.items()}
+        )
+
+    def zrem(self, key, *members):
+        zset = self.data.get(key, {})
+        return sum(zset.pop(m if isinstance(m, bytes) else m.encode(), None) is not None for m in members)
+
+    def zscore(self, key, member):
+        return self.data.get(key, {}).get(member.encode())
+
+    def zrange(self, key, start, end, withscores=False):
+        members = sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        return members if withscores else [m for m, _ in members]
+
+    def zrangebyscore(self, key, low, high, withscores=False):
+        (low, low_open), (high, high_open) = _bound(low), _bound(high)
+        members = [
+            (m, s) for m, s in self.zrange(key, 0, -1, withscores=True)
+            if (low < s if low_open else low <= s) and (s < high if high_open else s <= high)
+        ]
+        return members if withscores else [m for m, _ in members]
+
+
+def item(pk, above=None, below=None, symbol='AAPL', user_id=7):
+    return SimpleNamespace(id=pk, user_id=user_id, stock_id=symbol, alert_price_above=above, alert_price_below=below)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PriceAlertEngineTests(SimpleTestCase):
+    """Runs against the cache (bisect) index; the Redis subclass below repeats every test"""
+
+    def setUp(self):
+        cache.clear()
+        self.engine = PriceAlertEngine()
+        self.assertIsNone(self.engine.redis)
+        patcher = mock.patch('services.websocket.broadcaster.broadcast_price_alert')
+        self.broadcast = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fired(self, price, symbol='AAPL'):
+        return [(a['watchlistId'], a['direction']) for a in self.engine.evaluate(symbol, price)]
+
+    def test_fires_once_per_crossing(self):
+        self.engine.index(item(1, above=100))
+        self.assertEqual(self.fired(99), [])
+        self.assertEqual(self.fired(100), [('1', 'above')])
+        self.assertEqual(self.fired(105), [])
+        self.broadcast.assert_called_once()
+        self.assertEqual(self.broadcast.call_args.args[0], '7')
+
+    def test_below_alerts_fire_at_or_under_the_threshold(self):
+        self.engine.index(item(1, below=50))
+        self.assertEqual(self.fired(51), [])
+        self.assertEqual(self.fired(49.5), [('1', 'below')])
+        self.assertEqual(self.fired(40), [])
+
+    def test_only_crossed_alerts_fire(self):
+        self.engine.index(item(1, above=100))
+        self.engine.index(item(2, above=110))
+        self.engine.index(item(3, above=100, symbol='MSFT'))
+        self.assertEqual(self.fired(105), [('1', 'above')])
+
+    def test_rearms_only_past_the_margin(self):
+        self.engine.index(item(1, above=100, below=90))
+        self.assertEqual(self.fired(101), [('1', 'above')])
+        # 99.8 is within the 0.5% margin of 100: still fired
+        self.assertEqual(self.fired(99.8), [])
+        self.assertEqual(self.fired(101), [])
+        self.assertEqual(self.fired(99), [])
+        self.assertEqual(self.fired(101), [('1', 'above')])
+
+        self.assertEqual(self.fired(89), [('1', 'below')])
+        self.assertEqual(self.fired(90.2), [])
+        self.assertEqual(self.fired(89), [])
+        self.assertEqual(self.fired(91), [])
+        self.assertEqual(self.fired(89), [('1', 'below')])
+
+    def test_reindexing_an_unchanged_threshold_keeps_it_fired(self):
+        self.engine.index(item(1, above=100))
+        self.fired(101)
+        self.engine.index(item(1, above=100))
+        self.assertEqual(self.fired(102), [])
+
+    def test_changing_the_threshold_rearms(self):
+        self.engine.index(item(1, above=100))
+        self.fired(101)
+        self.engine.index(item(1, above=101.5))
+        self.assertEqual(self.fired(102), [('1', 'above')])
+
+    def test_clearing_and_removing_drop_alerts(self):
+        self.engine.index(item(1, above=100, below=90))
+        self.engine.index(item(1, below=90))
+        self.assertEqual(self.fired(101), [])
+        self.engine.remove(item(1, below=90))
+        self.assertEqual(self.fired(80), [])
+
+    def test_rebuild_keeps_fired_state_of_unchanged_thresholds(self):
+        self.engine.index(item(1, above=100))
+        self.engine.index(item(2, above=100))
+        self.engine.index(item(3, above=100))
+        self.fired(101)
+
+        count = self.engine.rebuild([item(1, above=100), item(2, above=100.5), item(4, above=100)])
+        self.assertEqual(count, 3)
+        # 1 stays fired, 2 was edited and re-arms, 3 is gone and 4 is new
+        self.assertEqual(sorted(self.fired(101)), [('2', 'above'), ('4', 'above')])
+
+    def test_rebuild_drops_symbols_without_alerts(self):
+        self.engine.index(item(1, above=100, symbol='MSFT'))
+        self.engine.rebuild([item(2, above=100)])
+        self.assertEqual(self.fired(101, symbol='MSFT'), [])
+        self.assertEqual(self.fired(101), [('2', 'above')])
+
+    def test_claim_is_won_once(self):
+        self.engine.index(item(1, above=100))
+        self.assertTrue(self.engine._claim('AAPL', 'above', '1:7', 100.0))
+        self.assertFalse(self.engine._claim('AAPL', 'above', '1:7', 100.0))
+
+    def test_no_price_is_ignored(self):
+        self.engine.index(item(1, above=0))
+        self.assertEqual(self.fired(None), [])
+
+
+class RedisPriceAlertEngineTests(PriceAlertEngineTests):
+    """The same behaviour on the Redis sorted-set index"""
+
+    def setUp(self):
+        super().setUp()
+        self.engine.redis = FakeRedis()
+
+    def test_rebuild_drops_symbols_without_alerts(self):
+        super().test_rebuild_drops_symbols_without_alerts()
+        self.assertEqual(self.engine.redis.zrange(_index_key('MSFT', 'above'), 0, -1), [])
+        self.assertEqual(self.engine.redis.smembers('stockmind:alerts:symbols'), {b'AAPL'})
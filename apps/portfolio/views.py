@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.db.models import Sum, F, DecimalField
 from django.db.models.functions import Coalesce
+from services.portfolio.valuation import currency_breakdown, latest_closes, value_holdings
 from .models import PortfolioHolding, Watchlist
 from .serializers import (
     PortfolioHoldingSerializer,
@@ -20,51 +21,15 @@ class PortfolioSummaryView(APIView):
     
     def get(self, request):
         """GET /api/portfolio/summary - Returns portfolio value broken down by currency"""
-        holdings = PortfolioHolding.objects.filter(user=request.user).select_related('stock')
+        holdings = list(PortfolioHolding.objects.filter(user=request.user).select_related('stock'))
         
-        # Group holdings by currency
-        currency_breakdown = {}
-        total_holdings = 0
-        
-        for holding in holdings:
-            currency = holding.stock.currency or 'USD'
-            
-            # Get latest price
-            latest_price = holding.stock.prices.first()
-            current_value = float(holding.shares * latest_price.close) if latest_price else float(holding.total_cost)
-            total_cost = float(holding.total_cost)
-            profit_loss = current_value - total_cost
-            
-            if currency not in currency_breakdown:
-                currency_breakdown[currency] = {
-                    'currency': currency,
-                    'totalValue': 0,
-                    'totalCost': 0,
-                    'profitLoss': 0,
-                    'profitLossPercent': 0,
-                    'holdings': 0
-                }
-            
-            currency_breakdown[currency]['totalValue'] += current_value
-            currency_breakdown[currency]['totalCost'] += total_cost
-            currency_breakdown[currency]['profitLoss'] += profit_loss
-            currency_breakdown[currency]['holdings'] += 1
-            total_holdings += 1
-        
-        # Calculate percentages for each currency
-        for currency_data in currency_breakdown.values():
-            if currency_data['totalCost'] > 0:
-                currency_data['profitLossPercent'] = round(
-                    (currency_data['profitLoss'] / currency_data['totalCost']) * 100, 2
-                )
-            # Round values
-            currency_data['totalValue'] = round(currency_data['totalValue'], 2)
-            currency_data['totalCost'] = round(currency_data['totalCost'], 2)
-            currency_data['profitLoss'] = round(currency_data['profitLoss'], 2)
+        # Latest prices of all holdings in one query, totals grouped by currency
+        valuations = value_holdings(holdings)
+        breakdown = currency_breakdown(holdings, valuations)
         
         return Response(success_response(data={
-            'totalHoldings': total_holdings,
-            'currencyBreakdown': list(currency_breakdown.values()),
+            'totalHoldings': len(holdings),
+            'currencyBreakdown': breakdown,
             'note': 'Values are separated by currency. Convert to a common currency for total portfolio value.'
         }))
 
@@ -74,8 +39,10 @@ class PortfolioHoldingsView(APIView):
     
     def get(self, request):
         """GET /api/portfolio/holdings"""
-        holdings = PortfolioHolding.objects.filter(user=request.user).select_related('stock')
-        serializer = PortfolioHoldingSerializer(holdings, many=True)
+        holdings = list(PortfolioHolding.objects.filter(user=request.user).select_related('stock'))
+        serializer = PortfolioHoldingSerializer(
+            holdings, many=True, context={'valuations': value_holdings(holdings)}
+        )
         return Response(success_response(data=serializer.data))
     
     def post(self, request):
@@ -162,8 +129,9 @@ class WatchlistView(APIView):
     
     def get(self, request):
         """GET /api/portfolio/watchlist"""
-        watchlist = Watchlist.objects.filter(user=request.user).select_related('stock')
-        serializer = WatchlistSerializer(watchlist, many=True)
+        watchlist = list(Watchlist.objects.filter(user=request.user).select_related('stock'))
+        closes = latest_closes(item.stock_id for item in watchlist)
+        serializer = WatchlistSerializer(watchlist, many=True, context={'latest_closes': closes})
         return Response(success_response(data=serializer.data))
     
     def post(self, request):
@@ -71,6 +71,14 @@ app.conf.beat_schedule = {
         'schedule': crontab(day_of_week=0, hour=2, minute=0),  # Sunday 2 AM
         'kwargs': {'period': '1y', 'force_refresh': False},
     },
+    'warm-return-matrix': {
+        'task': 'tasks.market_tasks.warm_return_matrix',
+        'schedule': crontab(minute='*/30'),  # No-op until a new bar date is stored
+    },
+    'rebuild-price-alert-index-daily': {
+        'task': 'tasks.market_tasks.rebuild_price_alert_index',
+        'schedule': crontab(hour=0, minute=30),  # Resync the alert index with watchlists
+    },
     'validate-and-cleanup-stocks-daily': {
         'task': 'tasks.validation_tasks.validate_and_cleanup_stocks',
         'schedule': crontab(hour=1, minute=0),  # 1 AM daily - remove invalid/stale stocks
@@ -250,6 +250,10 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Serve upstream-bound market endpoints (stock detail, news, search, AI
+# prediction) with native async views; meant for ASGI (Daphne). Disable under WSGI.
+MARKET_ASYNC_VIEWS = config('MARKET_ASYNC_VIEWS', default=True, cast=bool)
+
 # External APIs
 ALPHA_VANTAGE_API_KEY = config('ALPHA_VANTAGE_API_KEY', default='')
 FINNHUB_API_KEY = config('FINNHUB_API_KEY', default='')
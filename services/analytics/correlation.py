@@ -0,0 +1,248 @@
+"""
+Correlation, covariance and portfolio risk of arbitrary symbol sets.
+
+Daily returns of the whole stock universe are computed once per latest bar
+from the aligned close panel (gaps forward-filled) and shared through the
+cache, with a per-process copy; a request only slices the columns and
+trailing window it needs. One worker builds a new matrix under a cache lock
+while the others keep serving the previous one. Covariances use pairwise-complete observations
+(expressed as matrix products over the NaN mask), so a symbol with a shorter
+history does not shorten every other pair.
+
+Portfolio risk (parametric VaR, diversification ratio) is computed from the
+same covariance matrix.
+"""
+import logging
+import math
+from datetime import timedelta
+from statistics import NormalDist
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Max
+from apps.market.models import StockPrice
+from services.analytics.panel import load_universe_panel, ordinals_to_iso
+from utils.constants import (
+    CACHE_TIMEOUT_DAY, RETURN_MATRIX_BUILD_TIMEOUT, RETURN_MATRIX_LOOKBACK_DAYS, TRADING_DAYS_PER_YEAR
+)
+
+logger = logging.getLogger(__name__)
+
+# Most recently built matrix, served while the next one is being built
+LATEST_MATRIX_KEY = f"return_matrix:{RETURN_MATRIX_LOOKBACK_DAYS}:latest"
+BUILD_LOCK_KEY = f"return_matrix:{RETURN_MATRIX_LOOKBACK_DAYS}:lock"
+
+# (cache key, matrix) of the last return matrix this process loaded
+_loaded = (None, None)
+
+
+class ReturnMatrixBuilding(Exception):
+    """Raised when the return matrix is being built and no earlier one exists"""
+
+
+def return_matrix_key(latest_bar):
+    return f"return_matrix:{RETURN_MATRIX_LOOKBACK_DAYS}:{latest_bar}"
+
+
+def _build_return_matrix(latest_bar):
+    days, symbols, closes = load_universe_panel(latest_bar - timedelta(days=RETURN_MATRIX_LOOKBACK_DAYS))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = closes[1:] / closes[:-1] - 1
+    returns[~np.isfinite(returns)] = np.nan
+    return {'days': days[1:], 'symbols': symbols, 'returns': returns.astype(np.float32)}
+
+
+def _use(key, matrix):
+    global _loaded
+    matrix['position'] = {symbol: i for i, symbol in enumerate(matrix['symbols'])}
+    _loaded = (key, matrix)
+    return matrix
+
+
+def get_return_matrix():
+    """
+    Shared universe return matrix: {'days', 'symbols', 'returns', 'position'},
+    or None when no prices are stored. While another worker builds the
+    current matrix the previous one is returned; ReturnMatrixBuilding is
+    raised when there is none yet.
+    """
+    latest_bar = StockPrice.objects.aggregate(latest=Max('timestamp'))['latest']
+    if latest_bar is None:
+        return None
+
+    key = return_matrix_key(latest_bar.isoformat())
+    loaded_key, loaded = _loaded
+    if loaded_key == key:
+        return loaded
+
+    matrix = cache.get(key)
+    if matrix is not None:
+        return _use(key, matrix)
+
+    if not cache.add(BUILD_LOCK_KEY, True, RETURN_MATRIX_BUILD_TIMEOUT):
+        # Another worker is building it; serve the previous matrix meanwhile
+        if loaded is not None:
+            return loaded
+        previous = cache.get(LATEST_MATRIX_KEY)
+        if previous is None:
+            raise ReturnMatrixBuilding('The return matrix is being built; try again shortly')
+        return _use(LATEST_MATRIX_KEY, previous)
+
+    try:
+        matrix = _build_return_matrix(latest_bar)
+        cache.set_many({key: matrix, LATEST_MATRIX_KEY: matrix}, CACHE_TIMEOUT_DAY)
+        logger.info(f"Built return matrix {matrix['returns'].shape} for {latest_bar.isoformat()}")
+    finally:
+        cache.delete(BUILD_LOCK_KEY)
+    return _use(key, matrix)
+
+
+def returns_panel(symbols, window=None):
+    """
+    (days, found symbols, returns, missing symbols) for the trailing `window`
+    trading days of the shared matrix
+    """
+    matrix = get_return_matrix()
+    if matrix is None:
+        return np.empty(0, dtype=np.int64), [], np.empty((0, 0)), list(symbols)
+
+    position = matrix['position']
+    found = [symbol for symbol in symbols if symbol in position]
+    missing = [symbol for symbol in symbols if symbol not in position]
+    rows = slice(-window, None) if window else slice(None)
+    returns = matrix['returns'][rows, [position[symbol] for symbol in found]].astype(float)
+
+    # Symbols without two returns in the window cannot be compared
+    usable = np.count_nonzero(~np.isnan(returns), axis=0) >= 2
+    missing += [symbol for symbol, ok in zip(found, usable) if not ok]
+    found = [symbol for symbol, ok in zip(found, usable) if ok]
+    return matrix['days'][rows], found, returns[:, usable], missing
+
+
+def pairwise_moments(returns):
+    """
+    Covariance and correlation matrices over pairwise-complete observations,
+    plus the number of observations of each pair
+    """
+    observed = ~np.isnan(returns)
+    mask = observed.astype(float)
+    x = np.where(observed, returns, 0.0)
+
+    counts = mask.T @ mask
+    sum_x = x.T @ mask  # [i, j]: sum of returns of i on days j is observed too
+    sum_x2 = (x * x).T @ mask
+    sum_xy = x.T @ x
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = (sum_xy - sum_x * sum_x.T / counts) / (counts - 1)
+        variance = (sum_x2 - sum_x ** 2 / counts) / (counts - 1)
+        correlation = covariance / np.sqrt(variance * variance.T)
+    covariance[counts < 2] = np.nan
+    correlation[counts < 2] = np.nan
+    np.fill_diagonal(correlation, 1.0)
+    return covariance, np.clip(correlation, -1.0, 1.0), counts.astype(int)
+
+
+def rolling_average_correlation(returns, window):
+    """Mean pairwise correlation over each trailing `window` (pairwise-complete)"""
+    observed = ~np.isnan(returns)
+    mask = observed.astype(float)
+    x = np.where(observed, returns, 0.0)
+
+    def windowed(values):
+        sums = np.cumsum(values, axis=0)
+        sums[window:] = sums[window:] - sums[:-window]
+        return sums[window - 1:]
+
+    counts = windowed(mask[:, :, None] * mask[:, None, :])
+    sum_x = windowed(x[:, :, None] * mask[:, None, :])
+    sum_x2 = windowed((x * x)[:, :, None] * mask[:, None, :])
+    sum_xy = windowed(x[:, :, None] * x[:, None, :])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sum_xy - sum_x * np.swapaxes(sum_x, 1, 2) / counts
+        variance = sum_x2 - sum_x ** 2 / counts
+        correlation = covariance / np.sqrt(variance * np.swapaxes(variance, 1, 2))
+    correlation[counts < 2] = np.nan
+
+    off_diagonal = ~np.eye(returns.shape[1], dtype=bool)
+    pairs = correlation[:, off_diagonal]
+    valid = ~np.isnan(pairs)
+    totals = np.where(valid, pairs, 0.0).sum(axis=1)
+    n_valid = valid.sum(axis=1)
+    return np.divide(totals, n_valid, out=np.full(len(totals), np.nan), where=n_valid > 0)
+
+
+def _matrix(values, digits=6):
+    return [[None if not math.isfinite(v) else round(float(v), digits) for v in row] for row in values]
+
+
+def _series(values, digits=6):
+    return [None if not math.isfinite(v) else round(float(v), digits) for v in values]
+
+
+def correlation_report(symbols, window, rolling=False):
+    """Correlation / covariance payload of `symbols` over the trailing `window` days"""
+    days, found, returns, missing = returns_panel(symbols, window)
+    covariance, correlation, counts = pairwise_moments(returns)
+    volatility = np.sqrt(np.diag(covariance) * TRADING_DAYS_PER_YEAR) if found else np.empty(0)
+
+    data = {
+        'symbols': found,
+        'missing': missing,
+        'window': window,
+        'startDate': ordinals_to_iso(days[:1])[0] if len(days) else None,
+        'endDate': ordinals_to_iso(days[-1:])[0] if len(days) else None,
+        'correlation': _matrix(correlation, 4),
+        'covariance': _matrix(covariance * TRADING_DAYS_PER_YEAR),
+        'annualizedVolatility': _series(volatility),
+        'minObservations': int(counts.min()) if found else 0,
+    }
+
+    if rolling and len(found) >= 2:
+        # Rolling windows over the whole shared history, the last one being `window`
+        history_days, _, history, _ = returns_panel(found)
+        rolling_window = min(window, len(history))
+        average = rolling_average_correlation(history, rolling_window)
+        data['rollingCorrelation'] = {
+            'window': rolling_window,
+            'dates': ordinals_to_iso(history_days[rolling_window - 1:]),
+            'average': _series(average, 4),
+        }
+    return data
+
+
+def portfolio_risk(symbols, weights, window, confidence=0.95, horizon=1):
+    """
+    Parametric (variance-covariance) VaR and diversification ratio of a
+    weighted symbol set; weights of symbols without data are dropped and the
+    rest renormalized
+    """
+    days, found, returns, missing = returns_panel(symbols, window)
+    if not found:
+        return {'symbols': [], 'missing': missing}
+
+    covariance, _, _ = pairwise_moments(returns)
+    covariance = np.nan_to_num(covariance)
+    w = np.array([weights[symbols.index(symbol)] for symbol in found], dtype=float)
+    w = w / w.sum()
+
+    mean = np.nanmean(returns, axis=0)
+    volatilities = np.sqrt(np.diag(covariance))
+    portfolio_volatility = float(np.sqrt(w @ covariance @ w))
+    z = NormalDist().inv_cdf(confidence)
+    value_at_risk = z * portfolio_volatility * math.sqrt(horizon) - float(w @ mean) * horizon
+
+    return {
+        'symbols': found,
+        'missing': missing,
+        'weights': _series(w),
+        'window': window,
+        'confidence': confidence,
+        'horizonDays': horizon,
+        'dailyVolatility': round(portfolio_volatility, 6),
+        'annualizedVolatility': round(portfolio_volatility * math.sqrt(TRADING_DAYS_PER_YEAR), 6),
+        'valueAtRisk': round(max(value_at_risk, 0.0), 6),
+        'diversificationRatio': (
+            round(float(w @ volatilities) / portfolio_volatility, 4) if portfolio_volatility > 0 else None
+        ),
+    }
@@ -0,0 +1,79 @@
+"""
+Aligned daily close panels for multi-symbol analytics.
+
+Bars of all requested symbols are read with one `values_list` query (closes
+cast to float in the database) and pivoted with NumPy into a
+(days x symbols) matrix, keeping the last close of each day. Gaps are
+forward-filled per column in one vectorized pass; days before a symbol's
+first bar stay NaN.
+"""
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from apps.market.models import StockPrice
+
+# date.toordinal() of 1970-01-01, the datetime64 epoch
+EPOCH_ORDINAL = 719163
+
+
+def forward_fill(panel):
+    """Copy of a 2-D array with NaNs replaced by the last valid value above them"""
+    rows = np.arange(len(panel))[:, None]
+    last_valid = np.where(np.isnan(panel), 0, rows)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return panel[last_valid, np.arange(panel.shape[1])]
+
+
+def ordinals_to_iso(days):
+    """ISO dates of day ordinals"""
+    return (np.asarray(days, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]').astype(str).tolist()
+
+
+def _close_rows(queryset, start=None):
+    """(stock_id, timestamp, close as float) rows, oldest first"""
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    return list(
+        queryset
+        .annotate(close_value=Cast('close', FloatField()))
+        .order_by('timestamp')
+        .values_list('stock_id', 'timestamp', 'close_value')
+    )
+
+
+def _pivot(rows, symbols):
+    """(days, closes) of close rows for columns in the order of `symbols`"""
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(symbols)))
+
+    stock_ids, timestamps, closes = zip(*rows)
+    position = {symbol: i for i, symbol in enumerate(symbols)}
+    columns = np.fromiter((position[symbol] for symbol in stock_ids), dtype=np.int64, count=len(rows))
+    day_numbers = np.fromiter((ts.toordinal() for ts in timestamps), dtype=np.int64, count=len(rows))
+
+    days, day_index = np.unique(day_numbers, return_inverse=True)
+    # Rows are in time order: keep the last one of each (day, symbol) cell
+    cells = day_index * len(symbols) + columns
+    _, first_from_end = np.unique(cells[::-1], return_index=True)
+    last = len(cells) - 1 - first_from_end
+
+    panel = np.full((len(days), len(symbols)), np.nan)
+    panel[day_index[last], columns[last]] = np.asarray(closes, dtype=float)[last]
+    return days, forward_fill(panel)
+
+
+def load_close_panel(symbols, start=None):
+    """
+    Return (days, closes): the day ordinals with at least one bar since
+    `start`, and a (len(days) x len(symbols)) float matrix of closes in the
+    order of `symbols`
+    """
+    return _pivot(_close_rows(StockPrice.objects.filter(stock_id__in=symbols), start), symbols)
+
+
+def load_universe_panel(start=None):
+    """(days, symbols, closes) of every stock with bars since `start`"""
+    rows = _close_rows(StockPrice.objects.all(), start)
+    symbols = sorted({row[0] for row in rows})
+    days, closes = _pivot(rows, symbols)
+    return days, symbols, closes
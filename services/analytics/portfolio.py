@@ -0,0 +1,166 @@
+"""
+Portfolio performance analytics: equity curve, daily returns, annualized
+volatility, Sharpe ratio, maximum drawdown and per-holding contribution.
+
+Holdings are valued on the aligned close panel (services.analytics.panel)
+from their purchase day on, and every metric is vectorized NumPy over the
+(days x holdings) matrix. A day's return is that day's P&L over the previous
+day's value, so adding a holding is a cash flow rather than a gain. As in
+the portfolio summary, holdings are analysed per currency because their
+values cannot be added up.
+
+Results are cached per user under the latest bar timestamp of the held symbols
+and a fingerprint of the holdings, so they are recomputed only when a new
+bar is stored or the portfolio changes.
+"""
+import hashlib
+import logging
+import math
+from datetime import timedelta
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Max
+from apps.market.models import StockPrice
+from apps.portfolio.models import PortfolioHolding
+from services.analytics.panel import load_close_panel, ordinals_to_iso
+from utils.constants import ANALYTICS_PERIODS, CACHE_TIMEOUT_DAY, RISK_FREE_RATE, TRADING_DAYS_PER_YEAR
+
+logger = logging.getLogger(__name__)
+
+
+def _holdings_fingerprint(holdings):
+    parts = '|'.join(
+        f"{h.stock_id}:{h.shares}:{h.average_price}:{h.purchase_date.isoformat()}" for h in holdings
+    )
+    return hashlib.sha1(parts.encode()).hexdigest()[:16]
+
+
+def analytics_cache_key(user_id, period, risk_free_rate, fingerprint, latest_bar):
+    return f"portfolio_analytics:{user_id}:{period}:{risk_free_rate}:{fingerprint}:{latest_bar}"
+
+
+def _round(values, digits=6):
+    return np.round(values, digits).tolist()
+
+
+def _metric(value, digits=6):
+    if value is None or not math.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def analyse_holdings(holdings, days, closes, risk_free_rate=RISK_FREE_RATE):
+    """Metrics of one currency group; `closes` has one column per holding"""
+    shares = np.array([float(h.shares) for h in holdings])
+    bought = np.array([h.purchase_date.toordinal() for h in holdings])
+
+    held = (days[:, None] >= bought[None, :]) & ~np.isnan(closes)
+    prices = np.nan_to_num(closes)
+    values = np.where(held, prices * shares, 0.0)
+    equity = values.sum(axis=1)
+
+    invested = np.flatnonzero(equity > 0)
+    if len(invested) < 2:
+        return None
+    start = invested[0]
+    days, held, prices, values, equity = days[start:], held[start:], prices[start:], values[start:], equity[start:]
+
+    # P&L of positions held on both days; positions opened today are cash flows
+    held_through = held[:-1] & held[1:]
+    pnl = np.where(held_through, np.diff(prices, axis=0) * shares, 0.0)
+    previous_equity = equity[:-1]
+    returns = np.divide(pnl.sum(axis=1), previous_equity, out=np.zeros(len(pnl)), where=previous_equity > 0)
+
+    wealth = np.concatenate(([1.0], np.cumprod(1 + returns)))
+    peaks = np.maximum.accumulate(wealth)
+    drawdown = wealth / peaks - 1
+    trough = int(np.argmin(drawdown))
+    peak = int(np.argmax(wealth[:trough + 1]))
+
+    observations = len(returns)
+    years = observations / TRADING_DAYS_PER_YEAR
+    total_return = wealth[-1] - 1
+    annualized_return = wealth[-1] ** (1 / years) - 1 if wealth[-1] > 0 else -1.0
+    volatility = returns.std(ddof=1) * math.sqrt(TRADING_DAYS_PER_YEAR) if observations > 1 else None
+    sharpe = (
+        (returns.mean() * TRADING_DAYS_PER_YEAR - risk_free_rate) / volatility
+        if volatility else None
+    )
+
+    # Each holding's share of the daily returns, summed over the period
+    contribution = np.divide(
+        pnl, previous_equity[:, None], out=np.zeros_like(pnl), where=previous_equity[:, None] > 0
+    ).sum(axis=0)
+    weights = values[-1] / equity[-1]
+    dates = ordinals_to_iso(days)
+
+    return {
+        'currency': holdings[0].stock.currency or 'USD',
+        'holdings': len(holdings),
+        'startDate': dates[0],
+        'endDate': dates[-1],
+        'metrics': {
+            'currentValue': _metric(equity[-1], 2),
+            'totalReturn': _metric(total_return),
+            'annualizedReturn': _metric(annualized_return),
+            'annualizedVolatility': _metric(volatility),
+            'sharpeRatio': _metric(sharpe, 4),
+            'maxDrawdown': _metric(drawdown[trough]),
+            'maxDrawdownPeak': dates[peak],
+            'maxDrawdownTrough': dates[trough],
+            'tradingDays': observations,
+        },
+        'equityCurve': {
+            'dates': dates,
+            'values': _round(equity, 2),
+            'returns': [None] + _round(returns),
+            'drawdown': _round(drawdown),
+        },
+        'contributions': sorted((
+            {
+                'symbol': h.stock_id,
+                'weight': _metric(weights[i]),
+                'pnl': _metric(pnl[:, i].sum(), 2),
+                'contribution': _metric(contribution[i]),
+            }
+            for i, h in enumerate(holdings)
+        ), key=lambda row: row['contribution'] or 0, reverse=True),
+    }
+
+
+def get_portfolio_analytics(user, period='1y', risk_free_rate=RISK_FREE_RATE):
+    """Performance analytics of a user's holdings over `period` (see ANALYTICS_PERIODS)"""
+    holdings = list(
+        PortfolioHolding.objects.filter(user=user).select_related('stock').order_by('stock_id')
+    )
+    result = {'period': period, 'riskFreeRate': risk_free_rate, 'asOf': None, 'portfolios': []}
+    if not holdings:
+        return result
+
+    symbols = [h.stock_id for h in holdings]
+    latest_bar = StockPrice.objects.filter(stock_id__in=symbols).aggregate(latest=Max('timestamp'))['latest']
+    if latest_bar is None:
+        return result
+
+    key = analytics_cache_key(
+        user.pk, period, risk_free_rate, _holdings_fingerprint(holdings), latest_bar.isoformat()
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    lookback = ANALYTICS_PERIODS[period]
+    start = latest_bar - timedelta(days=lookback) if lookback else None
+    days, closes = load_close_panel(symbols, start)
+
+    groups = {}
+    for i, holding in enumerate(holdings):
+        groups.setdefault(holding.stock.currency or 'USD', []).append(i)
+    for currency, columns in sorted(groups.items()):
+        analysis = analyse_holdings([holdings[i] for i in columns], days, closes[:, columns], risk_free_rate)
+        if analysis is not None:
+            result['portfolios'].append(analysis)
+
+    result['asOf'] = latest_bar.date().isoformat()
+    cache.set(key, result, CACHE_TIMEOUT_DAY)
+    return result
@@ -0,0 +1,256 @@
+"""
+Async market data access for the async market views.
+
+Upstream HTTP calls go through one shared httpx.AsyncClient per event loop
+(closed when the loop shuts down), and every call waits on a per-upstream
+semaphore (ASYNC_CONCURRENCY_LIMITS), so a burst of requests queues instead of opening unbounded connections. Sync
+libraries without an async API (yfinance company info, TextBlob, the LSTM
+model) run in threads through `run_blocking`, bounded by the 'blocking' limit.
+
+Quotes and price history are read from Yahoo's chart API and returned in the
+same shape, and under the same cache keys, as MarketDataFetcher.
+"""
+import asyncio
+import logging
+import weakref
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+import httpx
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils import timezone
+from apps.market.models import Stock, StockPrice
+from utils.constants import ASYNC_CONCURRENCY_LIMITS, ASYNC_UPSTREAM_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}'
+YAHOO_SEARCH_URL = 'https://query2.finance.yahoo.com/v1/finance/search'
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+# Clients and semaphores are bound to the loop that created them
+_loop_state = weakref.WeakKeyDictionary()
+
+
+class _LoopState:
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=ASYNC_UPSTREAM_TIMEOUT,
+            headers={'User-Agent': USER_AGENT},
+            follow_redirects=True,
+        )
+        self.semaphores = {
+            name: asyncio.Semaphore(limit) for name, limit in ASYNC_CONCURRENCY_LIMITS.items()
+        }
+
+
+async def _close_at_shutdown(state):
+    """
+    Parked for the life of the loop. loop.shutdown_asyncgens() (run by
+    asyncio.run, and so by async_to_sync) finalizes it, closing the client.
+    """
+    try:
+        yield
+    finally:
+        await state.client.aclose()
+
+
+async def _state():
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        state = _loop_state[loop] = _LoopState()
+        state.closer = _close_at_shutdown(state)
+        await state.closer.__anext__()
+    return state
+
+
+@asynccontextmanager
+async def limited(upstream):
+    """Hold one of the `upstream` concurrency slots for the duration of a call"""
+    async with (await _state()).semaphores[upstream]:
+        yield
+
+
+async def get_json(url, upstream='yahoo', **kwargs):
+    """GET a JSON document from an upstream within its concurrency limit"""
+    async with limited(upstream):
+        response = await (await _state()).client.get(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking, non-ORM callable in a worker thread within the 'blocking' limit"""
+    async with limited('blocking'):
+        return await sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+
+
+async def yahoo_search(query, quotes_count=10):
+    """Quotes matching a symbol or company name from Yahoo search"""
+    data = await get_json(
+        YAHOO_SEARCH_URL,
+        params={'q': query, 'quotesCount': quotes_count, 'newsCount': 0},
+    )
+    return data.get('quotes', [])
+
+
+def _decimal(value):
+    return Decimal(str(value if value is not None else 0))
+
+
+class AsyncMarketDataFetcher:
+    """Async counterpart of MarketDataFetcher for request paths"""
+
+    async def _chart(self, symbol, range_, interval):
+        try:
+            data = await get_json(
+                YAHOO_CHART_URL.format(symbol=symbol),
+                params={'range': range_, 'interval': interval},
+            )
+        except httpx.HTTPStatusError as e:
+            # Yahoo answers 404 for unknown symbols
+            if e.response.status_code == 404:
+                return None
+            raise
+        results = (data.get('chart') or {}).get('result') or []
+        return results[0] if results else None
+
+    async def _resolve_exchange_symbol(self, symbol):
+        """First equity / ETF Yahoo search result for an unqualified symbol"""
+        try:
+            for quote in await yahoo_search(symbol, quotes_count=5):
+                resolved = quote.get('symbol')
+                quote_type = quote.get('quoteType')
+                if quote_type and quote_type.lower() in ('equity', 'etf') and resolved:
+                    if resolved == symbol:
+                        return None
+                    logger.info(f"Resolved '{symbol}' -> '{resolved}' via Yahoo search")
+                    return resolved
+        except Exception:
+            # Non-fatal: keep the original symbol
+            pass
+        return None
+
+    async def fetch_real_time_quote(self, symbol):
+        """Fetch the latest quote; None when the symbol has no price"""
+        cache_key = f"realtime_quote_{symbol}"
+        cached_data = await cache.aget(cache_key)
+        if cached_data:
+            return cached_data
+
+        try:
+            chart = await self._chart(symbol, '1d', '1d')
+            meta = (chart or {}).get('meta', {})
+
+            # Same exchange resolution as the sync fetcher (e.g., TCS -> TCS.NS)
+            if not meta.get('regularMarketPrice') and '.' not in symbol:
+                resolved = await self._resolve_exchange_symbol(symbol)
+                if resolved:
+                    chart = await self._chart(resolved, '1d', '1d')
+                    meta = (chart or {}).get('meta', {})
+            if not meta.get('regularMarketPrice'):
+                return None
+
+            quote = ((chart.get('indicators') or {}).get('quote') or [{}])[0]
+            opens = [v for v in quote.get('open') or [] if v is not None]
+
+            current_price = _decimal(meta.get('regularMarketPrice'))
+            previous_close = _decimal(meta.get('chartPreviousClose') or meta.get('previousClose'))
+            change = current_price - previous_close
+            change_percent = (change / previous_close * 100) if previous_close > 0 else 0
+
+            quote_data = {
+                'symbol': meta.get('symbol') or symbol,
+                'price': current_price,
+                'change': change,
+                'changePercent': change_percent,
+                'volume': int(meta.get('regularMarketVolume') or 0),
+                'open': _decimal(opens[-1] if opens else meta.get('regularMarketPrice')),
+                'high': _decimal(meta.get('regularMarketDayHigh')),
+                'low': _decimal(meta.get('regularMarketDayLow')),
+                'previousClose': previous_close,
+                'timestamp': timezone.now()
+            }
+
+            # Cache for 1 minute
+            await cache.aset(cache_key, quote_data, 60)
+            return quote_data
+
+        except Exception as e:
+            logger.error(f"Error fetching real-time quote for {symbol}: {e}")
+            return None
+
+    async def fetch_historical_data(self, symbol, period='1y', interval='1d'):
+        """Fetch historical bars (same periods / intervals as MarketDataFetcher)"""
+        cache_key = f"historical_{symbol}_{period}_{interval}"
+        cached_data = await cache.aget(cache_key)
+        if cached_data:
+            return cached_data
+
+        try:
+            chart = await self._chart(symbol, period, interval)
+            timestamps = (chart or {}).get('timestamp') or []
+            if not timestamps:
+                return None
+            quote = ((chart.get('indicators') or {}).get('quote') or [{}])[0]
+
+            historical_data = []
+            for i, ts in enumerate(timestamps):
+                bar = [quote.get(field, [None] * len(timestamps))[i] for field in ('open', 'high', 'low', 'close')]
+                if any(v is None for v in bar):
+                    continue
+                moment = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+                historical_data.append({
+                    'date': moment.date() if interval in DAILY_INTERVALS else moment,
+                    'open': _decimal(bar[0]),
+                    'high': _decimal(bar[1]),
+                    'low': _decimal(bar[2]),
+                    'close': _decimal(bar[3]),
+                    'volume': int((quote.get('volume') or [0] * len(timestamps))[i] or 0)
+                })
+
+            if not historical_data:
+                return None
+
+            # Cache for 1 hour
+            await cache.aset(cache_key, historical_data, 3600)
+            return historical_data
+
+        except Exception as e:
+            logger.error(f"Error fetching historical data for {symbol}: {e}")
+            return None
+
+    async def fetch_company_overview(self, symbol):
+        """Company overview via yfinance (no async API), run in a worker thread"""
+        from services.market_data.fetcher import MarketDataFetcher
+        return await run_blocking(MarketDataFetcher().fetch_company_overview, symbol)
+
+    async def save_stock_price(self, symbol, price_data):
+        """Save stock price to database"""
+        try:
+            stock, created = await Stock.objects.aget_or_create(
+                symbol=symbol,
+                defaults={'name': symbol}
+            )
+
+            await StockPrice.objects.aupdate_or_create(
+                stock=stock,
+                timestamp=price_data['timestamp'],
+                defaults={
+                    'open': price_data.get('open', price_data['price']),
+                    'high': price_data.get('high', price_data['price']),
+                    'low': price_data.get('low', price_data['price']),
+                    'close': price_data['price'],
+                    'volume': price_data.get('volume', 0)
+                }
+            )
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Error saving stock price for {symbol}: {e}")
+            return False
@@ -208,32 +208,61 @@ class MarketDataFetcher:
         
     
     def fetch_multiple_quotes(self, symbols):
-        """Fetch multiple quotes at once - VERY FAST with yfinance"""
+        """Fetch quotes for many symbols with a single batched download"""
+        if not symbols:
+            return {}
         try:
-            # Join symbols with space
-            tickers = yf.Tickers(' '.join(symbols))
+            frame = yf.download(
+                list(symbols),
+                period='5d',
+                interval='1d',
+                group_by='ticker',
+                auto_adjust=False,
+                progress=False,
+                threads=True
+            )
+            if frame is None or frame.empty:
+                return {}
             
             results = {}
             for symbol in symbols:
                 try:
-                    ticker = tickers.tickers[symbol]
-                    info = ticker.info
+                    if isinstance(frame.columns, pd.MultiIndex):
+                        if symbol not in frame.columns.get_level_values(0):
+                            continue
+                        bars = frame[symbol]
+                    else:
+                        bars = frame
+                    bars = bars.dropna(subset=['Close'])
+                    if bars.empty:
+                        continue
+                    
+                    last = bars.iloc[-1]
+                    current_price = Decimal(str(round(float(last['Close']), 4)))
+                    previous_close = (
+                        Decimal(str(round(float(bars['Close'].iloc[-2]), 4)))
+                        if len(bars) > 1 else current_price
+                    )
+                    change = current_price - previous_close
+                    change_percent = (change / previous_close * 100) if previous_close > 0 else 0
+                    timestamp = bars.index[-1].to_pydatetime()
+                    if timezone.is_naive(timestamp):
+                        timestamp = timezone.make_aware(timestamp)
                     
-                    if info and 'currentPrice' in info:
-                        current_price = Decimal(str(info.get('currentPrice', 0)))
-                        previous_close = Decimal(str(info.get('previousClose', 0)))
-                        change = current_price - previous_close
-                        change_percent = (change / previous_close * 100) if previous_close > 0 else 0
-                        
-                        results[symbol] = {
-                            'symbol': symbol,
-                            'price': current_price,
-                            'change': change,
-                            'changePercent': change_percent,
-                            'volume': int(info.get('volume', 0)),
-                        }
+                    results[symbol] = {
+                        'symbol': symbol,
+                        'price': current_price,
+                        'change': change,
+                        'changePercent': change_percent,
+                        'volume': int(last['Volume'] or 0),
+                        'open': Decimal(str(round(float(last['Open']), 4))),
+                        'high': Decimal(str(round(float(last['High']), 4))),
+                        'low': Decimal(str(round(float(last['Low']), 4))),
+                        'previousClose': previous_close,
+                        'timestamp': timestamp
+                    }
                 except Exception as e:
-                    logger.error(f"Error fetching quote for {symbol}: {e}")
+                    logger.error(f"Error reading quote for {symbol}: {e}")
                     continue
             
             return results
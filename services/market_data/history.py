@@ -0,0 +1,178 @@
+"""
+Price history reads for arbitrary ranges.
+
+Bars are loaded with one `values_list` query over the (stock, timestamp)
+index into NumPy columns, optionally aggregated to weekly/monthly candles,
+and then either reduced to at most `max_points` representative points or
+returned raw one keyset page at a time (cursor = timestamp of the last bar).
+
+Downsampling methods:
+- 'lttb': Largest-Triangle-Three-Buckets on the close; keeps the visual shape
+  of a line chart using actual bars.
+- 'ohlc': min/max bucketing; consecutive bars are merged into candles
+  (first open, max high, min low, last close, summed volume), so extremes
+  are never lost.
+"""
+import math
+import logging
+import numpy as np
+from apps.market.models import StockPrice
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ('1d', '1wk', '1mo')
+DOWNSAMPLE_METHODS = ('lttb', 'ohlc')
+SECONDS_PER_DAY = 86400
+
+
+def _load_rows(symbol, start=None, end=None, after=None, limit=None):
+    """(timestamp, open, high, low, close, volume) tuples, oldest first"""
+    queryset = StockPrice.objects.filter(stock_id=symbol)
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lte=end)
+    if after is not None:
+        queryset = queryset.filter(timestamp__gt=after)
+    queryset = queryset.order_by('timestamp').values_list('timestamp', 'open', 'high', 'low', 'close', 'volume')
+    if limit is not None:
+        queryset = queryset[:limit]
+
+    return list(queryset)
+
+
+def _columns(rows):
+    """Bar tuples as NumPy columns (t in epoch seconds)"""
+    timestamps, opens, highs, lows, closes, volumes = zip(*rows)
+    return {
+        't': np.array([int(ts.timestamp()) for ts in timestamps], dtype=np.int64),
+        'o': np.asarray(opens, dtype=float),
+        'h': np.asarray(highs, dtype=float),
+        'l': np.asarray(lows, dtype=float),
+        'c': np.asarray(closes, dtype=float),
+        'v': np.asarray(volumes, dtype=np.int64),
+    }
+
+
+def _merge(bars, starts):
+    """Merge runs of bars beginning at `starts` into single candles"""
+    ends = np.r_[starts[1:], len(bars['t'])] - 1
+    return {
+        't': bars['t'][starts],
+        'o': bars['o'][starts],
+        'h': np.maximum.reduceat(bars['h'], starts),
+        'l': np.minimum.reduceat(bars['l'], starts),
+        'c': bars['c'][ends],
+        'v': np.add.reduceat(bars['v'], starts),
+    }
+
+
+def resample(bars, interval):
+    """Aggregate daily bars to weekly (Monday-based) or monthly candles"""
+    if interval == '1d':
+        return bars
+    days = bars['t'] // SECONDS_PER_DAY
+    if interval == '1wk':
+        # Epoch day 0 was a Thursday; shift so weeks start on Monday
+        keys = (days + 3) // 7
+    else:
+        keys = bars['t'].astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+    starts = np.r_[0, np.flatnonzero(np.diff(keys)) + 1]
+    return _merge(bars, starts)
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets"""
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        # Too few points for a triangle: the last point, or the first and last
+        return np.array([n - 1] if threshold < 2 else [0, n - 1], dtype=np.int64)
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        avg_start = int(math.floor((i + 1) * every)) + 1
+        avg_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        range_start = int(math.floor(i * every)) + 1
+        range_end = int(math.floor((i + 1) * every)) + 1
+        areas = np.abs(
+            (x[a] - avg_x) * (y[range_start:range_end] - y[a])
+            - (x[a] - x[range_start:range_end]) * (avg_y - y[a])
+        )
+        a = range_start + int(np.argmax(areas))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def downsample(bars, max_points, method='lttb'):
+    """Reduce bars to at most `max_points` points"""
+    n = len(bars['t'])
+    if n <= max_points:
+        return bars
+    if method == 'ohlc':
+        starts = np.unique(np.linspace(0, n, max_points, endpoint=False).astype(np.int64))
+        return _merge(bars, starts)
+    keep = lttb_indices(bars['t'].astype(float), bars['c'], max_points)
+    return {column: values[keep] for column, values in bars.items()}
+
+
+def _to_lists(bars):
+    return {column: values.tolist() for column, values in bars.items()}
+
+
+def _empty():
+    return {column: [] for column in ('t', 'o', 'h', 'l', 'c', 'v')}
+
+
+def get_price_history(symbol, start=None, end=None, interval='1d', max_points=None,
+                      method='lttb', cursor=None, page_size=None):
+    """
+    Price history of a symbol as columnar {t, o, h, l, c, v}.
+
+    With `max_points`, the whole [start, end] range is returned reduced to at
+    most that many points. Without it, raw daily bars are returned one keyset
+    page of `page_size` at a time starting after `cursor` (the exact timestamp
+    of the previous page's last bar); `next_cursor` is None on the last page. Coarser intervals are small enough
+    to always be returned whole.
+    """
+    result = {
+        'symbol': symbol,
+        'interval': interval,
+        'downsampled': False,
+        'method': None,
+        'count': 0,
+        'next_cursor': None,
+        'history': _empty(),
+    }
+
+    if max_points or interval != '1d':
+        rows = _load_rows(symbol, start=start, end=end)
+        if not rows:
+            return result
+        bars = resample(_columns(rows), interval)
+        if max_points and len(bars['t']) > max_points:
+            bars = downsample(bars, max_points, method=method)
+            result['downsampled'] = True
+            result['method'] = method
+    else:
+        # Fetch one extra row to know whether another page exists
+        rows = _load_rows(symbol, start=start, end=end, after=cursor, limit=page_size + 1)
+        if not rows:
+            return result
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            result['next_cursor'] = rows[-1][0].isoformat()
+        bars = _columns(rows)
+
+    result['count'] = int(len(bars['t']))
+    result['history'] = _to_lists(bars)
+    return result
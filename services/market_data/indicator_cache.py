@@ -0,0 +1,71 @@
+"""
+Fingerprints of per-symbol price history and the indicator results derived from them.
+
+A fingerprint is the (latest bar timestamp, row count) pair of a symbol's
+StockPrice rows. Indicator results are cached together with the fingerprint
+they were computed from, so unchanged input can be detected without
+reloading or recomputing anything.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max
+from apps.market.models import StockPrice
+from utils.constants import CACHE_TIMEOUT_DAY
+
+
+def _result_key(symbol):
+    return f"indicator_result_{symbol}"
+
+
+def price_fingerprint(stock):
+    """Return the (latest timestamp, row count) fingerprint for one stock"""
+    agg = StockPrice.objects.filter(stock=stock).aggregate(
+        latest=Max('timestamp'), count=Count('id')
+    )
+    return agg['latest'], agg['count']
+
+
+def bulk_price_fingerprints(symbols):
+    """Return {symbol: (latest timestamp, row count)} using a single grouped query"""
+    rows = (
+        StockPrice.objects
+        .filter(stock_id__in=list(symbols))
+        .values('stock_id')
+        .annotate(latest=Max('timestamp'), count=Count('id'))
+        .order_by()
+    )
+    return {row['stock_id']: (row['latest'], row['count']) for row in rows}
+
+
+def get_cached_result(symbol, fingerprint):
+    """Return (hit, indicators) for a symbol if cached under the same fingerprint"""
+    entry = cache.get(_result_key(symbol))
+    if entry and entry['fingerprint'] == fingerprint:
+        return True, entry['indicators']
+    return False, None
+
+
+def set_cached_result(symbol, fingerprint, indicators):
+    """Store indicators (or None for insufficient data) under their input fingerprint"""
+    cache.set(
+        _result_key(symbol),
+        {'fingerprint': fingerprint, 'indicators': indicators},
+        CACHE_TIMEOUT_DAY
+    )
+
+
+def unchanged_symbols(fingerprints):
+    """Return the symbols whose cached fingerprint matches `fingerprints`"""
+    entries = cache.get_many([_result_key(symbol) for symbol in fingerprints])
+    return {
+        symbol for symbol, fp in fingerprints.items()
+        if entries.get(_result_key(symbol), {}).get('fingerprint') == fp
+    }
+
+
+def cached_indicators(symbols):
+    """Return {symbol: indicators} of the cached results (insufficient data omitted)"""
+    entries = cache.get_many([_result_key(symbol) for symbol in symbols])
+    return {
+        symbol: entries[_result_key(symbol)]['indicators'] for symbol in symbols
+        if entries.get(_result_key(symbol), {}).get('indicators') is not None
+    }
@@ -8,6 +8,9 @@ except Exception:
     import ta as _ta_fallback
     _USING_TALIB = False
 from apps.market.models import Stock, StockPrice, TechnicalIndicator
+from services.market_data.indicator_cache import (
+    price_fingerprint, get_cached_result, set_cached_result
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,11 +21,22 @@ class TechnicalIndicatorCalculator:
     def __init__(self):
         pass
 
-    def calculate_indicators(self, symbol, lookback_days=200):
-        """Calculate all technical indicators for a stock"""
+    def calculate_indicators(self, symbol, lookback_days=200, fingerprint=None):
+        """Calculate all technical indicators for a stock
+
+        Results are cached against the price-history fingerprint (latest bar
+        timestamp, row count); if the input has not changed since the last
+        run the cached result is returned without touching the price rows.
+        """
         try:
             stock = Stock.objects.get(symbol=symbol)
 
+            if fingerprint is None:
+                fingerprint = price_fingerprint(stock)
+            hit, cached = get_cached_result(symbol, fingerprint)
+            if hit:
+                return cached
+
             # -----------------------------------------------
             # CHANGE 1: Use timestamps correctly + iterator()
             # -----------------------------------------------
@@ -35,6 +49,7 @@ class TechnicalIndicatorCalculator:
             df = pd.DataFrame(list(prices_qs)[-lookback_days:])
             if len(df) < 50:
                 logger.warning(f"Not enough data for {symbol}")
+                set_cached_result(symbol, fingerprint, None)
                 return None
 
             # Convert to numpy arrays
@@ -131,6 +146,7 @@ class TechnicalIndicatorCalculator:
                 defaults=indicator_data
             )
 
+            set_cached_result(symbol, fingerprint, indicator_data)
             return indicator_data
 
         except Exception as e:
@@ -0,0 +1,232 @@
+"""
+Streaming market scanner.
+
+Every ingested quote updates that symbol's intraday state (change, volume,
+volume ratio) and its score in one Redis sorted set per scanner category.
+Leaderboard reads are a ZREVRANGE per category (O(log N + K)), so the
+scanner page no longer has to wait for the next batch `run_market_scanner`.
+
+State and leaderboards are keyed by trading session (the quote's date), so
+a symbol not quoted today drops off the boards instead of keeping
+yesterday's move; old sessions expire after LIVE_SCANNER_SESSION_TTL.
+
+Average volume baselines (plus name and currency) come from the latest
+batch scan. When the cache backend is not Redis (local development), each
+symbol's state is its own cache entry, ranked with a heap on read.
+"""
+import heapq
+import json
+import logging
+import time
+from django.core.cache import cache
+from django.utils import timezone
+from utils.constants import (
+    GAINER_THRESHOLD, LOSER_THRESHOLD,
+    UNUSUAL_VOLUME_RATIO, BREAKOUT_THRESHOLD,
+    LIVE_SCANNER_SESSION_TTL
+)
+from utils.json_serializer import json_serializer
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'stockmind:scanner:live'
+BASELINE_KEY = f'{KEY_PREFIX}:baseline'
+SYMBOLS_LOCK_TIMEOUT = 5
+
+# category -> (row field used as score, sign applied to it)
+CATEGORIES = {
+    'gainers': ('changePercent', 1),
+    'losers': ('changePercent', -1),
+    'mostActive': ('volume', 1),
+    'unusualVolume': ('volumeRatio', 1),
+    'breakouts': ('changePercent', 1),
+}
+
+
+def _session(timestamp=None):
+    """Trading session (date) a quote belongs to"""
+    if timestamp is None or not hasattr(timestamp, 'date'):
+        return timezone.localdate().isoformat()
+    if timezone.is_aware(timestamp):
+        timestamp = timezone.localtime(timestamp)
+    return timestamp.date().isoformat()
+
+
+def _state_key(session):
+    return f'{KEY_PREFIX}:{session}:state'
+
+
+def _board_key(session, category):
+    return f'{KEY_PREFIX}:{session}:{category}'
+
+
+def _row_key(session, symbol):
+    return f'{KEY_PREFIX}:{session}:row:{symbol}'
+
+
+def _symbols_key(session):
+    return f'{KEY_PREFIX}:{session}:symbols'
+
+
+def _categories_for(row):
+    """Return the categories a live row currently qualifies for"""
+    change_percent = row['changePercent']
+    return {
+        'gainers': change_percent >= GAINER_THRESHOLD,
+        'losers': change_percent <= LOSER_THRESHOLD,
+        'mostActive': True,
+        'unusualVolume': row['volumeRatio'] >= UNUSUAL_VOLUME_RATIO,
+        'breakouts': abs(change_percent) >= BREAKOUT_THRESHOLD,
+    }
+
+
+class LiveMarketScanner:
+    """Incrementally maintained intraday scanner leaderboards"""
+
+    def __init__(self):
+        try:
+            from django_redis import get_redis_connection
+            self.redis = get_redis_connection('default')
+        except Exception:
+            self.redis = None
+
+    # ------------------------------------------------------------------
+    # Baselines
+    # ------------------------------------------------------------------
+    def set_baselines(self, results):
+        """Store average volume, name and currency per symbol from a batch scan"""
+        baselines = {
+            r['symbol']: {
+                'name': r.get('name'),
+                'currency': r.get('currency'),
+                'avgVolume': int(r['avg_volume']),
+            }
+            for r in results
+        }
+        if not baselines:
+            return
+        if self.redis is not None:
+            self.redis.hset(BASELINE_KEY, mapping={s: json.dumps(b) for s, b in baselines.items()})
+        else:
+            cache.set(BASELINE_KEY, baselines, None)
+
+    def _baseline(self, symbol):
+        if self.redis is not None:
+            raw = self.redis.hget(BASELINE_KEY, symbol)
+            return json.loads(raw) if raw else {}
+        return (cache.get(BASELINE_KEY) or {}).get(symbol, {})
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def _build_row(self, symbol, quote):
+        price = float(quote.get('price') or 0)
+        previous_close = float(quote.get('previousClose') or 0)
+        change = float(quote['change']) if quote.get('change') is not None else price - previous_close
+        if quote.get('changePercent') is not None:
+            change_percent = float(quote['changePercent'])
+        else:
+            change_percent = (change / previous_close * 100) if previous_close > 0 else 0.0
+
+        baseline = self._baseline(symbol)
+        volume = int(quote.get('volume') or 0)
+        avg_volume = baseline.get('avgVolume') or 0
+        volume_ratio = volume / avg_volume if avg_volume > 0 else 1.0
+
+        timestamp = quote.get('timestamp') or timezone.now()
+        row = {
+            'symbol': symbol,
+            'name': baseline.get('name') or symbol,
+            'currency': baseline.get('currency'),
+            'price': price,
+            'change': change,
+            'changePercent': change_percent,
+            'volume': volume,
+            'avgVolume': avg_volume,
+            'volumeRatio': volume_ratio,
+            'trend': 'Bullish' if change_percent > 0 else 'Bearish' if change_percent < 0 else 'Neutral',
+            'timestamp': timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp,
+        }
+        row['isUnusualVolume'] = volume_ratio >= UNUSUAL_VOLUME_RATIO
+        row['isBreakout'] = abs(change_percent) >= BREAKOUT_THRESHOLD
+        return row
+
+    def update(self, symbol, quote):
+        """Apply one ingested quote to the symbol's state and the leaderboards"""
+        if not quote or not quote.get('price'):
+            return None
+        try:
+            row = self._build_row(symbol, quote)
+            membership = _categories_for(row)
+            session = _session(quote.get('timestamp'))
+
+            if self.redis is not None:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.hset(_state_key(session), symbol, json.dumps(row, default=json_serializer))
+                pipe.expire(_state_key(session), LIVE_SCANNER_SESSION_TTL)
+                for category, (field, sign) in CATEGORIES.items():
+                    if membership[category]:
+                        pipe.zadd(_board_key(session, category), {symbol: sign * row[field]})
+                        pipe.expire(_board_key(session, category), LIVE_SCANNER_SESSION_TTL)
+                    else:
+                        pipe.zrem(_board_key(session, category), symbol)
+                pipe.execute()
+            else:
+                cache.set(_row_key(session, symbol), row, LIVE_SCANNER_SESSION_TTL)
+                self._register_symbol(session, symbol)
+            return row
+
+        except Exception as e:
+            logger.error(f"Error updating live scanner for {symbol}: {e}")
+            return None
+
+    def _register_symbol(self, session, symbol):
+        """Add a symbol to the session's symbol list (cache fallback) under a lock"""
+        if symbol in (cache.get(_symbols_key(session)) or ()):
+            return
+        lock = f'{_symbols_key(session)}:lock'
+        deadline = time.monotonic() + SYMBOLS_LOCK_TIMEOUT
+        while not cache.add(lock, True, SYMBOLS_LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                logger.warning(f"Timed out waiting to register {symbol} in the live scanner")
+                return
+            time.sleep(0.01)
+        try:
+            symbols = cache.get(_symbols_key(session)) or set()
+            symbols.add(symbol)
+            cache.set(_symbols_key(session), symbols, LIVE_SCANNER_SESSION_TTL)
+        finally:
+            cache.delete(lock)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def leaderboards(self, k=10):
+        """Return the top-K rows of every category"""
+        data = {category: [] for category in CATEGORIES}
+        session = _session()
+
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=False)
+            for category in CATEGORIES:
+                pipe.zrevrange(_board_key(session, category), 0, k - 1)
+            ranked = dict(zip(CATEGORIES, pipe.execute()))
+
+            symbols = sorted({s for members in ranked.values() for s in members})
+            rows = {}
+            if symbols:
+                for symbol, raw in zip(symbols, self.redis.hmget(_state_key(session), symbols)):
+                    if raw:
+                        rows[symbol] = json.loads(raw)
+            for category, members in ranked.items():
+                data[category] = [rows[s] for s in members if s in rows]
+        else:
+            symbols = cache.get(_symbols_key(session)) or set()
+            state = cache.get_many([_row_key(session, symbol) for symbol in symbols])
+            for category, (field, sign) in CATEGORIES.items():
+                eligible = (r for r in state.values() if _categories_for(r)[category])
+                data[category] = heapq.nlargest(k, eligible, key=lambda r: sign * r[field])
+
+        data['timeframe'] = 'live'
+        data['timestamp'] = timezone.now().isoformat()
+        return data
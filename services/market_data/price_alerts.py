@@ -0,0 +1,256 @@
+"""
+Watchlist price alerts.
+
+Every active `alert_price_above` / `alert_price_below` threshold is indexed
+in a Redis sorted set per symbol and direction, scored by the threshold, so
+evaluating an ingested quote is one ZRANGEBYSCORE per direction
+(O(log N + K) for K crossed alerts) instead of a scan over all watchlists.
+
+A crossed alert moves from the armed set to a fired set; only the worker
+whose ZREM removes it sends the notification, so concurrent ingestion of the
+same quote cannot notify twice. A fired alert re-arms once the price moves
+back past its threshold by ALERT_REARM_MARGIN, and editing the threshold
+arms it again. Notifications go to the owner's `user_<id>` channel group.
+
+When the cache backend is not Redis (local development), the index is a
+dict of sorted lists in the Django cache, searched with bisect.
+"""
+import logging
+from bisect import bisect_left, bisect_right, insort
+from django.core.cache import cache
+from django.utils import timezone
+from utils.constants import ALERT_REARM_MARGIN
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'stockmind:alerts'
+SYMBOLS_KEY = f'{KEY_PREFIX}:symbols'
+DIRECTIONS = ('above', 'below')
+
+
+def _index_key(symbol, direction, state='armed'):
+    return f'{KEY_PREFIX}:{symbol}:{direction}:{state}'
+
+
+def _member(watchlist_id, user_id):
+    return f'{watchlist_id}:{user_id}'
+
+
+def _thresholds(item):
+    return {'above': item.alert_price_above, 'below': item.alert_price_below}
+
+
+class PriceAlertEngine:
+    """Sorted-set index of watchlist thresholds, evaluated per quote"""
+
+    def __init__(self):
+        try:
+            from django_redis import get_redis_connection
+            self.redis = get_redis_connection('default')
+        except Exception:
+            self.redis = None
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+    def index(self, item):
+        """Index (or re-index) a watchlist item's thresholds"""
+        member = _member(item.id, item.user_id)
+        symbol = item.stock_id
+        for direction, threshold in _thresholds(item).items():
+            armed, fired = _index_key(symbol, direction), _index_key(symbol, direction, 'fired')
+            if threshold is None:
+                self._remove(member, armed, fired)
+                continue
+            score = float(threshold)
+            if self._score(fired, member) == score:
+                # Unchanged threshold that already fired: stay fired until re-armed
+                continue
+            self._remove(member, fired)
+            self._add(symbol, armed, member, score)
+
+    def remove(self, item):
+        """Drop a watchlist item's alerts from the index"""
+        member = _member(item.id, item.user_id)
+        keys = [_index_key(item.stock_id, d, s) for d in DIRECTIONS for s in ('armed', 'fired')]
+        self._remove(member, *keys)
+
+    def rebuild(self, items):
+        """
+        Replace the whole index with the thresholds of `items`. Alerts that
+        already fired at an unchanged threshold stay fired.
+        """
+        entries = {}
+        symbols = set()
+        for item in items:
+            for direction, threshold in _thresholds(item).items():
+                if threshold is not None:
+                    key = _index_key(item.stock_id, direction)
+                    entries.setdefault(key, {})[_member(item.id, item.user_id)] = float(threshold)
+                    symbols.add(item.stock_id)
+
+        if self.redis is not None:
+            stale = {key.decode() if isinstance(key, bytes) else key for key in self.redis.smembers(SYMBOLS_KEY)}
+            fired_keys = [_index_key(symbol, d, 'fired') for symbol in stale for d in DIRECTIONS]
+            pipe = self.redis.pipeline(transaction=False)
+            for key in fired_keys:
+                pipe.zrange(key, 0, -1, withscores=True)
+            fired = {
+                key: {(m.decode() if isinstance(m, bytes) else m): score for m, score in members}
+                for key, members in zip(fired_keys, pipe.execute())
+            }
+        else:
+            fired = {
+                key: {member: score for score, member in members}
+                for key, members in (cache.get(KEY_PREFIX) or {}).items() if key.endswith(':fired')
+            }
+
+        index = {}
+        for key, members in entries.items():
+            fired_key = key.rsplit(':', 1)[0] + ':fired'
+            previously_fired = fired.get(fired_key, {})
+            for member, score in members.items():
+                state_key = fired_key if previously_fired.get(member) == score else key
+                index.setdefault(state_key, {})[member] = score
+
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            for symbol in stale | symbols:
+                pipe.delete(*[_index_key(symbol, d, s) for d in DIRECTIONS for s in ('armed', 'fired')])
+            pipe.delete(SYMBOLS_KEY)
+            for key, members in index.items():
+                pipe.zadd(key, members)
+            if symbols:
+                pipe.sadd(SYMBOLS_KEY, *symbols)
+            pipe.execute()
+        else:
+            cache.set(KEY_PREFIX, {
+                key: sorted((score, member) for member, score in members.items())
+                for key, members in index.items()
+            }, None)
+        return sum(len(members) for members in entries.values())
+
+    def _score(self, key, member):
+        if self.redis is not None:
+            return self.redis.zscore(key, member)
+        for score, existing in (cache.get(KEY_PREFIX) or {}).get(key, []):
+            if existing == member:
+                return score
+        return None
+
+    def _add(self, symbol, key, member, score):
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.zadd(key, {member: score})
+            pipe.sadd(SYMBOLS_KEY, symbol)
+            pipe.execute()
+        else:
+            index = cache.get(KEY_PREFIX) or {}
+            entries = [entry for entry in index.get(key, []) if entry[1] != member]
+            insort(entries, (score, member))
+            index[key] = entries
+            cache.set(KEY_PREFIX, index, None)
+
+    def _remove(self, member, *keys):
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            for key in keys:
+                pipe.zrem(key, member)
+            pipe.execute()
+        else:
+            index = cache.get(KEY_PREFIX) or {}
+            for key in keys:
+                if key in index:
+                    index[key] = [entry for entry in index[key] if entry[1] != member]
+            cache.set(KEY_PREFIX, index, None)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+    def _crossed(self, symbol, price):
+        """(direction, member, threshold) of armed alerts the price has crossed"""
+        above, below = _index_key(symbol, 'above'), _index_key(symbol, 'below')
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zrangebyscore(above, '-inf', price, withscores=True)
+            pipe.zrangebyscore(below, price, '+inf', withscores=True)
+            hits_above, hits_below = pipe.execute()
+        else:
+            index = cache.get(KEY_PREFIX) or {}
+            entries_above, entries_below = index.get(above, []), index.get(below, [])
+            hits_above = [(m, s) for s, m in entries_above[:bisect_right(entries_above, (price, '￿'))]]
+            hits_below = [(m, s) for s, m in entries_below[bisect_left(entries_below, (price, '')):]]
+        return [('above', m, s) for m, s in hits_above] + [('below', m, s) for m, s in hits_below]
+
+    def _claim(self, symbol, direction, member, score):
+        """Move an alert from armed to fired; True only for the caller that moved it"""
+        armed, fired = _index_key(symbol, direction), _index_key(symbol, direction, 'fired')
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.zrem(armed, member)
+            pipe.zadd(fired, {member: score})
+            removed, _ = pipe.execute()
+            return bool(removed)
+        if self._score(armed, member) is None:
+            return False
+        self._remove(member, armed)
+        self._add(symbol, fired, member, score)
+        return True
+
+    def _rearm(self, symbol, price):
+        """Re-arm fired alerts the price has moved back away from"""
+        for direction in DIRECTIONS:
+            armed, fired = _index_key(symbol, direction), _index_key(symbol, direction, 'fired')
+            # 'above' alerts re-arm once the price is back below the threshold, 'below' ones above it
+            if direction == 'above':
+                low, high = price * (1 + ALERT_REARM_MARGIN), float('inf')
+                bounds = (f'({low}', '+inf')
+            else:
+                low, high = float('-inf'), price * (1 - ALERT_REARM_MARGIN)
+                bounds = ('-inf', f'({high}')
+
+            if self.redis is not None:
+                members = self.redis.zrangebyscore(fired, *bounds, withscores=True)
+                if members:
+                    pipe = self.redis.pipeline()
+                    pipe.zrem(fired, *[m for m, _ in members])
+                    pipe.zadd(armed, dict(members))
+                    pipe.execute()
+            else:
+                entries = (cache.get(KEY_PREFIX) or {}).get(fired, [])
+                for score, member in entries:
+                    if low < score < high:
+                        self._remove(member, fired)
+                        self._add(symbol, armed, member, score)
+
+    def evaluate(self, symbol, price):
+        """Fire the alerts a new price crosses; returns the alerts fired"""
+        if not price:
+            return []
+        price = float(price)
+        fired = []
+        try:
+            for direction, member, threshold in self._crossed(symbol, price):
+                member = member.decode() if isinstance(member, bytes) else member
+                if not self._claim(symbol, direction, member, threshold):
+                    continue
+                watchlist_id, user_id = member.rsplit(':', 1)
+                fired.append({
+                    'userId': user_id,
+                    'watchlistId': watchlist_id,
+                    'symbol': symbol,
+                    'direction': direction,
+                    'threshold': threshold,
+                    'price': price,
+                    'timestamp': timezone.now().isoformat(),
+                })
+            self._rearm(symbol, price)
+        except Exception as e:
+            logger.error(f"Error evaluating price alerts for {symbol}: {e}")
+
+        if fired:
+            from services.websocket.broadcaster import broadcast_price_alert
+            for alert in fired:
+                broadcast_price_alert(alert['userId'], alert)
+            logger.info(f"Fired {len(fired)} price alert(s) for {symbol} at {price}")
+        return fired
@@ -0,0 +1,132 @@
+"""
+Batch quotes for many symbols in one request.
+
+Lookups go through three tiers, each issued once for the whole batch: one
+cache `get_many` for rows served recently, one windowed query for the latest
+two bars of every cache miss, and one batched upstream download for symbols
+the database does not know yet. Rows found in the last two tiers are written
+back with `set_many`.
+"""
+import logging
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import Lead, RowNumber
+from apps.market.models import StockPrice
+from services.market_data.fetcher import MarketDataFetcher
+from utils.constants import CACHE_TIMEOUT_SHORT
+
+logger = logging.getLogger(__name__)
+
+QUOTE_FIELDS = (
+    'symbol', 'name', 'currency', 'exchange', 'marketCap',
+    'price', 'change', 'changePercent', 'previousClose',
+    'open', 'high', 'low', 'volume', 'timestamp',
+)
+DEFAULT_QUOTE_FIELDS = ('symbol', 'name', 'currency', 'price', 'change', 'changePercent', 'volume', 'timestamp')
+
+
+def quote_cache_key(symbol):
+    return f"batch_quote_{symbol}"
+
+
+def _quote_row(symbol, price, previous_close, open_, high, low, volume, timestamp, **meta):
+    price = float(price)
+    previous_close = float(previous_close) if previous_close is not None else price
+    change = price - previous_close
+    return {
+        'symbol': symbol,
+        'name': meta.get('name') or symbol,
+        'currency': meta.get('currency'),
+        'exchange': meta.get('exchange'),
+        'marketCap': meta.get('market_cap'),
+        'price': price,
+        'change': round(change, 4),
+        'changePercent': round(change / previous_close * 100, 4) if previous_close > 0 else 0.0,
+        'previousClose': previous_close,
+        'open': float(open_),
+        'high': float(high),
+        'low': float(low),
+        'volume': int(volume or 0),
+        'timestamp': timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp,
+    }
+
+
+def _from_database(symbols):
+    """Latest bar and previous close of every symbol in one query"""
+    rows = (
+        StockPrice.objects
+        .filter(stock_id__in=symbols)
+        .annotate(
+            rn=Window(
+                expression=RowNumber(),
+                partition_by=[F('stock_id')],
+                order_by=F('timestamp').desc(),
+            ),
+            previous_close=Window(
+                expression=Lead('close'),
+                partition_by=[F('stock_id')],
+                order_by=F('timestamp').desc(),
+            ),
+        )
+        .filter(rn=1)
+        .values(
+            'stock_id', 'close', 'previous_close', 'open', 'high', 'low', 'volume', 'timestamp',
+            'stock__name', 'stock__currency', 'stock__exchange', 'stock__market_cap',
+        )
+    )
+    return {
+        row['stock_id']: _quote_row(
+            row['stock_id'], row['close'], row['previous_close'],
+            row['open'], row['high'], row['low'], row['volume'], row['timestamp'],
+            name=row['stock__name'], currency=row['stock__currency'],
+            exchange=row['stock__exchange'], market_cap=row['stock__market_cap'],
+        )
+        for row in rows
+    }
+
+
+def _from_upstream(symbols):
+    """One batched upstream download for symbols unknown to the database"""
+    quotes = MarketDataFetcher().fetch_multiple_quotes(symbols)
+    return {
+        symbol: _quote_row(
+            symbol, quote['price'], quote.get('previousClose'),
+            quote.get('open', quote['price']), quote.get('high', quote['price']),
+            quote.get('low', quote['price']), quote.get('volume'), quote.get('timestamp'),
+        )
+        for symbol, quote in quotes.items()
+    }
+
+
+def get_batch_quotes(symbols, fields=DEFAULT_QUOTE_FIELDS):
+    """
+    Return (rows in request order, symbols that could not be found).
+
+    `symbols` must already be normalized (upper-cased, de-duplicated);
+    each row only carries the requested `fields`.
+    """
+    keys = {quote_cache_key(symbol): symbol for symbol in symbols}
+    found = {keys[key]: row for key, row in cache.get_many(list(keys)).items()}
+
+    misses = [s for s in symbols if s not in found]
+    fresh = {}
+    if misses:
+        try:
+            fresh.update(_from_database(misses))
+        except Exception as e:
+            logger.error(f"Error loading batch quotes from database: {e}")
+
+        unknown = [s for s in misses if s not in fresh]
+        if unknown:
+            fresh.update(_from_upstream(unknown))
+
+        if fresh:
+            cache.set_many(
+                {quote_cache_key(symbol): row for symbol, row in fresh.items()},
+                CACHE_TIMEOUT_SHORT
+            )
+        found.update(fresh)
+
+    quotes = [{field: found[s][field] for field in fields} for s in symbols if s in found]
+    missing = [s for s in symbols if s not in found]
+    return quotes, missing
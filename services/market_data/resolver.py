@@ -1,12 +1,17 @@
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
-from django.db.models import Q
-from apps.market.models import Stock
 import requests
+from services.market_data.async_fetcher import yahoo_search
+from services.market_data.symbol_index import get_symbol_index
 
 logger = logging.getLogger(__name__)
 
+RESOLVE_CACHE_TIMEOUT = 24 * 3600
+SYMBOL_CHECK_TIMEOUT = 24 * 3600
+NO_DATA_PENALTY = 0.5  # score factor for symbols without fetchable market data
+
 
 def _cache_key(query: str, limit: int) -> str:
     return f"symbol_resolve:{query.strip().lower()}:{limit}"
@@ -41,128 +46,97 @@ def _validate_symbol_has_data(symbol: str, skip_validation: bool = False) -> boo
         return False
 
 
-def resolve_symbol_or_name(query: str, limit: int = 10) -> Dict[str, object]:
-    query = (query or "").strip()
-    if not query:
-        return {"canonical": None, "candidates": []}
+def _yahoo_candidates(quotes, limit: int, seen: set) -> List[Dict[str, object]]:
+    """Equity / ETF / index results of a Yahoo search, exchange-qualified ones boosted"""
+    candidates: List[Dict[str, object]] = []
+    # Prioritize equity/ETF results with proper exchanges
+    for q in quotes:
+        sym = q.get("symbol")
+        if not sym or sym in seen:
+            continue
 
-    ck = _cache_key(query, limit)
-    cached = cache.get(ck)
-    if cached:
-        return cached
+        display_name = q.get("longname") or q.get("shortname") or sym
+        exchange = q.get("exchDisp") or q.get("exchange")
+        qt = (q.get("quoteType") or "").upper()
 
-    candidates: List[Dict[str, object]] = []
-    seen = set()
+        # Filter: prefer equity/ETF with exchange info
+        if qt not in ("EQUITY", "ETF", "INDEX"):
+            continue
 
-    q_upper = query.upper()
-    q_lower = query.lower()
-    
-    # Determine if query is ambiguous (no exchange suffix like .NS, .BO, etc.)
-    is_ambiguous = '.' not in q_upper and not any(q_upper.endswith(x) for x in ['^', '='])
+        # For Yahoo search results, trust the source; skip expensive validation
+        # Validation failures are often due to yfinance timeouts, not bad symbols
+        # Accept the symbol; yfinance will retry if needed
 
-    # For ambiguous queries (raw symbols or names), prioritize Yahoo search
-    # to get exchange-qualified results first
-    if is_ambiguous:
-        try:
-            resp = requests.get(
-                "https://query2.finance.yahoo.com/v1/finance/search",
-                params={"q": query, "quotesCount": limit * 2, "newsCount": 0},
-                timeout=5,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            quotes = data.get("quotes", [])
-            
-            # Prioritize equity/ETF results with proper exchanges
-            for i, q in enumerate(quotes):
-                sym = q.get("symbol")
-                if not sym or sym in seen:
-                    continue
-                
-                display_name = q.get("longname") or q.get("shortname") or sym
-                exchange = q.get("exchDisp") or q.get("exchange")
-                qt = (q.get("quoteType") or "").upper()
-                
-                # Filter: prefer equity/ETF with exchange info
-                if qt not in ("EQUITY", "ETF", "INDEX"):
-                    continue
-                
-                # For Yahoo search results, trust the source; skip expensive validation
-                # Validation failures are often due to yfinance timeouts, not bad symbols
-                # Accept the symbol; yfinance will retry if needed
-                    
-                # Boost score for exchange-qualified symbols
-                base_score = float(q.get("score") or 0.5)
-                if '.' in sym or exchange:
-                    score = min(1.0, base_score + 0.3)
-                else:
-                    score = base_score * 0.7
-                
-                candidates.append({
-                    "symbol": sym,
-                    "displayName": display_name,
-                    "exchange": exchange,
-                    "quoteType": qt,
-                    "score": score,
-                })
-                seen.add(sym)
-                
-                if len(candidates) >= limit:
-                    break
-        except Exception as e:
-            logger.warning(f"Yahoo search failed for '{query}': {e}")
-            # Don't return; fall through to DB search
-            quotes = []
+        # Boost score for exchange-qualified symbols
+        base_score = float(q.get("score") or 0.5)
+        if '.' in sym or exchange:
+            score = min(1.0, base_score + 0.3)
+        else:
+            score = base_score * 0.7
+
+        candidates.append({
+            "symbol": sym,
+            "displayName": display_name,
+            "exchange": exchange,
+            "quoteType": qt,
+            "score": score,
+        })
+        seen.add(sym)
+
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+
+def symbol_check_key(symbol: str) -> str:
+    return f"symbol_has_data:{symbol}"
+
+
+def _rank_by_checks(candidates: List[Dict[str, object]], checks: Dict[str, bool]) -> List[str]:
+    """
+    Rank down candidates a background check found without market data and
+    return the symbols not checked yet
+    """
+    unchecked = []
+    for c in candidates:
+        has_data = checks.get(symbol_check_key(c["symbol"]))
+        if has_data is None:
+            unchecked.append(c["symbol"])
+        elif not has_data:
+            c["score"] = round(c["score"] * NO_DATA_PENALTY, 4)
+    return unchecked
 
-    # Local DB exact symbol match (only if query has exchange suffix or Yahoo failed)
-    if not candidates or not is_ambiguous:
-        try:
-            s = Stock.objects.filter(symbol=q_upper).first()
-            if s and s.symbol not in seen:
-                candidates.append({
-                    "symbol": s.symbol,
-                    "displayName": s.name or s.symbol,
-                    "exchange": None,
-                    "quoteType": "EQUITY",
-                    "score": 1.0 if '.' in s.symbol else 0.8,
-                })
-                seen.add(s.symbol)
-        except Exception:
-            pass
-
-    # Local DB name/symbol contains (supplemental results)
-    if len(candidates) < limit:
-        try:
-            qs = Stock.objects.filter(
-                Q(name__icontains=query) | Q(symbol__icontains=query)
-            ).exclude(symbol__in=seen)[:limit]
-            
-            for s in qs:
-                # For DB records, still validate to prefer fresh data
-                # But don't skip if validation times out; DB entries are trusted
-                try:
-                    if not _validate_symbol_has_data(s.symbol, skip_validation=False):
-                        logger.debug(f"DB record '{s.symbol}' - validation inconclusive, including anyway")
-                except Exception as e:
-                    logger.debug(f"DB record '{s.symbol}' - validation error, including anyway: {e}")
-                
-                # Skip symbols without exchange suffix if we already have better candidates
-                if candidates and '.' not in s.symbol:
-                    continue
-                    
-                candidates.append({
-                    "symbol": s.symbol,
-                    "displayName": s.name or s.symbol,
-                    "exchange": None,
-                    "quoteType": "EQUITY",
-                    "score": 0.6 if '.' in s.symbol else 0.3,
-                })
-                seen.add(s.symbol)
-                
-                if len(candidates) >= limit:
-                    break
-        except Exception:
-            pass
+
+def _schedule_checks(symbols: List[str]) -> None:
+    """Queue yfinance data checks off the request path, once per symbol per hour"""
+    pending = [s for s in symbols if cache.add(f"symbol_check_pending:{s}", True, 3600)]
+    if not pending:
+        return
+    try:
+        from tasks.validation_tasks import check_symbols_have_data
+        check_symbols_have_data.delay(pending)
+    except Exception as e:
+        logger.warning(f"Could not queue symbol data checks: {e}")
+
+
+def _index_matches(index, query: str, limit: int):
+    """(exact matches, other prefix / fuzzy hits) of the query in the symbol index"""
+    matches = index.exact(query, limit)
+    exact = {c["symbol"] for c in matches}
+    related = [c for c in index.search(query, limit) if c["symbol"] not in exact]
+    return matches, related
+
+
+def _finish(query: str, candidates: List[Dict[str, object]], is_ambiguous: bool, limit: int,
+            prefer_exchange: bool = False, related: List[Dict[str, object]] = ()) -> Dict[str, object]:
+    """
+    Rank the candidates and choose the canonical symbol among them: the
+    top-scored one, with exchange-qualified symbols winning ties.
+    `prefer_exchange` (Yahoo fallback results) picks the best
+    exchange-qualified symbol outright. `related` index hits that only
+    partially match the query are listed after them but never canonical.
+    """
+    q_upper = query.upper()
 
     # Last resort: if no candidates and query is bare symbol (AAPL, MSFT, TESLA), try it as-is
     if not candidates and is_ambiguous:
@@ -178,20 +152,18 @@ def resolve_symbol_or_name(query: str, limit: int = 10) -> Dict[str, object]:
     # Rank candidates by score descending
     candidates.sort(key=lambda x: x.get("score", 0), reverse=True)
 
-    # Choose canonical: prefer exchange-qualified symbols
     canonical = None
     if candidates:
-        # Find first candidate with exchange suffix
-        for c in candidates:
-            if '.' in c["symbol"]:
-                canonical = c["symbol"]
-                break
-        # Fallback to highest scored
-        if not canonical:
-            canonical = candidates[0]["symbol"]
+        top_score = candidates[0].get("score", 0)
+        contenders = candidates if prefer_exchange else [
+            c for c in candidates if c.get("score", 0) == top_score
+        ]
+        qualified = [c for c in contenders if '.' in c["symbol"]]
+        canonical = (qualified or candidates)[0]["symbol"]
 
+    listed = {c["symbol"] for c in candidates}
+    candidates = (candidates + [c for c in related if c["symbol"] not in listed])[:limit]
     result = {"canonical": canonical, "candidates": candidates}
-    cache.set(ck, result, 24 * 3600)
     
     if canonical:
         logger.info(f"Resolved '{query}' -> '{canonical}' with {len(candidates)} candidate(s)")
@@ -199,3 +171,91 @@ def resolve_symbol_or_name(query: str, limit: int = 10) -> Dict[str, object]:
         logger.warning(f"Failed to resolve '{query}'; searched Yahoo and local DB with {len(candidates)} candidates")
     
     return result
+
+
+def resolve_symbol_or_name(query: str, limit: int = 10) -> Dict[str, object]:
+    """
+    Resolve a symbol or company name to ranked candidates and a canonical symbol.
+
+    Exact symbol, name or alias matches are answered from the in-process
+    symbol index. Anything else (including queries that only prefix or
+    fuzzily match an indexed stock) asks Yahoo search, whose answer is cached.
+    """
+    query = (query or "").strip()
+    if not query:
+        return {"canonical": None, "candidates": []}
+
+    q_upper = query.upper()
+    # Determine if query is ambiguous (no exchange suffix like .NS, .BO, etc.)
+    is_ambiguous = '.' not in q_upper and not any(q_upper.endswith(x) for x in ['^', '='])
+
+    index = get_symbol_index()
+    index.refresh_if_due()
+    matches, related = _index_matches(index, query, limit)
+    if matches or related:
+        checks = cache.get_many([symbol_check_key(c["symbol"]) for c in matches + related])
+        _schedule_checks(_rank_by_checks(matches + related, checks))
+    if matches:
+        return _finish(query, matches, is_ambiguous, limit, related=related)
+
+    ck = _cache_key(query, limit)
+    cached = cache.get(ck)
+    if cached:
+        return cached
+
+    # Not in our universe: ask Yahoo for exchange-qualified results
+    candidates = []
+    if is_ambiguous:
+        try:
+            resp = requests.get(
+                "https://query2.finance.yahoo.com/v1/finance/search",
+                params={"q": query, "quotesCount": limit * 2, "newsCount": 0},
+                timeout=5,
+            )
+            resp.raise_for_status()
+            candidates = _yahoo_candidates(resp.json().get("quotes", []), limit, set())
+        except Exception as e:
+            logger.warning(f"Yahoo search failed for '{query}': {e}")
+
+    result = _finish(query, candidates, is_ambiguous, limit, prefer_exchange=True, related=related)
+    cache.set(ck, result, RESOLVE_CACHE_TIMEOUT)
+    return result
+
+
+async def aresolve_symbol_or_name(query: str, limit: int = 10) -> Dict[str, object]:
+    """resolve_symbol_or_name for async views; the Yahoo fallback is awaited"""
+    query = (query or "").strip()
+    if not query:
+        return {"canonical": None, "candidates": []}
+
+    q_upper = query.upper()
+    is_ambiguous = '.' not in q_upper and not any(q_upper.endswith(x) for x in ['^', '='])
+
+    index = get_symbol_index()
+    if index.check_due():
+        await sync_to_async(index.refresh)()
+    matches, related = _index_matches(index, query, limit)
+    if matches or related:
+        checks = await cache.aget_many([symbol_check_key(c["symbol"]) for c in matches + related])
+        unchecked = _rank_by_checks(matches + related, checks)
+        if unchecked:
+            await sync_to_async(_schedule_checks)(unchecked)
+    if matches:
+        return _finish(query, matches, is_ambiguous, limit, related=related)
+
+    ck = _cache_key(query, limit)
+    cached = await cache.aget(ck)
+    if cached:
+        return cached
+
+    candidates = []
+    if is_ambiguous:
+        try:
+            quotes = await yahoo_search(query, quotes_count=limit * 2)
+            candidates = _yahoo_candidates(quotes, limit, set())
+        except Exception as e:
+            logger.warning(f"Yahoo search failed for '{query}': {e}")
+
+    result = _finish(query, candidates, is_ambiguous, limit, prefer_exchange=True, related=related)
+    await cache.aset(ck, result, RESOLVE_CACHE_TIMEOUT)
+    return result
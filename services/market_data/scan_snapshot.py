@@ -0,0 +1,213 @@
+"""
+Precomputed market scanner response snapshots.
+
+The scanner task builds the full `/api/market/scanner/` payload once per
+ScanRun: every top-K list and the market overview come out of a single pass
+over the run's results. The payload is rendered to JSON once and stored as a
+blob (on the ScanRun row and in the cache) so the view can return it as-is.
+
+Consecutive snapshots are also diffed so only the changes between runs are
+pushed to websocket clients.
+"""
+import heapq
+import json
+from django.core.cache import cache
+from django.db.models import F
+from apps.market.models import MarketScanResult
+from utils.json_serializer import json_serializer
+from utils.responses import success_response
+from utils.constants import CACHE_TIMEOUT_DAY
+from utils.http_cache import set_data_version
+
+SNAPSHOT_TOP_K = 10
+SNAPSHOT_CATEGORIES = ('gainers', 'losers', 'mostActive', 'unusualVolume', 'breakouts')
+
+
+def snapshot_cache_key(timeframe):
+    return f"market_scanner_snapshot_{timeframe}"
+
+
+def _row(result):
+    """Frontend shape of one scan result (matches MarketScanResultSerializer)"""
+    return {
+        'symbol': result['symbol'],
+        'name': result['name'],
+        'currency': result['currency'],
+        'price': float(result['price']),
+        'change': float(result['change']),
+        'changePercent': float(result['change_percent']),
+        'volume': int(result['volume']),
+        'avgVolume': int(result['avg_volume']),
+        'volumeRatio': float(result['volume_ratio']),
+        'trend': result['trend'],
+        'isUnusualVolume': bool(result['is_unusual_volume']),
+        'isBreakout': bool(result['is_breakout']),
+        'resistance': float(result['resistance']) if result.get('resistance') is not None else None,
+        'support': float(result['support']) if result.get('support') is not None else None,
+    }
+
+
+class _TopK:
+    """Bounded min-heap keeping the K rows with the largest key"""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.counter = 0
+
+    def push(self, key, row):
+        # The counter keeps heap entries comparable when keys tie
+        self.counter += 1
+        entry = (key, -self.counter, row)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self):
+        return [row for _, _, row in sorted(self.heap, reverse=True)]
+
+
+def build_scan_snapshot(run, results, k=SNAPSHOT_TOP_K):
+    """Build the scanner payload for `run` from scanner result dicts in one pass"""
+    gainers, losers, most_active = _TopK(k), _TopK(k), _TopK(k)
+    unusual_volume, breakouts = _TopK(k), _TopK(k)
+    total = bullish = bearish = 0
+    change_sum = 0.0
+
+    for result in results:
+        row = _row(result)
+        change_percent = row['changePercent']
+
+        total += 1
+        change_sum += change_percent
+        if row['trend'] == 'Bullish':
+            bullish += 1
+        elif row['trend'] == 'Bearish':
+            bearish += 1
+
+        most_active.push(row['volume'], row)
+        if result['is_gainer']:
+            gainers.push(change_percent, row)
+        if result['is_loser']:
+            losers.push(-change_percent, row)
+        if row['isUnusualVolume']:
+            unusual_volume.push(row['volumeRatio'], row)
+        if row['isBreakout']:
+            breakouts.push(change_percent, row)
+
+    return {
+        'timeframe': run.timeframe,
+        'scanRunId': run.pk,
+        'timestamp': run.finished_at.isoformat() if run.finished_at else None,
+        'gainers': gainers.items(),
+        'losers': losers.items(),
+        'mostActive': most_active.items(),
+        'unusualVolume': unusual_volume.items(),
+        'breakouts': breakouts.items(),
+        'marketOverview': {
+            'totalScanned': total,
+            'bullish': bullish,
+            'bearish': bearish,
+            'avgChange': round(change_sum / total, 2) if total else 0.0
+        }
+    }
+
+
+def render_snapshot(snapshot):
+    """Render a snapshot into the final response body (ApiResponse envelope)"""
+    return json.dumps(success_response(data=snapshot), default=json_serializer)
+
+
+def publish_scan_snapshot(run):
+    """Make a run's rendered snapshot the one served for its timeframe"""
+    cache.set(snapshot_cache_key(run.timeframe), run.snapshot, CACHE_TIMEOUT_DAY)
+    finished_at = run.finished_at.timestamp() if run.finished_at else None
+    set_data_version('scanner', run.timeframe, run.pk, finished_at)
+
+
+def get_scan_snapshot(timeframe):
+    """Return the cached rendered snapshot for a timeframe, if any"""
+    return cache.get(snapshot_cache_key(timeframe))
+
+
+def rebuild_snapshot_for_run(run):
+    """Build, render and store the snapshot of a run from its saved results"""
+    rows = (
+        MarketScanResult.objects
+        .filter(scan_run=run)
+        .values(
+            'price', 'change', 'change_percent', 'volume', 'avg_volume', 'volume_ratio',
+            'is_gainer', 'is_loser', 'is_unusual_volume', 'is_breakout',
+            'trend', 'resistance', 'support',
+            symbol=F('stock__symbol'), name=F('stock__name'), currency=F('stock__currency'),
+        )
+    )
+    run.snapshot = render_snapshot(build_scan_snapshot(run, rows))
+    run.save(update_fields=['snapshot'])
+    publish_scan_snapshot(run)
+    return run.snapshot
+
+
+def load_snapshot_data(run):
+    """Return the snapshot payload (without envelope) stored on a run"""
+    if run is None or not run.snapshot:
+        return None
+    try:
+        return json.loads(run.snapshot).get('data')
+    except ValueError:
+        return None
+
+
+def diff_snapshots(previous, current):
+    """
+    Describe how `current` differs from `previous`, per category.
+
+    For each changed category: `entered` rows with their new rank, `left`
+    symbols, `moved` symbols with old and new rank, and `updated` symbols
+    with only the fields whose values changed (`changes`, field -> new
+    value; a dropped field maps to None). A missing `previous` diffs against
+    empty lists, so every row shows up as entered.
+    """
+    previous = previous or {}
+    categories = {}
+
+    for category in SNAPSHOT_CATEGORIES:
+        old_rows = {row['symbol']: (rank, row) for rank, row in enumerate(previous.get(category) or [])}
+        new_rows = {row['symbol']: (rank, row) for rank, row in enumerate(current.get(category) or [])}
+
+        entered, moved, updated = [], [], []
+        for symbol, (rank, row) in new_rows.items():
+            if symbol not in old_rows:
+                entered.append({'rank': rank, 'row': row})
+                continue
+            old_rank, old_row = old_rows[symbol]
+            if old_rank != rank:
+                moved.append({'symbol': symbol, 'from': old_rank, 'to': rank})
+            changes = {
+                field: row.get(field)
+                for field in [*row, *(f for f in old_row if f not in row)]
+                if row.get(field) != old_row.get(field)
+            }
+            if changes:
+                updated.append({'symbol': symbol, 'rank': rank, 'changes': changes})
+        left = [symbol for symbol in old_rows if symbol not in new_rows]
+
+        if entered or left or moved or updated:
+            categories[category] = {
+                'entered': entered,
+                'left': left,
+                'moved': moved,
+                'updated': updated,
+            }
+
+    delta = {
+        'timeframe': current.get('timeframe'),
+        'fromScanRunId': previous.get('scanRunId'),
+        'toScanRunId': current.get('scanRunId'),
+        'timestamp': current.get('timestamp'),
+        'categories': categories,
+    }
+    if previous.get('marketOverview') != current.get('marketOverview'):
+        delta['marketOverview'] = current.get('marketOverview')
+    return delta
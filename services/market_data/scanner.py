@@ -1,6 +1,8 @@
 from apps.market.models import Stock, StockPrice
-from django.db.models import Avg, F
-from datetime import datetime, timedelta
+from django.db import connection
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
 from utils.constants import (
     GAINER_THRESHOLD, LOSER_THRESHOLD,
     UNUSUAL_VOLUME_RATIO, BREAKOUT_THRESHOLD
@@ -9,83 +11,226 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Latest close, previous close, latest volume and 20-day average volume for
+# every active stock in one statement. Each stock's second-latest bar time is
+# looked up once through the (stock, timestamp) index (MATERIALIZED keeps the
+# planner from re-running it per price row), so LEAD() only sorts the last two
+# bars of each stock, however old they are. The average comes from a grouped
+# subquery over the recent window.
+SCAN_SQL = """
+WITH latest AS MATERIALIZED (
+    SELECT
+        s.symbol AS stock_id,
+        (
+            SELECT p.timestamp FROM {prices} p
+            WHERE p.stock_id = s.symbol
+            ORDER BY p.timestamp DESC
+            LIMIT 1 OFFSET 1
+        ) AS since
+    FROM {stocks} s
+    WHERE s.is_active = %s
+),
+ranked AS (
+    SELECT
+        p.stock_id,
+        p.close,
+        p.volume,
+        ROW_NUMBER() OVER (PARTITION BY p.stock_id ORDER BY p.timestamp DESC) AS rn,
+        LEAD(p.close) OVER (PARTITION BY p.stock_id ORDER BY p.timestamp DESC) AS prev_close
+    FROM {prices} p
+    JOIN latest l ON l.stock_id = p.stock_id
+    WHERE p.timestamp >= l.since
+),
+recent_volume AS (
+    SELECT stock_id, AVG(volume) AS avg_volume
+    FROM {prices}
+    WHERE timestamp >= %s
+    GROUP BY stock_id
+)
+SELECT s.symbol, s.name, s.currency, r.close, r.prev_close, r.volume, v.avg_volume
+FROM ranked r
+JOIN {stocks} s ON s.symbol = r.stock_id
+LEFT JOIN recent_volume v ON v.stock_id = r.stock_id
+WHERE r.rn = 1 AND r.prev_close IS NOT NULL
+ORDER BY s.symbol
+"""
+
+# Highs and lows of the most recent bars of every active stock, used to derive
+# support/resistance levels for the whole universe in one pass. The timestamp
+# bound keeps ROW_NUMBER() to the bars that can rank within the lookback.
+LEVELS_SQL = """
+SELECT stock_id, rn, high, low
+FROM (
+    SELECT
+        p.stock_id,
+        p.high,
+        p.low,
+        ROW_NUMBER() OVER (PARTITION BY p.stock_id ORDER BY p.timestamp DESC) AS rn
+    FROM {prices} p
+    JOIN {stocks} s ON s.symbol = p.stock_id
+    WHERE s.is_active = %s AND p.timestamp >= %s
+) recent
+WHERE rn <= %s
+"""
+
+
+def _to_decimal(value):
+    return Decimal(str(round(float(value), 4)))
+
+
 class MarketScanner:
     """Market scanner for finding interesting stocks"""
-    
+
+    AVG_VOLUME_DAYS = 20
+    LEVELS_LOOKBACK = 100
+    LEVELS_LOOKBACK_DAYS = 160  # calendar days covering LEVELS_LOOKBACK trading days
+    LEVELS_MIN_BARS = 20
+
     def scan(self, timeframe='daily'):
         """Scan market for gainers, losers, unusual volume, breakouts"""
         try:
-            # Get all active stocks
-            stocks = Stock.objects.filter(is_active=True)
-            results = []
-            
-            for stock in stocks:
-                try:
-                    result = self._analyze_stock(stock, timeframe)
-                    if result:
-                        results.append(result)
-                except Exception as e:
-                    logger.error(f"Error analyzing {stock.symbol}: {e}")
-                    continue
-            
+            rows = self._load_snapshot()
+            if not rows:
+                return []
+            results = self._classify(rows)
+            self._attach_levels(results)
             return results
-        
+
         except Exception as e:
             logger.error(f"Scanner error: {e}")
             return []
-    
-    def _analyze_stock(self, stock, timeframe):
-        """Analyze individual stock"""
-        # Get latest two prices
-        prices = StockPrice.objects.filter(stock=stock).order_by('-timestamp')[:2]
-        
-        if len(prices) < 2:
-            return None
-        
-        latest = prices[0]
-        previous = prices[1]
-        
-        # Calculate change
-        change = latest.close - previous.close
-        change_percent = ((latest.close - previous.close) / previous.close) * 100
-        
-        # Calculate average volume (20 days)
+
+    def _load_snapshot(self):
+        """Fetch the per-stock scan inputs for the whole universe in one query"""
+        from django.utils import timezone
+        since = timezone.now() - timedelta(days=self.AVG_VOLUME_DAYS)
+        sql = SCAN_SQL.format(
+            prices=StockPrice._meta.db_table,
+            stocks=Stock._meta.db_table,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [True, since])
+            return cursor.fetchall()
+
+    def support_resistance(self):
+        """
+        Support/resistance for every active stock from one query.
+
+        Each stock's last LEVELS_LOOKBACK highs and lows are laid out as rows of
+        a NaN-padded matrix; resistance is the 95th percentile of highs and
+        support the 5th percentile of lows, the same levels
+        TechnicalIndicatorCalculator.calculate_support_resistance gives for
+        a single symbol. Stocks with fewer than LEVELS_MIN_BARS bars are skipped.
+        """
+        sql = LEVELS_SQL.format(
+            prices=StockPrice._meta.db_table,
+            stocks=Stock._meta.db_table,
+        )
         from django.utils import timezone
-        twenty_days_ago = timezone.now() - timedelta(days=20)
-        avg_volume = StockPrice.objects.filter(
-            stock=stock,
-            timestamp__gte=twenty_days_ago
-        ).aggregate(Avg('volume'))['volume__avg'] or 1
-        
-        volume_ratio = latest.volume / avg_volume if avg_volume > 0 else 1
-        
-        # Determine flags
+        since = timezone.now() - timedelta(days=self.LEVELS_LOOKBACK_DAYS)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [True, since, self.LEVELS_LOOKBACK])
+            rows = cursor.fetchall()
+        if not rows:
+            return {}
+
+        stock_ids, ranks, highs, lows = zip(*rows)
+        symbols, index = np.unique(np.asarray(stock_ids, dtype=object), return_inverse=True)
+        column = np.asarray(ranks, dtype=int) - 1
+
+        high_matrix = np.full((len(symbols), self.LEVELS_LOOKBACK), np.nan)
+        low_matrix = np.full((len(symbols), self.LEVELS_LOOKBACK), np.nan)
+        high_matrix[index, column] = np.asarray(highs, dtype=float)
+        low_matrix[index, column] = np.asarray(lows, dtype=float)
+
+        enough = np.count_nonzero(~np.isnan(high_matrix), axis=1) >= self.LEVELS_MIN_BARS
+        if not enough.any():
+            return {}
+        resistance = np.nanpercentile(high_matrix[enough], 95, axis=1)
+        support = np.nanpercentile(low_matrix[enough], 5, axis=1)
+
+        return {
+            symbol: (r, s)
+            for symbol, r, s in zip(symbols[enough], resistance, support)
+        }
+
+    def _attach_levels(self, results):
+        """Fill in resistance/support on scan results; a failure leaves them empty"""
+        try:
+            levels = self.support_resistance()
+        except Exception as e:
+            logger.error(f"Error calculating support/resistance levels: {e}")
+            return
+        for result in results:
+            level = levels.get(result['symbol'])
+            if level:
+                result['resistance'] = _to_decimal(level[0])
+                result['support'] = _to_decimal(level[1])
+
+    def panel(self):
+        """Return per-stock scan inputs and derived values as column arrays"""
+        rows = self._load_snapshot()
+        if not rows:
+            return None
+        return self._to_panel(rows)
+
+    def _to_panel(self, rows):
+        """Turn snapshot rows into column arrays, dropping rows without a valid previous close"""
+        symbols, names, currencies, close, prev_close, volume, avg_volume = zip(*rows)
+
+        close = np.asarray(close, dtype=float)
+        prev_close = np.asarray(prev_close, dtype=float)
+        volume = np.asarray(volume, dtype=float)
+        avg_volume = np.array([v if v is not None else 1 for v in avg_volume], dtype=float)
+
+        valid = prev_close > 0
+        change = close - prev_close
+        change_percent = np.divide(change, prev_close, out=np.zeros_like(change), where=valid) * 100
+        volume_ratio = np.divide(volume, avg_volume, out=np.ones_like(volume), where=avg_volume > 0)
+
+        return {
+            'symbol': np.asarray(symbols, dtype=object)[valid],
+            'name': np.asarray(names, dtype=object)[valid],
+            'currency': np.asarray(currencies, dtype=object)[valid],
+            'close': close[valid],
+            'prev_close': prev_close[valid],
+            'change': change[valid],
+            'change_percent': change_percent[valid],
+            'volume': volume[valid],
+            'avg_volume': avg_volume[valid],
+            'volume_ratio': volume_ratio[valid],
+        }
+
+    def _classify(self, rows):
+        """Compute changes, volume ratios and flags for all rows at once"""
+        panel = self._to_panel(rows)
+        change_percent = panel['change_percent']
+        volume_ratio = panel['volume_ratio']
+
         is_gainer = change_percent >= GAINER_THRESHOLD
         is_loser = change_percent <= LOSER_THRESHOLD
         is_unusual_volume = volume_ratio >= UNUSUAL_VOLUME_RATIO
-        is_breakout = abs(change_percent) >= BREAKOUT_THRESHOLD
-        
-        # Determine trend
-        if change_percent > 0:
-            trend = 'Bullish'
-        elif change_percent < 0:
-            trend = 'Bearish'
-        else:
-            trend = 'Neutral'
-        
-        return {
-            'stock': stock,
-            'price': latest.close,
-            'change': change,
-            'change_percent': change_percent,
-            'volume': latest.volume,
-            'avg_volume': int(avg_volume),
-            'volume_ratio': volume_ratio,
-            'is_gainer': is_gainer,
-            'is_loser': is_loser,
-            'is_unusual_volume': is_unusual_volume,
-            'is_breakout': is_breakout,
-            'trend': trend,
-            'resistance': None,  # Calculate if needed
-            'support': None      # Calculate if needed
-        }
\ No newline at end of file
+        is_breakout = np.abs(change_percent) >= BREAKOUT_THRESHOLD
+        trend = np.where(change_percent > 0, 'Bullish', np.where(change_percent < 0, 'Bearish', 'Neutral'))
+
+        results = []
+        for i in range(len(panel['symbol'])):
+            results.append({
+                'symbol': panel['symbol'][i],
+                'name': panel['name'][i],
+                'currency': panel['currency'][i],
+                'price': _to_decimal(panel['close'][i]),
+                'change': _to_decimal(panel['change'][i]),
+                'change_percent': _to_decimal(change_percent[i]),
+                'volume': int(panel['volume'][i]),
+                'avg_volume': int(panel['avg_volume'][i]),
+                'volume_ratio': float(volume_ratio[i]),
+                'is_gainer': bool(is_gainer[i]),
+                'is_loser': bool(is_loser[i]),
+                'is_unusual_volume': bool(is_unusual_volume[i]),
+                'is_breakout': bool(is_breakout[i]),
+                'trend': str(trend[i]),
+                'resistance': None,  # Filled in by _attach_levels
+                'support': None
+            })
+        return results
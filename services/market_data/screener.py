@@ -0,0 +1,298 @@
+"""
+User-defined stock screener.
+
+Filter expressions such as ``rsi_14 < 30 AND close > sma_200 AND volume_ratio > 2``
+are tokenized and parsed against a whitelist of fields (never evaluated as
+Python), then compiled into a NumPy boolean mask over a cached panel: one
+array per field, one row per active stock. The panel is built from the
+set-based scanner query plus the latest TechnicalIndicator row of every stock,
+so each screen costs a couple of vectorized comparisons instead of a query.
+"""
+import re
+import time
+import logging
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from apps.market.models import TechnicalIndicator
+from services.market_data.scanner import MarketScanner
+from utils.constants import CACHE_TIMEOUT_SHORT
+
+logger = logging.getLogger(__name__)
+
+SCREENER_PANEL_KEY = 'screener_panel'
+MAX_EXPRESSION_LENGTH = 500
+MAX_PAGE_SIZE = 200
+
+PRICE_FIELDS = ('close', 'prev_close', 'change', 'change_percent', 'volume', 'avg_volume', 'volume_ratio')
+INDICATOR_FIELDS = tuple(
+    f.name for f in TechnicalIndicator._meta.get_fields()
+    if f.concrete and f.name not in ('id', 'stock', 'timestamp')
+)
+FIELDS = PRICE_FIELDS + INDICATOR_FIELDS
+FIELD_ALIASES = {'price': 'close'}
+
+COMPARATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '=': np.equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><=|>=|==|!=|<|>|=)
+      | (?P<paren>[()])
+    )""", re.VERBOSE)
+
+
+class ScreenerSyntaxError(ValueError):
+    """Raised when a screener expression is malformed or uses unknown fields"""
+
+
+def _tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = TOKEN_RE.match(expression, pos)
+        if not match:
+            raise ScreenerSyntaxError(f"Unexpected character at position {pos}: '{expression[pos:].strip()[:10]}'")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.upper() in ('AND', 'OR', 'NOT'):
+            kind, value = 'keyword', value.upper()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser producing a small tuple AST:
+
+        expr       := term (OR term)*
+        term       := factor (AND factor)*
+        factor     := NOT factor | '(' expr ')' | comparison
+        comparison := operand op operand
+        operand    := field | number
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.fields = set()
+
+    def parse(self):
+        if not self.tokens:
+            raise ScreenerSyntaxError('Expression is empty')
+        node = self._expr()
+        if self.pos != len(self.tokens):
+            raise ScreenerSyntaxError(f"Unexpected token '{self.tokens[self.pos][1]}'")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        if token[0] is None:
+            raise ScreenerSyntaxError('Unexpected end of expression')
+        self.pos += 1
+        return token
+
+    def _expr(self):
+        node = self._term()
+        while self._peek() == ('keyword', 'OR'):
+            self._next()
+            node = ('or', node, self._term())
+        return node
+
+    def _term(self):
+        node = self._factor()
+        while self._peek() == ('keyword', 'AND'):
+            self._next()
+            node = ('and', node, self._factor())
+        return node
+
+    def _factor(self):
+        kind, value = self._peek()
+        if (kind, value) == ('keyword', 'NOT'):
+            self._next()
+            return ('not', self._factor())
+        if (kind, value) == ('paren', '('):
+            self._next()
+            node = self._expr()
+            if self._next() != ('paren', ')'):
+                raise ScreenerSyntaxError("Expected ')'")
+            return node
+        left = self._operand()
+        kind, op = self._next()
+        if kind != 'op':
+            raise ScreenerSyntaxError(f"Expected a comparison operator, got '{op}'")
+        right = self._operand()
+        if left[0] == 'num' and right[0] == 'num':
+            raise ScreenerSyntaxError('A comparison must reference at least one field')
+        return ('cmp', op, left, right)
+
+    def _operand(self):
+        kind, value = self._next()
+        if kind == 'number':
+            return ('num', float(value))
+        if kind == 'name':
+            field = FIELD_ALIASES.get(value.lower(), value.lower())
+            if field not in FIELDS:
+                raise ScreenerSyntaxError(f"Unknown field '{value}'")
+            self.fields.add(field)
+            return ('field', field)
+        raise ScreenerSyntaxError(f"Expected a field or number, got '{value}'")
+
+
+def parse_expression(expression):
+    """Validate an expression and return (ast, referenced fields)"""
+    if not isinstance(expression, str):
+        raise ScreenerSyntaxError('Expression must be a string')
+    if not expression or not expression.strip():
+        raise ScreenerSyntaxError('Expression is empty')
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ScreenerSyntaxError(f'Expression is longer than {MAX_EXPRESSION_LENGTH} characters')
+    parser = _Parser(_tokenize(expression))
+    ast = parser.parse()
+    return ast, parser.fields
+
+
+def compile_mask(ast, panel):
+    """Evaluate a parsed expression into a boolean mask over the panel rows"""
+    node_type = ast[0]
+    if node_type == 'and':
+        return compile_mask(ast[1], panel) & compile_mask(ast[2], panel)
+    if node_type == 'or':
+        return compile_mask(ast[1], panel) | compile_mask(ast[2], panel)
+    if node_type == 'not':
+        return ~compile_mask(ast[1], panel)
+
+    _, op, left, right = ast
+    lhs = panel[left[1]] if left[0] == 'field' else left[1]
+    rhs = panel[right[1]] if right[0] == 'field' else right[1]
+    # NaN (missing indicator) compares False, so such rows never match
+    with np.errstate(invalid='ignore'):
+        return COMPARATORS[op](lhs, rhs)
+
+
+def _latest_indicators():
+    """Latest TechnicalIndicator row of every stock in one query"""
+    return (
+        TechnicalIndicator.objects
+        .annotate(rn=Window(
+            expression=RowNumber(),
+            partition_by=[F('stock_id')],
+            order_by=F('timestamp').desc(),
+        ))
+        .filter(rn=1)
+        .values_list('stock_id', *INDICATOR_FIELDS)
+    )
+
+
+def build_panel():
+    """Load the screenable universe as column arrays aligned by symbol"""
+    panel = MarketScanner().panel()
+    if panel is None:
+        return None
+
+    position = {symbol: i for i, symbol in enumerate(panel['symbol'])}
+    size = len(position)
+    for field in INDICATOR_FIELDS:
+        panel[field] = np.full(size, np.nan)
+
+    for row in _latest_indicators():
+        i = position.get(row[0])
+        if i is None:
+            continue
+        for field, value in zip(INDICATOR_FIELDS, row[1:]):
+            if value is not None:
+                panel[field][i] = value
+    return panel
+
+
+def get_panel():
+    """Return the cached screener panel, building it on a miss"""
+    panel = cache.get(SCREENER_PANEL_KEY)
+    if panel is None:
+        panel = build_panel()
+        if panel is not None:
+            cache.set(SCREENER_PANEL_KEY, panel, CACHE_TIMEOUT_SHORT)
+    return panel
+
+
+def invalidate_panel():
+    cache.delete(SCREENER_PANEL_KEY)
+
+
+def _value(array, i):
+    value = array[i]
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+class StockScreener:
+    """Run filter expressions over the cached universe panel"""
+
+    def screen(self, expression, page=1, page_size=50, sort=None):
+        """
+        Screen the universe and return one page of matches.
+
+        `sort` is a field name, optionally prefixed with '-' for descending;
+        it defaults to descending volume ratio.
+        """
+        started = time.perf_counter()
+        ast, fields = parse_expression(expression)
+
+        sort = sort or '-volume_ratio'
+        descending = sort.startswith('-')
+        sort_field = FIELD_ALIASES.get(sort.lstrip('-').lower(), sort.lstrip('-').lower())
+        if sort_field not in FIELDS:
+            raise ScreenerSyntaxError(f"Unknown sort field '{sort_field}'")
+
+        panel = get_panel()
+        if panel is None:
+            matches = np.array([], dtype=int)
+        else:
+            matches = np.flatnonzero(compile_mask(ast, panel))
+            keys = panel[sort_field][matches]
+            # NaNs sort last in either direction
+            order = np.argsort(np.where(np.isnan(keys), np.inf, -keys if descending else keys), kind='stable')
+            matches = matches[order]
+
+        total = len(matches)
+        start = (page - 1) * page_size
+        columns = ['close', 'change', 'change_percent', 'volume', 'volume_ratio']
+        columns += sorted(f for f in fields | {sort_field} if f not in columns)
+
+        results = []
+        for i in matches[start:start + page_size]:
+            row = {
+                'symbol': panel['symbol'][i],
+                'name': panel['name'][i],
+                'currency': panel['currency'][i],
+            }
+            for column in columns:
+                row[column] = _value(panel[column], i)
+            results.append(row)
+
+        return {
+            'expression': expression.strip(),
+            'sort': sort,
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': (total + page_size - 1) // page_size,
+            'results': results,
+            'execution_time_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
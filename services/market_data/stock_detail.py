@@ -0,0 +1,374 @@
+"""
+Stock detail snapshots with stale-while-revalidate.
+
+The detail payload of a symbol is kept in the cache together with the time it
+was refreshed from upstream. Reads always return the last snapshot right away;
+once it is older than STOCK_DETAIL_SOFT_TTL a background refresh is queued
+(at most one per symbol at a time). Only a symbol that has never been seen
+blocks on the upstream fetch.
+"""
+import json
+import time
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Max, Min, OuterRef, Subquery
+from django.utils import timezone
+from apps.market.models import Stock, StockPrice, TechnicalIndicator
+from services.market_data.fetcher import MarketDataFetcher
+from services.market_data.async_fetcher import AsyncMarketDataFetcher
+from services.market_data.indicators import TechnicalIndicatorCalculator
+from utils.constants import STOCK_DETAIL_SOFT_TTL, STOCK_DETAIL_HARD_TTL
+from utils.http_cache import set_data_version, get_data_version, aget_data_version
+from utils.json_serializer import json_serializer
+
+logger = logging.getLogger(__name__)
+
+REFRESH_LOCK_TIMEOUT = 120
+
+
+def snapshot_key(symbol):
+    return f"stock_detail_v2_{symbol}"
+
+
+def refresh_lock_key(symbol):
+    return f"stock_detail_refreshing_{symbol}"
+
+
+def _currency_for(symbol):
+    """Detect currency from symbol suffix"""
+    if '.NS' in symbol or '.BO' in symbol:
+        return 'INR'
+    if '.L' in symbol:
+        return 'GBP'
+    if '.T' in symbol:
+        return 'JPY'
+    return 'USD'
+
+
+def _stock_fields(symbol, overview):
+    """Fields of a new Stock row from the company overview, or minimal data"""
+    if overview and overview.get('name'):
+        return {
+            'symbol': symbol,
+            'name': overview['name'],
+            'sector': overview.get('sector', ''),
+            'industry': overview.get('industry', ''),
+            'market_cap': overview.get('marketCap'),
+            'currency': overview.get('currency', 'USD'),
+            'exchange': overview.get('exchange', ''),
+        }
+    return {'symbol': symbol, 'name': symbol, 'currency': _currency_for(symbol)}
+
+
+def _create_stock(fetcher, symbol):
+    """Create a Stock row from the company overview, or with minimal data"""
+    return Stock.objects.create(**_stock_fields(symbol, fetcher.fetch_company_overview(symbol)))
+
+
+HISTORY_BARS = 200
+DETAIL_INDICATOR_FIELDS = ('timestamp', 'rsi_14', 'macd', 'sma_20', 'sma_50')
+
+
+def _stock_summary_queryset(symbol):
+    """
+    The stock row with its 52-week range and latest indicator values attached,
+    all in one query (scalar subqueries over the (stock, timestamp) indexes)
+    """
+    year_ago = timezone.now() - timedelta(days=365)
+    year_prices = (
+        StockPrice.objects
+        .filter(stock=OuterRef('pk'), timestamp__gte=year_ago)
+        .order_by()
+        .values('stock')
+    )
+    latest_indicator = TechnicalIndicator.objects.filter(stock=OuterRef('pk')).order_by('-timestamp')
+    return (
+        Stock.objects
+        .filter(symbol=symbol)
+        .annotate(
+            high_52w=Subquery(year_prices.annotate(value=Max('high')).values('value')),
+            low_52w=Subquery(year_prices.annotate(value=Min('low')).values('value')),
+            **{
+                f'indicator_{field}': Subquery(latest_indicator.values(field)[:1])
+                for field in DETAIL_INDICATOR_FIELDS
+            }
+        )
+    )
+
+
+def _stock_summary(symbol):
+    return _stock_summary_queryset(symbol).first()
+
+
+def _history_queryset(symbol):
+    """Last HISTORY_BARS bars as tuples, newest first"""
+    return (
+        StockPrice.objects
+        .filter(stock_id=symbol)
+        .order_by('-timestamp')
+        .values_list('timestamp', 'open', 'high', 'low', 'close', 'volume')[:HISTORY_BARS]
+    )
+
+
+def _history(symbol):
+    return list(_history_queryset(symbol))
+
+
+def _columnar(bars):
+    """Price bars as parallel columns (epoch-second timestamps)"""
+    columns = list(zip(*bars))
+    if not columns:
+        return {'t': [], 'o': [], 'h': [], 'l': [], 'c': [], 'v': []}
+    timestamps, opens, highs, lows, closes, volumes = columns
+    return {
+        't': [int(ts.timestamp()) for ts in timestamps],
+        'o': [float(x) for x in opens],
+        'h': [float(x) for x in highs],
+        'l': [float(x) for x in lows],
+        'c': [float(x) for x in closes],
+        'v': list(volumes),
+    }
+
+
+def build_stock_detail(symbol, calculate_missing=False):
+    """
+    Build the detail payload of a symbol from the database in two queries,
+    or return None when the stock does not exist.
+
+    With `calculate_missing`, indicators that are missing or older than the
+    latest price are recalculated first (only done on refresh, never on reads).
+    """
+    stock = _stock_summary(symbol)
+    if stock is None:
+        return None
+    bars = _history(symbol)
+
+    if calculate_missing and _indicators_outdated(stock, bars):
+        try:
+            TechnicalIndicatorCalculator().calculate_indicators(symbol)
+            stock = _stock_summary(symbol)
+        except Exception:
+            pass
+
+    return _detail_payload(stock, bars)
+
+
+async def abuild_stock_detail(symbol, calculate_missing=False):
+    """build_stock_detail over the async ORM"""
+    stock = await _stock_summary_queryset(symbol).afirst()
+    if stock is None:
+        return None
+    bars = [bar async for bar in _history_queryset(symbol)]
+
+    if calculate_missing and _indicators_outdated(stock, bars):
+        try:
+            await sync_to_async(TechnicalIndicatorCalculator().calculate_indicators)(symbol)
+            stock = await _stock_summary_queryset(symbol).afirst()
+        except Exception:
+            pass
+
+    return _detail_payload(stock, bars)
+
+
+def _indicators_outdated(stock, bars):
+    """True when the latest indicators are missing or older than the latest bar"""
+    return bool(bars) and (stock.indicator_timestamp is None or stock.indicator_timestamp < bars[0][0])
+
+
+def _detail_payload(stock, bars):
+    """Detail payload from the annotated stock row and its bars (newest first)"""
+    latest = bars[0] if bars else None
+
+    historical_data = [
+        {
+            'date': timestamp.isoformat(),
+            'open': float(open_),
+            'high': float(high),
+            'low': float(low),
+            'close': float(close),
+            'volume': volume
+        }
+        for timestamp, open_, high, low, close, volume in reversed(bars)
+    ]
+    history = _columnar(reversed(bars))
+
+    indicators = {}
+    if stock.indicator_timestamp is not None:
+        indicators = {
+            'rsi': stock.indicator_rsi_14,
+            'macd': stock.indicator_macd,
+            'sma20': stock.indicator_sma_20,
+            'sma50': stock.indicator_sma_50,
+        }
+
+    price = change = change_percent = 0
+    volume = 0
+    if latest:
+        _, open_, _, _, close, volume = latest
+        price = float(close)
+        change = float(close - open_)
+        change_percent = float((close - open_) / open_ * 100) if open_ > 0 else 0.0
+
+    return {
+        'symbol': stock.symbol,
+        'name': stock.name,
+        'currency': stock.currency,
+        'price': price,
+        'change': change,
+        'changePercent': change_percent,
+        'volume': volume,
+        'marketCap': stock.market_cap,
+        'high52w': float(stock.high_52w) if stock.high_52w is not None else 0,
+        'low52w': float(stock.low_52w) if stock.low_52w is not None else 0,
+        'historicalData': historical_data,
+        'history': history,
+        'indicators': indicators,
+        'lastPriceAt': latest[0].isoformat() if latest else None,
+    }
+
+
+def _store_snapshot(symbol, data, refreshed_at):
+    snapshot = {'data': data, 'refreshed_at': refreshed_at}
+    cache.set(snapshot_key(symbol), snapshot, STOCK_DETAIL_HARD_TTL)
+
+    # Content hash of the snapshot backs the endpoint's ETag
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=json_serializer).encode('utf-8')).hexdigest()
+    if refreshed_at is not None:
+        modified = refreshed_at
+    elif data.get('lastPriceAt'):
+        modified = datetime.fromisoformat(data['lastPriceAt']).timestamp()
+    else:
+        modified = time.time()
+    set_data_version('stock_detail', symbol, f"{digest}:{refreshed_at}", modified)
+    return snapshot
+
+
+def get_stock_detail_version(symbol):
+    """
+    (version, last modified, is stale) of the snapshot that would be served,
+    from one small cache read; None when unknown
+    """
+    return _version_info(get_data_version('stock_detail', symbol))
+
+
+async def aget_stock_detail_version(symbol):
+    return _version_info(await aget_data_version('stock_detail', symbol))
+
+
+def _version_info(record):
+    if record is None:
+        return None
+    refreshed_at = record['version'].rsplit(':', 1)[1]
+    is_stale = refreshed_at == 'None' or time.time() - float(refreshed_at) > STOCK_DETAIL_SOFT_TTL
+    return record['version'], record['modified'], is_stale
+
+
+def refresh_stock_detail(symbol):
+    """Fetch the latest quote from upstream, persist it and store a fresh snapshot"""
+    fetcher = MarketDataFetcher()
+    quote = fetcher.fetch_real_time_quote(symbol)
+
+    # Don't require real-time data to exist; some symbols may be cached or DB-only
+    if not Stock.objects.filter(symbol=symbol).exists():
+        _create_stock(fetcher, symbol)
+
+    # Save the validated price data if available
+    if quote and quote.get('price', 0) > 0:
+        fetcher.save_stock_price(symbol, quote)
+
+    data = build_stock_detail(symbol, calculate_missing=True)
+    return _store_snapshot(symbol, data, time.time())
+
+
+async def arefresh_stock_detail(symbol):
+    """refresh_stock_detail with async upstream calls and the async ORM"""
+    fetcher = AsyncMarketDataFetcher()
+    quote = await fetcher.fetch_real_time_quote(symbol)
+
+    if not await Stock.objects.filter(symbol=symbol).aexists():
+        overview = await fetcher.fetch_company_overview(symbol)
+        await Stock.objects.acreate(**_stock_fields(symbol, overview))
+
+    if quote and quote.get('price', 0) > 0:
+        await fetcher.save_stock_price(symbol, quote)
+
+    data = await abuild_stock_detail(symbol, calculate_missing=True)
+    return await sync_to_async(_store_snapshot)(symbol, data, time.time())
+
+
+def enqueue_refresh(symbol):
+    """Queue a background refresh unless one is already pending for the symbol"""
+    if not cache.add(refresh_lock_key(symbol), True, REFRESH_LOCK_TIMEOUT):
+        return False
+    try:
+        from tasks.market_tasks import refresh_stock_detail_snapshot
+        refresh_stock_detail_snapshot.delay(symbol)
+        return True
+    except Exception as e:
+        cache.delete(refresh_lock_key(symbol))
+        logger.error(f"Error queueing stock detail refresh for {symbol}: {e}")
+        return False
+
+
+def get_stock_detail(symbol, history_layout='rows'):
+    """
+    Return the detail payload of a symbol with `asOf` and `isStale`.
+
+    The price history is returned as `historicalData` (list of bar dicts) for
+    the 'rows' layout, or as `history` (parallel t/o/h/l/c/v columns) for the
+    'columnar' layout. Snapshots store both so neither is built per request.
+
+    Fresh snapshot: returned as-is. Stale snapshot: returned and refreshed in
+    the background. No snapshot but the stock has stored prices: built from
+    the database (no upstream call) and refreshed in the background. Never
+    seen: fetched from upstream before returning.
+    """
+    snapshot = cache.get(snapshot_key(symbol))
+
+    if snapshot is None:
+        data = build_stock_detail(symbol)
+        if data is not None and data['historicalData']:
+            snapshot = _store_snapshot(symbol, data, None)
+        else:
+            snapshot = refresh_stock_detail(symbol)
+
+    data = _present(snapshot, history_layout)
+    if data['isStale']:
+        enqueue_refresh(symbol)
+    return data
+
+
+async def aget_stock_detail(symbol, history_layout='rows'):
+    """get_stock_detail for async views; only a never-seen symbol awaits upstream"""
+    snapshot = await cache.aget(snapshot_key(symbol))
+
+    if snapshot is None:
+        data = await abuild_stock_detail(symbol)
+        if data is not None and data['historicalData']:
+            snapshot = await sync_to_async(_store_snapshot)(symbol, data, None)
+        else:
+            snapshot = await arefresh_stock_detail(symbol)
+
+    data = _present(snapshot, history_layout)
+    if data['isStale']:
+        await sync_to_async(enqueue_refresh)(symbol)
+    return data
+
+
+def _present(snapshot, history_layout):
+    """Response payload of a snapshot in the requested history layout"""
+    refreshed_at = snapshot['refreshed_at']
+    is_stale = refreshed_at is None or time.time() - refreshed_at > STOCK_DETAIL_SOFT_TTL
+
+    data = dict(snapshot['data'])
+    data.pop('history' if history_layout == 'rows' else 'historicalData', None)
+    if refreshed_at is not None:
+        data['asOf'] = datetime.fromtimestamp(refreshed_at, tz=dt_timezone.utc).isoformat()
+    else:
+        # Built from stored prices only: as fresh as the latest bar
+        data['asOf'] = data.get('lastPriceAt')
+    data['isStale'] = is_stale
+    return data
@@ -0,0 +1,296 @@
+"""
+In-process search index over the symbol universe.
+
+Every active Stock is indexed under a few normalized keys: its symbol, the
+symbol without exchange suffix (TCS for TCS.NS), its name with corporate
+suffixes dropped, each further word of that name and its aliases (search
+metadata precomputed by import_symbol_universe). Prefix lookups
+are two binary searches over the sorted key array (a flattened trie), and
+misspellings are matched through a trigram inverted index, so a query costs
+microseconds and no database or network round trip.
+
+The index is loaded from the Stock table on first use and kept current
+incrementally: Stock saves and deletes bump a cache version that every
+process checks at most every SYMBOL_INDEX_CHECK_INTERVAL seconds. Changed
+rows are re-read by `last_updated`; deletes trigger a full reload. Writers
+that bypass model signals (bulk_create, update) call `mark_symbols_changed`.
+"""
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from django.utils import timezone
+from apps.market.models import Stock
+from utils.http_cache import bump_data_version, get_data_version
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_INDEX_CHECK_INTERVAL = 5  # seconds between version checks
+MAX_PREFIX_SCAN = 500  # keys examined per prefix query
+FUZZY_MIN_SIMILARITY = 0.35
+FULL_RELOAD_THRESHOLD = 2000  # changed rows above which a full reload is cheaper
+
+CORPORATE_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'ltd',
+    'limited', 'plc', 'llc', 'lp', 'sa', 'ag', 'nv', 'se', 'the',
+}
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9. ]+')
+
+# Score of a match by key kind; fuzzy matches scale FUZZY_SCORE by similarity
+KEY_SCORES = {
+    'symbol': 1.0,
+    'base': 0.95,
+    'name': 0.9,
+    'alias': 0.85,
+    'word': 0.75,
+}
+PREFIX_PENALTY = 0.1
+FUZZY_SCORE = 0.6
+
+
+def normalize_name(name):
+    """Lowercase company name without punctuation or corporate suffixes"""
+    words = _NON_ALNUM_RE.sub(' ', (name or '').lower().replace('&', ' and ')).replace('.', ' ').split()
+    while len(words) > 1 and words[-1] in CORPORATE_SUFFIXES:
+        words.pop()
+    if len(words) > 1 and words[0] == 'the':
+        words = words[1:]
+    return ' '.join(words)
+
+
+def normalize_query(query):
+    return _NON_ALNUM_RE.sub(' ', (query or '').lower()).strip()
+
+
+def search_keys(symbol, name, search_name='', aliases=()):
+    """(key, kind) pairs a stock is found under"""
+    symbol_key = symbol.lower()
+    keys = {(symbol_key, 'symbol')}
+    base = symbol_key.split('.')[0]
+    if base and base != symbol_key:
+        keys.add((base, 'base'))
+    normalized = search_name or normalize_name(name)
+    if normalized:
+        keys.add((normalized, 'name'))
+        for word in normalized.split()[1:]:
+            if len(word) > 2:
+                keys.add((word, 'word'))
+    for alias in aliases or ():
+        alias = normalize_query(alias)
+        if alias and alias != normalized:
+            keys.add((alias, 'alias'))
+    return keys
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _row_index(symbol, name, search_name='', aliases=()):
+    """Sorted-array keys and trigrams of one stock"""
+    keys = [(key, kind, symbol) for key, kind in search_keys(symbol, name, search_name, aliases)]
+    grams = frozenset(
+        trigrams(search_name or normalize_name(name) or symbol.lower()) | trigrams(symbol.lower())
+    )
+    return keys, grams
+
+
+def mark_symbols_changed(deleted=False):
+    """Tell every process's index to pick up Stock changes on its next check"""
+    bump_data_version('symbol_index', 'deleted' if deleted else 'updated')
+
+
+class SymbolIndex:
+    """Prefix and trigram search over the Stock table"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}  # symbol -> (name, exchange)
+        self._keys = []  # sorted (key, kind, symbol)
+        self._symbol_keys = {}  # symbol -> its key tuples
+        self._grams = {}  # trigram -> set of symbols
+        self._symbol_grams = {}  # symbol -> its trigrams
+        self._loaded = False
+        self._watermark = None
+        self._versions = (None, None)
+        self._checked_at = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Loading
+
+    def _rows(self, since=None):
+        qs = Stock.objects.filter(is_active=True)
+        if since is not None:
+            qs = Stock.objects.filter(last_updated__gte=since)
+        return qs.values_list(
+            'symbol', 'name', 'exchange', 'search_name', 'aliases', 'is_active', 'last_updated'
+        )
+
+    def _add(self, symbol, name, exchange, search_name='', aliases=()):
+        keys, grams = _row_index(symbol, name, search_name, aliases)
+        self._entries[symbol] = (name or symbol, exchange)
+        self._symbol_keys[symbol] = keys
+        self._symbol_grams[symbol] = grams
+        for item in keys:
+            insort(self._keys, item)
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(symbol)
+
+    def _remove(self, symbol):
+        if symbol not in self._entries:
+            return
+        for item in self._symbol_keys.pop(symbol):
+            i = bisect_left(self._keys, item)
+            if i < len(self._keys) and self._keys[i] == item:
+                del self._keys[i]
+        for gram in self._symbol_grams.pop(symbol):
+            self._grams[gram].discard(symbol)
+        del self._entries[symbol]
+
+    def rebuild(self):
+        """Reload the whole index from the database"""
+        started = time.perf_counter()
+        entries, keys, symbol_keys, grams, symbol_grams = {}, [], {}, {}, {}
+        watermark = None
+        for symbol, name, exchange, search_name, aliases, is_active, last_updated in self._rows():
+            item_keys, item_grams = _row_index(symbol, name, search_name, aliases)
+            entries[symbol] = (name or symbol, exchange)
+            symbol_keys[symbol] = item_keys
+            symbol_grams[symbol] = item_grams
+            keys.extend(item_keys)
+            for gram in item_grams:
+                grams.setdefault(gram, set()).add(symbol)
+            if last_updated and (watermark is None or last_updated > watermark):
+                watermark = last_updated
+        keys.sort()
+
+        with self._lock:
+            self._entries, self._keys, self._symbol_keys = entries, keys, symbol_keys
+            self._grams, self._symbol_grams = grams, symbol_grams
+            self._watermark = watermark or timezone.now()
+            self._loaded = True
+        logger.info(f"Symbol index built: {len(entries)} symbols in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def apply_changes(self):
+        """Re-index rows updated since the last load; returns the number applied"""
+        rows = list(self._rows(since=self._watermark))
+        if len(rows) > FULL_RELOAD_THRESHOLD:
+            self.rebuild()
+            return len(rows)
+        with self._lock:
+            for symbol, name, exchange, search_name, aliases, is_active, last_updated in rows:
+                self._remove(symbol)
+                if is_active:
+                    self._add(symbol, name, exchange, search_name, aliases)
+                if last_updated and last_updated > self._watermark:
+                    self._watermark = last_updated
+        return len(rows)
+
+    def check_due(self):
+        return not self._loaded or time.monotonic() - self._checked_at >= SYMBOL_INDEX_CHECK_INTERVAL
+
+    def refresh(self):
+        """Load on first use, then apply the Stock changes writers announced"""
+        versions = tuple(
+            (get_data_version('symbol_index', kind) or {}).get('version') for kind in ('updated', 'deleted')
+        )
+        self._checked_at = time.monotonic()
+
+        if not self._loaded or versions[1] != self._versions[1]:
+            self.rebuild()
+        elif versions[0] != self._versions[0]:
+            self.apply_changes()
+        self._versions = versions
+
+    def refresh_if_due(self):
+        if self.check_due():
+            self.refresh()
+
+    # Search
+
+    def _candidate(self, symbol, score):
+        name, exchange = self._entries[symbol]
+        return {
+            "symbol": symbol,
+            "displayName": name,
+            "exchange": exchange or None,
+            "quoteType": "EQUITY",
+            "score": round(score, 4),
+        }
+
+    def _prefix_matches(self, query, scores):
+        lo = bisect_left(self._keys, (query,))
+        hi = bisect_left(self._keys, (query + '\uffff',), lo)
+        for key, kind, symbol in self._keys[lo:min(hi, lo + MAX_PREFIX_SCAN)]:
+            score = KEY_SCORES[kind]
+            if key != query:
+                # Partial match: the more of the key the query covers, the better
+                score -= PREFIX_PENALTY * (2 - len(query) / len(key))
+            if score > scores.get(symbol, 0):
+                scores[symbol] = score
+
+    def _fuzzy_matches(self, query, scores):
+        query_grams = trigrams(query)
+        counts = Counter()
+        for gram in query_grams:
+            counts.update(self._grams.get(gram, ()))
+        for symbol, common in counts.items():
+            similarity = common / (len(query_grams) + len(self._symbol_grams[symbol]) - common)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                score = FUZZY_SCORE * similarity
+                if score > scores.get(symbol, 0):
+                    scores[symbol] = score
+
+    def _exact_matches(self, query, scores):
+        i = bisect_left(self._keys, (query,))
+        while i < len(self._keys) and self._keys[i][0] == query:
+            _, kind, symbol = self._keys[i]
+            # A single word of a longer name is not the company's name
+            if kind != 'word' and KEY_SCORES[kind] > scores.get(symbol, 0):
+                scores[symbol] = KEY_SCORES[kind]
+            i += 1
+
+    def _ranked(self, scores, limit):
+        best = sorted(scores.items(), key=lambda item: (-item[1], len(item[0]), item[0]))[:limit]
+        return [self._candidate(symbol, score) for symbol, score in best]
+
+    def exact(self, query, limit=10):
+        """Stocks whose symbol, base symbol, name or an alias is the query itself"""
+        query = normalize_query(query)
+        if not query:
+            return []
+        with self._lock:
+            scores = {}
+            self._exact_matches(query, scores)
+            name_query = normalize_name(query)
+            if name_query and name_query != query:
+                self._exact_matches(name_query, scores)
+            return self._ranked(scores, limit)
+
+    def search(self, query, limit=10):
+        """Best matching stocks (prefix and fuzzy) as resolver candidates, highest score first"""
+        query = normalize_query(query)
+        if not query:
+            return []
+        with self._lock:
+            scores = {}
+            self._prefix_matches(query, scores)
+            name_query = normalize_name(query)
+            if name_query and name_query != query:
+                self._prefix_matches(name_query, scores)
+            if len(scores) < limit and len(query) >= 3:
+                self._fuzzy_matches(name_query or query, scores)
+            return self._ranked(scores, limit)
+
+
+_index = SymbolIndex()
+
+
+def get_symbol_index():
+    """The process-wide index (loaded lazily by `refresh`)"""
+    return _index
@@ -0,0 +1,196 @@
+"""
+Bulk import of exchange listing files into the Stock table.
+
+Accepts the listing files exchanges publish (comma or pipe delimited CSV,
+e.g. NASDAQ Trader's nasdaqlisted.txt / otherlisted.txt, NSE's EQUITY_L.csv,
+BSE's equity list, the LSE instrument list) and JSON fixtures: a list of
+objects, or {"exchange": ..., "listings": [...]}. Column names are matched
+case-insensitively against the usual headers of those files.
+
+Symbols are mapped to Yahoo form (BRK.B -> BRK-B, RELIANCE -> RELIANCE.NS),
+names are cleaned of share-class descriptions, and the normalized name and
+aliases the symbol index searches on are stored with each row, so the whole
+listed universe resolves locally.
+"""
+import csv
+import io
+import json
+import logging
+import re
+from pathlib import Path
+from django.utils import timezone
+from apps.market.models import Stock
+from services.market_data.symbol_index import normalize_name, normalize_query, mark_symbols_changed
+from utils.constants import LISTING_EXCHANGES, SYMBOL_IMPORT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_COLUMNS = ('symbol', 'ticker', 'act symbol', 'security id', 'tidm')
+NAME_COLUMNS = ('name', 'company name', 'name of company', 'issuer name', 'security name', 'company')
+ALIAS_COLUMNS = ('aliases', 'alias')
+# Exchange codes used by NASDAQ Trader's otherlisted.txt
+EXCHANGE_CODES = {'N': 'NYSE', 'A': 'NYSE', 'P': 'NYSE', 'Q': 'NASDAQ'}
+INACTIVE_STATUSES = {'delisted', 'suspended', 'inactive'}
+
+# Fields refreshed when a listed symbol already exists; sector, industry and
+# market cap come from company overviews and are left alone
+UPSERT_FIELDS = ['name', 'exchange', 'currency', 'search_name', 'aliases', 'is_active', 'last_updated']
+
+SYMBOL_MAX_LENGTH = Stock._meta.get_field('symbol').max_length
+_SHARE_CLASS_RE = re.compile(
+    r'\s+-\s+[^-]*\b(stock|shares?|units?|warrants?|rights?|notes?|depositary)\b.*$'
+    r'|\s+(class [a-z]\b|common stock|ordinary shares|american depositary).*$',
+    re.IGNORECASE,
+)
+ACRONYM_STOPWORDS = {'and', 'of', 'the', 'for'}
+
+
+def _read_records(path):
+    """Rows of a listing file as dicts with lowercased keys, plus a file-level exchange"""
+    path = Path(path)
+    text = path.read_text(encoding='utf-8-sig')
+    if path.suffix.lower() == '.json':
+        data = json.loads(text)
+        exchange = None
+        if isinstance(data, dict):
+            exchange = data.get('exchange')
+            data = data.get('listings', [])
+        return [{str(k).strip().lower(): v for k, v in row.items()} for row in data], exchange
+
+    header = text.split('\n', 1)[0]
+    delimiter = '|' if '|' in header else ','
+    rows = []
+    for row in csv.DictReader(io.StringIO(text), delimiter=delimiter):
+        # NASDAQ Trader files end with a "File Creation Time: ..." line
+        if any(str(k).lower().startswith('file creation') for k in row.values() if k):
+            continue
+        rows.append({(k or '').strip().lower(): (v or '').strip() for k, v in row.items()})
+    return rows, None
+
+
+def _pick(record, columns):
+    for column in columns:
+        value = record.get(column)
+        if value:
+            return value
+    return None
+
+
+def listing_symbol(raw, exchange):
+    """Yahoo symbol for a listing symbol on `exchange`"""
+    symbol = str(raw).strip().upper()
+    suffix = LISTING_EXCHANGES[exchange]['suffix']
+    if suffix and symbol.endswith(suffix.upper()):
+        return symbol
+    # Share classes are dash separated on Yahoo (BRK.B, BT/A -> BRK-B, BT-A)
+    return re.sub(r'[./ ]+', '-', symbol).strip('-') + suffix
+
+
+def clean_name(name):
+    """Company name without trailing share-class descriptions"""
+    name = ' '.join(str(name or '').split())
+    return _SHARE_CLASS_RE.sub('', name) or name
+
+
+def listing_aliases(symbol, search_name, extra=None):
+    """Normalized aliases: listed ones plus the initials of long names (IBM)"""
+    if isinstance(extra, str):
+        extra = re.split(r'[;,]', extra)
+    aliases = [normalize_query(alias) for alias in extra or ()]
+
+    words = [word for word in search_name.split() if word not in ACRONYM_STOPWORDS]
+    if len(words) >= 3:
+        aliases.append(''.join(word[0] for word in words))
+
+    base = symbol.lower().split('.')[0]
+    excluded = {'', search_name, symbol.lower(), base}
+    return list(dict.fromkeys(alias for alias in aliases if alias not in excluded))
+
+
+def parse_listing(path, exchange=None):
+    """Unsaved Stock rows for a listing file; returns (stocks, skipped)"""
+    records, file_exchange = _read_records(path)
+    stocks = {}
+    skipped = 0
+
+    for record in records:
+        if str(record.get('test issue', '')).upper() == 'Y':
+            continue
+
+        row_exchange = exchange or file_exchange or record.get('exchange')
+        if not row_exchange and 'market category' in record:
+            # nasdaqlisted.txt has no exchange column; every row is on NASDAQ
+            row_exchange = 'NASDAQ'
+        row_exchange = EXCHANGE_CODES.get(row_exchange, row_exchange)
+        raw_symbol = _pick(record, SYMBOL_COLUMNS)
+        if row_exchange not in LISTING_EXCHANGES or not raw_symbol:
+            skipped += 1
+            continue
+
+        symbol = listing_symbol(raw_symbol, row_exchange)
+        if len(symbol) > SYMBOL_MAX_LENGTH:
+            logger.warning(f"Skipping {symbol}: longer than {SYMBOL_MAX_LENGTH} characters")
+            skipped += 1
+            continue
+
+        name = clean_name(_pick(record, NAME_COLUMNS)) or symbol
+        search_name = normalize_name(name)
+        status = str(record.get('status', '')).strip().lower()
+
+        # Later rows for the same symbol win
+        stocks[symbol] = Stock(
+            symbol=symbol,
+            name=name[:255],
+            exchange=row_exchange,
+            currency=LISTING_EXCHANGES[row_exchange]['currency'],
+            search_name=search_name[:255],
+            aliases=listing_aliases(symbol, search_name, _pick(record, ALIAS_COLUMNS)),
+            is_active=status not in INACTIVE_STATUSES,
+        )
+
+    return list(stocks.values()), skipped
+
+
+def import_listings(stocks, batch_size=SYMBOL_IMPORT_BATCH_SIZE, deactivate_missing=False):
+    """
+    Upsert listing rows into Stock in batches.
+
+    With `deactivate_missing`, active stocks of the imported exchanges that
+    were not in the listings are marked inactive (delisted). Returns counts of
+    created, updated and deactivated rows.
+    """
+    started = timezone.now()
+    symbols = [stock.symbol for stock in stocks]
+    existing = set()
+    for i in range(0, len(symbols), batch_size):
+        existing.update(
+            Stock.objects.filter(symbol__in=symbols[i:i + batch_size]).values_list('symbol', flat=True)
+        )
+
+    Stock.objects.bulk_create(
+        stocks,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['symbol'],
+        update_fields=UPSERT_FIELDS,
+    )
+
+    deactivated = 0
+    if deactivate_missing and stocks:
+        exchanges = {stock.exchange for stock in stocks}
+        # Every imported row was just written, so older rows were not listed
+        deactivated = Stock.objects.filter(
+            exchange__in=exchanges, is_active=True, last_updated__lt=started
+        ).update(is_active=False, last_updated=timezone.now())
+
+    # bulk_create and update bypass the Stock signals
+    if stocks or deactivated:
+        mark_symbols_changed()
+
+    counts = {
+        'created': len(symbols) - len(existing),
+        'updated': len(existing),
+        'deactivated': deactivated,
+    }
+    logger.info(f"Imported {len(symbols)} listings: {counts}")
+    return counts
@@ -0,0 +1,118 @@
+import numpy as np
+from django.core.cache import cache
+from apps.market.models import Stock, StockPrice
+from services.market_data.indicator_cache import price_fingerprint
+from utils.constants import CACHE_TIMEOUT_DAY, TRADING_DAYS_PER_YEAR
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WindowIndicatorCalculator:
+    """Arbitrary-window indicators served from cached prefix sums.
+
+    For every symbol we keep cumulative sums of close, close^2, daily return,
+    return^2 and volume. Any rolling window is then a subtraction of two
+    prefix values, so SMA(n), stddev(n), volatility(n) and average volume(n)
+    cost O(1) per point regardless of n.
+    """
+
+    INDICATORS = ('sma', 'stddev', 'volatility', 'volume_avg')
+
+    def _cache_key(self, symbol):
+        return f"prefix_sums_{symbol}"
+
+    def _build(self, rows, base=None):
+        """Build prefix arrays from `rows`, optionally continuing from `base`"""
+        timestamps = [row[0] for row in rows]
+        close = np.array([float(row[1]) for row in rows])
+        volume = np.array([float(row[2]) for row in rows])
+
+        if base is not None:
+            prev_close = np.concatenate(([base['close'][-1]], close[:-1]))
+        else:
+            prev_close = np.concatenate((close[:1], close[:-1]))
+        returns = np.where(prev_close > 0, close / prev_close - 1.0, 0.0)
+
+        def prefix(key, values):
+            if base is None:
+                return np.concatenate(([0.0], np.cumsum(values)))
+            return np.concatenate((base[key], base[key][-1] + np.cumsum(values)))
+
+        return {
+            'timestamps': (base['timestamps'] if base is not None else []) + timestamps,
+            'close': np.concatenate((base['close'], close)) if base is not None else close,
+            'sum_close': prefix('sum_close', close),
+            'sum_close_sq': prefix('sum_close_sq', close * close),
+            'sum_ret': prefix('sum_ret', returns),
+            'sum_ret_sq': prefix('sum_ret_sq', returns * returns),
+            'sum_volume': prefix('sum_volume', volume),
+        }
+
+    def get_prefix_sums(self, symbol):
+        """Return cached prefix arrays for a symbol, rebuilding when stale"""
+        stock = Stock.objects.get(symbol=symbol)
+        latest, count = price_fingerprint(stock)
+        if not count:
+            return None
+
+        key = self._cache_key(symbol)
+        cached = cache.get(key)
+        if cached and cached['latest'] == latest and cached['count'] == count:
+            return cached
+
+        values = StockPrice.objects.filter(stock=stock).order_by('timestamp')
+        fields = ('timestamp', 'close', 'volume')
+
+        data = None
+        if cached and cached['count'] < count:
+            # Append-only growth: extend the existing prefix arrays
+            new_rows = list(values.filter(timestamp__gt=cached['latest']).values_list(*fields))
+            if cached['count'] + len(new_rows) == count:
+                data = self._build(new_rows, base=cached)
+
+        if data is None:
+            data = self._build(list(values.values_list(*fields)))
+
+        data['latest'] = latest
+        data['count'] = count
+        cache.set(key, data, CACHE_TIMEOUT_DAY)
+        return data
+
+    def calculate(self, symbol, indicator, window, limit=200):
+        """Compute `indicator` over `window` bars for the latest `limit` points"""
+        if indicator not in self.INDICATORS:
+            raise ValueError(f"Unsupported indicator '{indicator}'")
+        if window < 1:
+            raise ValueError("Window must be a positive integer")
+
+        data = self.get_prefix_sums(symbol)
+        if not data or len(data['close']) < window:
+            return []
+
+        n = len(data['close'])
+        # Window ending at bar i (inclusive) spans prefix indices [i + 1 - window, i + 1)
+        end = np.arange(max(window, n - limit + 1), n + 1)
+        start = end - window
+
+        def window_sum(key):
+            arr = data[key]
+            return arr[end] - arr[start]
+
+        if indicator == 'sma':
+            values = window_sum('sum_close') / window
+        elif indicator == 'volume_avg':
+            values = window_sum('sum_volume') / window
+        elif indicator == 'stddev':
+            mean = window_sum('sum_close') / window
+            values = np.sqrt(np.clip(window_sum('sum_close_sq') / window - mean * mean, 0.0, None))
+        else:
+            mean = window_sum('sum_ret') / window
+            var = np.clip(window_sum('sum_ret_sq') / window - mean * mean, 0.0, None)
+            values = np.sqrt(var) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+        timestamps = data['timestamps']
+        return [
+            {'date': timestamps[i - 1].isoformat(), 'value': float(v)}
+            for i, v in zip(end, values)
+        ]
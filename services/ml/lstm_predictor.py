@@ -10,6 +10,9 @@ class LSTMPredictor:
     trending curve instead of a flat line.
     """
 
+    # Part of the prediction cache key; bump when the forecast logic changes
+    version = 'drift-1'
+
     def __init__(self):
         pass
 
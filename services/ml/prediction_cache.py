@@ -0,0 +1,139 @@
+"""
+Content-addressed cache of AI price forecasts.
+
+A forecast is a pure function of the model version, the horizon and the
+input series, so it is cached under a key built from exactly those (plus
+the symbol and its currency, which only affect presentation). The input is
+identified either by a hash of the posted close series or, for history read
+from the database, by its row count and last bar timestamp, so a repeat
+request is answered before any history is loaded or fetched.
+
+Identical requests arriving together share one computation: the first takes
+a short cache lock and computes, the rest poll for its result. A computation
+that finds too little history leaves a short-lived marker, so waiting and
+repeated requests fail with InsufficientHistory straight away.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from services.ml.lstm_predictor import LSTMPredictor
+from utils.constants import (
+    AI_PREDICTION_CACHE_TIMEOUT, AI_PREDICTION_INSUFFICIENT_TIMEOUT, AI_PREDICTION_LOCK_TIMEOUT,
+    AI_PREDICTION_WAIT_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.05
+
+
+class InsufficientHistory(Exception):
+    """Raised by a forecast computation when the input series is too short"""
+
+    def __init__(self, count):
+        super().__init__(f'{count} historical price points')
+        self.count = count
+
+
+def series_fingerprint(df):
+    """Hash of the close series a forecast is computed from"""
+    closes = pd.Series(df['close'] if 'close' in df else [], dtype='float64').to_numpy()
+    return 'sha1-' + hashlib.sha1(np.ascontiguousarray(closes).tobytes()).hexdigest()
+
+
+def stored_series_fingerprint(price_rows):
+    """Identity of price rows read from the database: count and last bar time"""
+    if not price_rows:
+        return 'db-0'
+    return f"db-{len(price_rows)}-{price_rows[-1]['timestamp'].isoformat()}"
+
+
+def prediction_key(symbol, source, steps, currency):
+    return f"ai_prediction:{LSTMPredictor.version}:{symbol}:{steps}:{currency}:{source}"
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _insufficient_key(key):
+    return f"{key}:insufficient"
+
+
+def _cached(entries, key):
+    """Cached result from a get_many of the result and marker keys"""
+    count = entries.get(_insufficient_key(key))
+    if count is not None:
+        raise InsufficientHistory(count)
+    return entries.get(key)
+
+
+def cached_prediction(key, compute):
+    """
+    Cached result of `compute()` under `key`, computed by at most one
+    request at a time. Results of None are not cached; exceptions propagate
+    (InsufficientHistory also to the requests waiting for the same key).
+    """
+    keys = [key, _insufficient_key(key)]
+    data = _cached(cache.get_many(keys), key)
+    if data is not None:
+        return data
+
+    deadline = time.monotonic() + AI_PREDICTION_WAIT_TIMEOUT
+    owner = cache.add(_lock_key(key), True, AI_PREDICTION_LOCK_TIMEOUT)
+    while not owner and time.monotonic() < deadline:
+        # Another request is computing the same forecast; wait for its result
+        time.sleep(POLL_INTERVAL)
+        data = _cached(cache.get_many(keys), key)
+        if data is not None:
+            return data
+        owner = cache.add(_lock_key(key), True, AI_PREDICTION_LOCK_TIMEOUT)
+
+    if not owner:
+        logger.warning(f"Timed out waiting for prediction {key}; computing it again")
+    try:
+        data = compute()
+        if data is not None:
+            cache.set(key, data, AI_PREDICTION_CACHE_TIMEOUT)
+        return data
+    except InsufficientHistory as e:
+        cache.set(_insufficient_key(key), e.count, AI_PREDICTION_INSUFFICIENT_TIMEOUT)
+        raise
+    finally:
+        if owner:
+            cache.delete(_lock_key(key))
+
+
+async def acached_prediction(key, compute):
+    """cached_prediction for async views; `compute` is a coroutine function"""
+    keys = [key, _insufficient_key(key)]
+    data = _cached(await cache.aget_many(keys), key)
+    if data is not None:
+        return data
+
+    deadline = time.monotonic() + AI_PREDICTION_WAIT_TIMEOUT
+    owner = await cache.aadd(_lock_key(key), True, AI_PREDICTION_LOCK_TIMEOUT)
+    while not owner and time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        data = _cached(await cache.aget_many(keys), key)
+        if data is not None:
+            return data
+        owner = await cache.aadd(_lock_key(key), True, AI_PREDICTION_LOCK_TIMEOUT)
+
+    if not owner:
+        logger.warning(f"Timed out waiting for prediction {key}; computing it again")
+    try:
+        data = await compute()
+        if data is not None:
+            await cache.aset(key, data, AI_PREDICTION_CACHE_TIMEOUT)
+        return data
+    except InsufficientHistory as e:
+        await cache.aset(_insufficient_key(key), e.count, AI_PREDICTION_INSUFFICIENT_TIMEOUT)
+        raise
+    finally:
+        if owner:
+            await cache.adelete(_lock_key(key))
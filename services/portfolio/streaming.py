@@ -0,0 +1,366 @@
+"""
+Real-time portfolio P&L for WebSocket subscribers.
+
+When a user subscribes, their holdings are valued once from the database
+(the same one-query valuation the summary endpoint uses) and cached as
+per-symbol positions plus per-currency totals, and the user is added to a
+holders set of every symbol they hold.
+
+Each ingested quote then touches only the users holding that symbol: the
+position's value is replaced and the currency bucket is adjusted by the
+difference, and a compact delta is pushed to the user's `portfolio_<id>`
+group. Nothing is recomputed across the portfolio and the database is not
+read per tick. Holding changes reload the cached positions of subscribed
+users.
+
+Each subscribed connection is registered under its user; the cached state
+expires unless a live connection renews it, and is dropped (with the user's
+holder entries) when the last connection unsubscribes.
+
+Positions live in Redis hashes, revalued by a Lua script so the read of a
+position and the writes to it and its currency bucket are one atomic step;
+without Redis they are kept in the Django cache.
+"""
+import json
+import logging
+from django.core.cache import cache
+from apps.portfolio.models import PortfolioHolding
+from services.portfolio.valuation import value_holdings, currency_breakdown
+from utils.constants import PORTFOLIO_STREAM_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'stockmind:portfolio'
+
+# Revalues the position of ARGV[1] at price ARGV[2] for each (positions,
+# totals) key pair. Replies per pair: '' when the position is gone, '=' when
+# the price is unchanged, else the JSON of the position and its bucket.
+APPLY_QUOTE_SCRIPT = """
+local symbol, price = ARGV[1], tonumber(ARGV[2])
+local replies = {}
+for i = 1, #KEYS, 2 do
+    local raw = redis.call('HGET', KEYS[i], symbol)
+    if not raw then
+        replies[#replies + 1] = ''
+    else
+        local position = cjson.decode(raw)
+        if position.price == price then
+            replies[#replies + 1] = '='
+        else
+            local difference = position.shares * price - position.value
+            position.price = price
+            position.value = position.value + difference
+            redis.call('HSET', KEYS[i], symbol, cjson.encode(position))
+            local bucket = position.currency .. ':'
+            local value = redis.call('HINCRBYFLOAT', KEYS[i + 1], bucket .. 'value', difference)
+            local totals = redis.call('HMGET', KEYS[i + 1], bucket .. 'cost', bucket .. 'holdings')
+            replies[#replies + 1] = cjson.encode({
+                position = position, value = value, cost = totals[1], holdings = totals[2]
+            })
+        end
+    end
+end
+return replies
+"""
+
+
+def _holders_key(symbol):
+    return f'{KEY_PREFIX}:holders:{symbol}'
+
+
+def _positions_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}:positions'
+
+
+def _totals_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}:totals'
+
+
+def _channels_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}:channels'
+
+
+def _percent(profit_loss, cost):
+    return round(profit_loss / cost * 100, 2) if cost > 0 else 0
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class PortfolioStream:
+    """Cached per-user positions, revalued one symbol at a time"""
+
+    def __init__(self):
+        try:
+            from django_redis import get_redis_connection
+            self.redis = get_redis_connection('default')
+            self._apply_script = self.redis.register_script(APPLY_QUOTE_SCRIPT)
+        except Exception:
+            self.redis = None
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+    def subscribe(self, user_id, channel_name):
+        """Register a streaming connection of the user and return a fresh snapshot"""
+        user_id = str(user_id)
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.sadd(_channels_key(user_id), channel_name)
+            pipe.expire(_channels_key(user_id), PORTFOLIO_STREAM_TIMEOUT)
+            pipe.execute()
+        else:
+            channels = cache.get(_channels_key(user_id)) or set()
+            channels.add(channel_name)
+            cache.set(_channels_key(user_id), channels, PORTFOLIO_STREAM_TIMEOUT)
+        return self.load(user_id)
+
+    def unsubscribe(self, user_id, channel_name):
+        """Drop a streaming connection; the last one unloads the user's positions"""
+        user_id = str(user_id)
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.srem(_channels_key(user_id), channel_name)
+            pipe.scard(_channels_key(user_id))
+            remaining = pipe.execute()[1]
+        else:
+            channels = (cache.get(_channels_key(user_id)) or set()) - {channel_name}
+            remaining = len(channels)
+            if channels:
+                cache.set(_channels_key(user_id), channels, PORTFOLIO_STREAM_TIMEOUT)
+        if not remaining:
+            self.unload(user_id)
+
+    def renew(self, user_id):
+        """
+        Extend the cached state of a user who is still streaming, reloading
+        the positions if they expired anyway. Returns False once nothing
+        is subscribed.
+        """
+        user_id = str(user_id)
+        symbols = self._symbols(user_id)
+        if self.redis is not None:
+            if not self.redis.expire(_channels_key(user_id), PORTFOLIO_STREAM_TIMEOUT):
+                return False
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.expire(_positions_key(user_id), PORTFOLIO_STREAM_TIMEOUT)
+            pipe.expire(_totals_key(user_id), PORTFOLIO_STREAM_TIMEOUT)
+            for symbol in symbols:
+                pipe.expire(_holders_key(symbol), PORTFOLIO_STREAM_TIMEOUT)
+            loaded = pipe.execute()[0]
+        else:
+            if not cache.touch(_channels_key(user_id), PORTFOLIO_STREAM_TIMEOUT):
+                return False
+            loaded = cache.touch(_positions_key(user_id), PORTFOLIO_STREAM_TIMEOUT)
+            for symbol in symbols:
+                cache.touch(_holders_key(symbol), PORTFOLIO_STREAM_TIMEOUT)
+        if not loaded:
+            self.load(user_id)
+        return True
+
+    def unload(self, user_id):
+        """Stop streaming to a user: drop the cached positions and holder entries"""
+        user_id = str(user_id)
+        symbols = self._symbols(user_id)
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            for symbol in symbols:
+                pipe.srem(_holders_key(symbol), user_id)
+            pipe.delete(_positions_key(user_id), _totals_key(user_id), _channels_key(user_id))
+            pipe.execute()
+        else:
+            for symbol in symbols:
+                holders = cache.get(_holders_key(symbol)) or set()
+                holders.discard(user_id)
+                cache.set(_holders_key(symbol), holders, PORTFOLIO_STREAM_TIMEOUT)
+            cache.delete_many([_positions_key(user_id), _channels_key(user_id)])
+        logger.debug(f"Unloaded streaming positions of user {user_id}")
+
+    # ------------------------------------------------------------------
+    # Positions
+    # ------------------------------------------------------------------
+    def load(self, user_id):
+        """Value the user's holdings, cache them as positions and return a snapshot"""
+        user_id = str(user_id)
+        holdings = list(PortfolioHolding.objects.filter(user_id=user_id).select_related('stock'))
+        valuations = value_holdings(holdings)
+
+        positions = {}
+        totals = {}
+        for holding in holdings:
+            valuation = valuations[holding.pk]
+            currency = holding.stock.currency or 'USD'
+            position = {
+                'holdingId': str(holding.pk),
+                'currency': currency,
+                'shares': float(holding.shares),
+                'cost': float(valuation['total_cost']),
+                'price': float(valuation['price']) if valuation['price'] is not None else None,
+                'value': float(valuation['current_value']),
+            }
+            positions[holding.stock_id] = position
+            bucket = totals.setdefault(currency, {'value': 0.0, 'cost': 0.0, 'holdings': 0})
+            bucket['value'] += position['value']
+            bucket['cost'] += position['cost']
+            bucket['holdings'] += 1
+
+        previous = self._symbols(user_id)
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.delete(_positions_key(user_id), _totals_key(user_id))
+            for symbol in previous - set(positions):
+                pipe.srem(_holders_key(symbol), user_id)
+            if positions:
+                pipe.hset(_positions_key(user_id), mapping={s: json.dumps(p) for s, p in positions.items()})
+                pipe.hset(_totals_key(user_id), mapping={
+                    f'{currency}:{field}': amount
+                    for currency, bucket in totals.items() for field, amount in bucket.items()
+                })
+                pipe.expire(_positions_key(user_id), PORTFOLIO_STREAM_TIMEOUT)
+                pipe.expire(_totals_key(user_id), PORTFOLIO_STREAM_TIMEOUT)
+            for symbol in positions:
+                pipe.sadd(_holders_key(symbol), user_id)
+                pipe.expire(_holders_key(symbol), PORTFOLIO_STREAM_TIMEOUT)
+            pipe.execute()
+        else:
+            cache.set(_positions_key(user_id), {'positions': positions, 'totals': totals}, PORTFOLIO_STREAM_TIMEOUT)
+            for symbol in previous | set(positions):
+                holders = cache.get(_holders_key(symbol)) or set()
+                if symbol in positions:
+                    holders.add(user_id)
+                else:
+                    holders.discard(user_id)
+                cache.set(_holders_key(symbol), holders, PORTFOLIO_STREAM_TIMEOUT)
+
+        logger.debug(f"Loaded {len(positions)} streaming positions for user {user_id}")
+        return {
+            'totalHoldings': len(holdings),
+            'holdings': [self._position_data(symbol, p) for symbol, p in positions.items()],
+            'currencyBreakdown': currency_breakdown(holdings, valuations),
+        }
+
+    def refresh(self, user_id):
+        """Reload the positions of a user who is streaming (after a holding change)"""
+        user_id = str(user_id)
+        if self.redis is not None:
+            streaming = self.redis.exists(_channels_key(user_id))
+        else:
+            streaming = cache.get(_channels_key(user_id)) is not None
+        if streaming:
+            self.load(user_id)
+
+    def _symbols(self, user_id):
+        if self.redis is not None:
+            return {_decode(symbol) for symbol in self.redis.hkeys(_positions_key(user_id))}
+        return set((cache.get(_positions_key(user_id)) or {}).get('positions', {}))
+
+    @staticmethod
+    def _position_data(symbol, position):
+        profit_loss = position['value'] - position['cost']
+        return {
+            'symbol': symbol,
+            'holdingId': position['holdingId'],
+            'currency': position['currency'],
+            'price': position['price'],
+            'value': round(position['value'], 2),
+            'profitLoss': round(profit_loss, 2),
+            'profitLossPercent': _percent(profit_loss, position['cost']),
+        }
+
+    @staticmethod
+    def _bucket_data(currency, value, cost, holdings):
+        return {
+            'currency': currency,
+            'totalValue': round(value, 2),
+            'totalCost': round(cost, 2),
+            'profitLoss': round(value - cost, 2),
+            'profitLossPercent': _percent(value - cost, cost),
+            'holdings': int(holdings),
+        }
+
+    # ------------------------------------------------------------------
+    # Ticks
+    # ------------------------------------------------------------------
+    def apply_quote(self, symbol, price):
+        """Revalue `symbol` for every streaming holder and push the deltas"""
+        if not price:
+            return 0
+        price = float(price)
+        try:
+            if self.redis is not None:
+                deltas = self._apply_redis(symbol, price)
+            else:
+                deltas = self._apply_cache(symbol, price)
+        except Exception as e:
+            logger.error(f"Error updating streaming portfolios for {symbol}: {e}")
+            return 0
+
+        if deltas:
+            from services.websocket.broadcaster import broadcast_portfolio_delta
+            for user_id, delta in deltas:
+                broadcast_portfolio_delta(user_id, delta)
+        return len(deltas)
+
+    def _apply_redis(self, symbol, price):
+        users = [_decode(user_id) for user_id in self.redis.smembers(_holders_key(symbol))]
+        if not users:
+            return []
+
+        keys = [key for user_id in users for key in (_positions_key(user_id), _totals_key(user_id))]
+        replies = self._apply_script(keys=keys, args=[symbol, repr(price)])
+
+        deltas = []
+        stale = []
+        for user_id, reply in zip(users, replies):
+            reply = _decode(reply)
+            if reply == '':
+                # Positions expired or the holding was sold
+                stale.append(user_id)
+            elif reply != '=':
+                result = json.loads(reply)
+                position = result['position']
+                deltas.append((user_id, {
+                    **self._position_data(symbol, position),
+                    'totals': self._bucket_data(
+                        position['currency'], float(result['value']), float(result['cost']), result['holdings']
+                    ),
+                }))
+        if stale:
+            self.redis.srem(_holders_key(symbol), *stale)
+        return deltas
+
+    def _apply_cache(self, symbol, price):
+        holders = cache.get(_holders_key(symbol)) or set()
+        if not holders:
+            return []
+
+        states = cache.get_many([_positions_key(user_id) for user_id in holders])
+        deltas = []
+        updated = {}
+        stale = set()
+        for user_id in holders:
+            state = states.get(_positions_key(user_id))
+            position = state and state['positions'].get(symbol)
+            if position is None:
+                # Positions expired or the holding was sold
+                stale.add(user_id)
+                continue
+            if position['price'] == price:
+                continue
+            difference = position['shares'] * price - position['value']
+            position['price'] = price
+            position['value'] += difference
+            bucket = state['totals'][position['currency']]
+            bucket['value'] += difference
+            updated[_positions_key(user_id)] = state
+            deltas.append((user_id, {
+                **self._position_data(symbol, position),
+                'totals': self._bucket_data(position['currency'], bucket['value'], bucket['cost'], bucket['holdings']),
+            }))
+
+        if updated:
+            cache.set_many(updated, PORTFOLIO_STREAM_TIMEOUT)
+        if stale:
+            cache.set(_holders_key(symbol), holders - stale, PORTFOLIO_STREAM_TIMEOUT)
+        return deltas
@@ -0,0 +1,74 @@
+"""
+Valuation of portfolio holdings and watchlist items from stored prices.
+
+The latest close of every symbol involved is read in one query (a LIMIT 1
+subquery per stock on the (stock, timestamp) index), and value, P&L and
+percentages of all holdings are computed in one pass over that map, so a
+portfolio costs the same number of queries however many holdings it has.
+"""
+from decimal import Decimal
+from django.db.models import OuterRef, Subquery
+from apps.market.models import Stock, StockPrice
+
+
+def latest_closes(symbols):
+    """{symbol: latest close} for symbols with stored prices, in one query"""
+    symbols = set(symbols)
+    if not symbols:
+        return {}
+    latest = StockPrice.objects.filter(stock=OuterRef('pk')).order_by('-timestamp').values('close')[:1]
+    rows = (
+        Stock.objects
+        .filter(symbol__in=symbols)
+        .annotate(latest_close=Subquery(latest))
+        .values_list('symbol', 'latest_close')
+    )
+    return {symbol: close for symbol, close in rows if close is not None}
+
+
+def value_holding(holding, close):
+    """Cost, value and P&L of a holding at `close` (at cost when there is no price)"""
+    total_cost = holding.shares * holding.average_price
+    current_value = holding.shares * close if close is not None else total_cost
+    profit_loss = current_value - total_cost
+    return {
+        'price': close,
+        'total_cost': total_cost,
+        'current_value': current_value,
+        'profit_loss': profit_loss,
+        'profit_loss_percent': (profit_loss / total_cost * 100) if total_cost > 0 else Decimal('0'),
+    }
+
+
+def value_holdings(holdings):
+    """{holding id: valuation} for all holdings from one price query"""
+    closes = latest_closes(holding.stock_id for holding in holdings)
+    return {holding.pk: value_holding(holding, closes.get(holding.stock_id)) for holding in holdings}
+
+
+def currency_breakdown(holdings, valuations):
+    """Portfolio totals per currency from precomputed valuations"""
+    breakdown = {}
+    for holding in holdings:
+        currency = holding.stock.currency or 'USD'
+        valuation = valuations[holding.pk]
+        bucket = breakdown.setdefault(currency, {
+            'currency': currency,
+            'totalValue': 0,
+            'totalCost': 0,
+            'profitLoss': 0,
+            'profitLossPercent': 0,
+            'holdings': 0
+        })
+        bucket['totalValue'] += float(valuation['current_value'])
+        bucket['totalCost'] += float(valuation['total_cost'])
+        bucket['profitLoss'] += float(valuation['profit_loss'])
+        bucket['holdings'] += 1
+
+    for bucket in breakdown.values():
+        if bucket['totalCost'] > 0:
+            bucket['profitLossPercent'] = round(bucket['profitLoss'] / bucket['totalCost'] * 100, 2)
+        bucket['totalValue'] = round(bucket['totalValue'], 2)
+        bucket['totalCost'] = round(bucket['totalCost'], 2)
+        bucket['profitLoss'] = round(bucket['profitLoss'], 2)
+    return list(breakdown.values())
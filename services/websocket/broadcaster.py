@@ -144,4 +144,74 @@ def broadcast_news_update(symbol, article_data):
         )
         logger.debug(f"Broadcast news update for {symbol}")
     except Exception as e:
-        logger.error(f"Error broadcasting news update: {e}")
\ No newline at end of file
+        logger.error(f"Error broadcasting news update: {e}")
+
+def broadcast_scanner_delta(timeframe, delta):
+    """
+    Broadcast the changes between two scanner runs
+
+    Args:
+        timeframe: Scanner timeframe (daily, weekly, monthly)
+        delta: Dict from scan_snapshot.diff_snapshots
+    """
+    channel_layer = get_channel_layer()
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f"scanner_{timeframe}",
+            {
+                'type': 'scanner_delta',
+                'data': delta
+            }
+        )
+        logger.debug(f"Broadcast scanner delta for {timeframe}")
+    except Exception as e:
+        logger.error(f"Error broadcasting scanner delta: {e}")
+
+def broadcast_price_alert(user_id, alert):
+    """
+    Notify a user that one of their watchlist price alerts fired
+
+    Args:
+        user_id: Owner of the watchlist item
+        alert: Dict from PriceAlertEngine.evaluate
+    """
+    channel_layer = get_channel_layer()
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f"user_{user_id}",
+            {
+                'type': 'price_alert',
+                'data': {
+                    'watchlistId': alert['watchlistId'],
+                    'symbol': alert['symbol'],
+                    'direction': alert['direction'],
+                    'threshold': alert['threshold'],
+                    'price': alert['price'],
+                    'timestamp': alert['timestamp'],
+                }
+            }
+        )
+        logger.debug(f"Broadcast price alert for {alert['symbol']} to user {user_id}")
+    except Exception as e:
+        logger.error(f"Error broadcasting price alert: {e}")
+
+def broadcast_portfolio_delta(user_id, delta):
+    """
+    Send a user the revalued holding and currency totals after a quote
+
+    Args:
+        user_id: Owner of the holding
+        delta: Dict from PortfolioStream.apply_quote
+    """
+    channel_layer = get_channel_layer()
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f"portfolio_{user_id}",
+            {
+                'type': 'portfolio_delta',
+                'data': delta
+            }
+        )
+        logger.debug(f"Broadcast portfolio delta for {delta['symbol']} to user {user_id}")
+    except Exception as e:
+        logger.error(f"Error broadcasting portfolio delta: {e}")
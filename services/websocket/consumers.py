@@ -1,11 +1,16 @@
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.core.cache import cache
+from services.portfolio.streaming import PortfolioStream
+from utils.constants import PORTFOLIO_STREAM_RENEW_INTERVAL
 import logging
 
 logger = logging.getLogger(__name__)
 
+SCANNER_TIMEFRAMES = ('daily', 'weekly', 'monthly')
+
 class MarketConsumer(AsyncWebsocketConsumer):
     """WebSocket consumer for real-time market data"""
     
@@ -14,8 +19,17 @@ class MarketConsumer(AsyncWebsocketConsumer):
         # Accept the connection
         await self.accept()
         
-        # Initialize subscribed symbols set
+        # Initialize subscribed symbols and scanner timeframes
         self.subscribed_symbols = set()
+        self.scanner_timeframes = set()
+        self.portfolio_group = None
+        self.portfolio_renewal = None
+        
+        # Authenticated users receive their own notifications (price alerts)
+        user = self.scope.get('user')
+        self.user_group = f"user_{user.id}" if user is not None and user.is_authenticated else None
+        if self.user_group:
+            await self.channel_layer.group_add(self.user_group, self.channel_name)
         
         logger.info(f"WebSocket connected: {self.channel_name}")
     
@@ -27,6 +41,15 @@ class MarketConsumer(AsyncWebsocketConsumer):
                 f"stock_{symbol}",
                 self.channel_name
             )
+        for timeframe in self.scanner_timeframes:
+            await self.channel_layer.group_discard(
+                f"scanner_{timeframe}",
+                self.channel_name
+            )
+        if getattr(self, 'user_group', None):
+            await self.channel_layer.group_discard(self.user_group, self.channel_name)
+        if getattr(self, 'portfolio_group', None):
+            await self._leave_portfolio()
         
         logger.info(f"WebSocket disconnected: {self.channel_name} (code: {close_code})")
     
@@ -35,10 +58,35 @@ class MarketConsumer(AsyncWebsocketConsumer):
         Receive message from WebSocket
         Expected format: {"type": "subscribe", "symbol": "AAPL"}
                         {"type": "unsubscribe", "symbol": "AAPL"}
+                        {"type": "subscribe_scanner", "timeframe": "daily"}
+                        {"type": "unsubscribe_scanner", "timeframe": "daily"}
+                        {"type": "subscribe_portfolio"}
+                        {"type": "unsubscribe_portfolio"}
         """
         try:
             data = json.loads(text_data)
             action = data.get('type')
+            
+            if action in ('subscribe_scanner', 'unsubscribe_scanner'):
+                timeframe = data.get('timeframe', 'daily')
+                if timeframe not in SCANNER_TIMEFRAMES:
+                    await self.send(text_data=json.dumps({
+                        'type': 'error',
+                        'message': 'Invalid scanner timeframe'
+                    }))
+                elif action == 'subscribe_scanner':
+                    await self.subscribe_to_scanner(timeframe)
+                else:
+                    await self.unsubscribe_from_scanner(timeframe)
+                return
+            
+            if action == 'subscribe_portfolio':
+                await self.subscribe_to_portfolio()
+                return
+            if action == 'unsubscribe_portfolio':
+                await self.unsubscribe_from_portfolio()
+                return
+            
             symbol = data.get('symbol', '').upper()
             
             if not symbol:
@@ -125,6 +173,93 @@ class MarketConsumer(AsyncWebsocketConsumer):
         
         logger.info(f"Client {self.channel_name} unsubscribed from {symbol}")
     
+    async def subscribe_to_scanner(self, timeframe):
+        """Subscribe to scanner deltas for a timeframe"""
+        await self.channel_layer.group_add(
+            f"scanner_{timeframe}",
+            self.channel_name
+        )
+        self.scanner_timeframes.add(timeframe)
+        
+        await self.send(text_data=json.dumps({
+            'type': 'scanner_subscribed',
+            'timeframe': timeframe,
+            'message': f'Subscribed to {timeframe} scanner'
+        }))
+        
+        logger.info(f"Client {self.channel_name} subscribed to {timeframe} scanner")
+    
+    async def unsubscribe_from_scanner(self, timeframe):
+        """Unsubscribe from scanner deltas"""
+        await self.channel_layer.group_discard(
+            f"scanner_{timeframe}",
+            self.channel_name
+        )
+        self.scanner_timeframes.discard(timeframe)
+        
+        await self.send(text_data=json.dumps({
+            'type': 'scanner_unsubscribed',
+            'timeframe': timeframe,
+            'message': f'Unsubscribed from {timeframe} scanner'
+        }))
+        
+        logger.info(f"Client {self.channel_name} unsubscribed from {timeframe} scanner")
+    
+    async def subscribe_to_portfolio(self):
+        """Stream P&L of the user's holdings; sends a snapshot, then deltas"""
+        if not self.user_group:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Authentication required for portfolio updates'
+            }))
+            return
+        
+        user = self.scope['user']
+        if not self.portfolio_group:
+            self.portfolio_group = f"portfolio_{user.id}"
+            await self.channel_layer.group_add(self.portfolio_group, self.channel_name)
+            self.portfolio_renewal = asyncio.ensure_future(self._renew_portfolio(user.id))
+        
+        # Cache the positions quotes are applied to and send their current values
+        snapshot = await database_sync_to_async(PortfolioStream().subscribe)(user.id, self.channel_name)
+        await self.send(text_data=json.dumps({
+            'type': 'portfolio_snapshot',
+            'data': snapshot
+        }))
+        
+        logger.info(f"Client {self.channel_name} subscribed to portfolio of user {user.id}")
+    
+    async def unsubscribe_from_portfolio(self):
+        """Stop streaming portfolio P&L"""
+        if self.portfolio_group:
+            await self._leave_portfolio()
+        
+        await self.send(text_data=json.dumps({
+            'type': 'portfolio_unsubscribed',
+            'message': 'Unsubscribed from portfolio'
+        }))
+    
+    async def _leave_portfolio(self):
+        """Leave the portfolio group and release this connection's cached positions"""
+        await self.channel_layer.group_discard(self.portfolio_group, self.channel_name)
+        self.portfolio_group = None
+        if self.portfolio_renewal:
+            self.portfolio_renewal.cancel()
+            self.portfolio_renewal = None
+        try:
+            await database_sync_to_async(PortfolioStream().unsubscribe)(self.scope['user'].id, self.channel_name)
+        except Exception as e:
+            logger.error(f"Error releasing streaming positions of {self.channel_name}: {e}")
+    
+    async def _renew_portfolio(self, user_id):
+        """Keep the cached positions of a long-lived subscription from expiring"""
+        while True:
+            await asyncio.sleep(PORTFOLIO_STREAM_RENEW_INTERVAL)
+            try:
+                await database_sync_to_async(PortfolioStream().renew)(user_id)
+            except Exception as e:
+                logger.error(f"Error renewing streaming positions of user {user_id}: {e}")
+    
     # Event handlers (called when messages are sent to group)
     
     async def stock_update(self, event):
@@ -171,4 +306,30 @@ class MarketConsumer(AsyncWebsocketConsumer):
             'type': 'news_update',
             'data': data
         }))
-
+    
+    async def scanner_delta(self, event):
+        """Send scanner run delta to WebSocket"""
+        data = event['data']
+        
+        await self.send(text_data=json.dumps({
+            'type': 'scanner_delta',
+            'data': data
+        }))
+    
+    async def price_alert(self, event):
+        """Send a fired watchlist price alert to WebSocket"""
+        data = event['data']
+        
+        await self.send(text_data=json.dumps({
+            'type': 'price_alert',
+            'data': data
+        }))
+    
+    async def portfolio_delta(self, event):
+        """Send a revalued holding and its currency totals to WebSocket"""
+        data = event['data']
+        
+        await self.send(text_data=json.dumps({
+            'type': 'portfolio_delta',
+            'data': data
+        }))
@@ -2,7 +2,7 @@ from celery import shared_task
 from celery.utils.log import get_task_logger
 from datetime import timedelta
 from django.utils import timezone
-from apps.market.models import StockPrice, MarketScanResult, Sentiment
+from apps.market.models import StockPrice, MarketScanResult, ScanRun, Sentiment
 from apps.authentication.models import RefreshToken
 
 logger = get_task_logger(__name__)
@@ -23,6 +23,7 @@ def cleanup_old_data():
         old_scans = MarketScanResult.objects.filter(timestamp__lt=ninety_days_ago)
         scans_count = old_scans.count()
         old_scans.delete()
+        ScanRun.objects.filter(started_at__lt=ninety_days_ago).delete()
         logger.info(f"Deleted {scans_count} old scan results")
         
         # Delete sentiments older than 90 days
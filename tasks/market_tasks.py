@@ -3,8 +3,15 @@ from celery.utils.log import get_task_logger
 from apps.market.models import Stock, StockPrice
 from services.market_data.fetcher import MarketDataFetcher
 from services.market_data.indicators import TechnicalIndicatorCalculator
+from services.market_data.indicator_cache import (
+    bulk_price_fingerprints, cached_indicators, unchanged_symbols
+)
+from services.market_data.live_scanner import LiveMarketScanner
+from services.market_data.price_alerts import PriceAlertEngine
+from services.portfolio.streaming import PortfolioStream
 from services.streaming.kafka_producer import StockDataProducer
 from django.core.cache import cache
+from utils.metrics import set_gauge
 from services.websocket.broadcaster import (
     broadcast_stock_update,
     broadcast_indicator_update
@@ -24,6 +31,9 @@ def fetch_market_data(self, symbols=None):
         
         fetcher = MarketDataFetcher()
         producer = StockDataProducer()
+        live_scanner = LiveMarketScanner()
+        alert_engine = PriceAlertEngine()
+        portfolio_stream = PortfolioStream()
         
         for symbol in symbols:
             try:
@@ -43,6 +53,15 @@ def fetch_market_data(self, symbols=None):
                     # Broadcast via WebSocket
                     broadcast_stock_update(symbol, quote)
 
+                    # Update intraday scanner leaderboards
+                    live_scanner.update(symbol, quote)
+
+                    # Fire watchlist price alerts the new price crosses
+                    alert_engine.evaluate(symbol, quote.get('price'))
+
+                    # Push P&L deltas to users streaming a portfolio holding it
+                    portfolio_stream.apply_quote(symbol, quote.get('price'))
+
                     logger.info(f"Fetched data for {symbol}")
                 
             except Exception as e:
@@ -58,15 +77,36 @@ def fetch_market_data(self, symbols=None):
 
 @shared_task(bind=True)
 def calculate_technical_indicators(self):
-    """Calculate technical indicators for all active stocks"""
+    """Calculate technical indicators for active stocks whose price history changed"""
     try:
-        symbols = Stock.objects.filter(is_active=True).values_list('symbol', flat=True)
+        symbols = list(Stock.objects.filter(is_active=True).values_list('symbol', flat=True))
         calculator = TechnicalIndicatorCalculator()
-        
+
+        # One grouped query + one cache read decide which symbols have new bars
+        fingerprints = bulk_price_fingerprints(symbols)
+        unchanged = unchanged_symbols(fingerprints)
+        stale = [s for s in symbols if s in fingerprints and s not in unchanged]
+        skipped_count = len(symbols) - len(stale)
+
+        skip_ratio = skipped_count / len(symbols) if symbols else 0.0
+        set_gauge(
+            'indicator_calc_skip_ratio', skip_ratio,
+            'Share of active symbols skipped because their price history was unchanged'
+        )
+
+        # Skipped symbols keep their indicators_ entries alive between runs
+        if unchanged:
+            cache.set_many({
+                f"indicators_{symbol}": indicators
+                for symbol, indicators in cached_indicators(unchanged).items()
+            }, 600)
+
         success_count = 0
-        for symbol in symbols:
+        for symbol in stale:
             try:
-                indicators = calculator.calculate_indicators(symbol)
+                indicators = calculator.calculate_indicators(
+                    symbol, fingerprint=fingerprints[symbol]
+                )
                 if indicators:
                     success_count += 1
                     cache.set(f"indicators_{symbol}", indicators, 600)
@@ -74,7 +114,10 @@ def calculate_technical_indicators(self):
                 logger.error(f"Error calculating indicators for {symbol}: {e}")
                 continue
         
-        return f"Calculated indicators for {success_count}/{len(symbols)} stocks"
+        return (
+            f"Calculated indicators for {success_count}/{len(stale)} changed stocks "
+            f"({skipped_count}/{len(symbols)} skipped, skip ratio {skip_ratio:.2f})"
+        )
         
     except Exception as exc:
         logger.error(f"Task failed: {exc}")
@@ -251,4 +294,43 @@ def populate_single_stock_history(self, symbol, period='1y'):
         
     except Exception as exc:
         logger.error(f"Task failed for {symbol}: {exc}")
-        raise exc
\ No newline at end of file
+        raise exc
+
+
+@shared_task(bind=True)
+def refresh_stock_detail_snapshot(self, symbol):
+    """Refresh a symbol's stock detail snapshot from upstream (stale-while-revalidate)"""
+    from services.market_data.stock_detail import refresh_stock_detail, refresh_lock_key
+    try:
+        refresh_stock_detail(symbol)
+        return f"Refreshed stock detail for {symbol}"
+    except Exception as exc:
+        logger.error(f"Stock detail refresh failed for {symbol}: {exc}")
+        return f"Failed to refresh stock detail for {symbol}"
+    finally:
+        cache.delete(refresh_lock_key(symbol))
+
+
+@shared_task
+def warm_return_matrix():
+    """Build the shared universe return matrix before analytics requests need it"""
+    from services.analytics.correlation import ReturnMatrixBuilding, get_return_matrix
+    try:
+        matrix = get_return_matrix()
+    except ReturnMatrixBuilding:
+        return "Return matrix is already being built"
+    if matrix is None:
+        return "No prices stored"
+    return f"Return matrix ready: {matrix['returns'].shape[1]} symbols x {matrix['returns'].shape[0]} days"
+
+
+@shared_task
+def rebuild_price_alert_index():
+    """Rebuild the watchlist price alert index from the database"""
+    from django.db.models import Q
+    from apps.portfolio.models import Watchlist
+    items = Watchlist.objects.filter(
+        Q(alert_price_above__isnull=False) | Q(alert_price_below__isnull=False)
+    ).only('id', 'user_id', 'stock_id', 'alert_price_above', 'alert_price_below')
+    count = PriceAlertEngine().rebuild(items.iterator())
+    return f"Indexed {count} price alerts"
@@ -1,55 +1,92 @@
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from apps.market.models import Stock, StockPrice, MarketScanResult
+from django.core.cache import cache
+from apps.market.models import MarketScanResult, ScanRun
 from services.market_data.scanner import MarketScanner
-from datetime import datetime
+from services.market_data.live_scanner import LiveMarketScanner
+from services.market_data.screener import invalidate_panel
+from services.market_data.scan_snapshot import (
+    build_scan_snapshot, render_snapshot, publish_scan_snapshot,
+    load_snapshot_data, diff_snapshots
+)
+from services.websocket.broadcaster import broadcast_scanner_delta
 
 logger = get_task_logger(__name__)
 
 @shared_task(bind=True)
 def run_market_scanner(self, timeframe='daily'):
     """Run market scanner"""
+    from django.utils import timezone
+    run = ScanRun.objects.create(timeframe=timeframe)
+
     try:
         scanner = MarketScanner()
         results = scanner.scan(timeframe=timeframe)
-        
+
         if not results:
             logger.warning(f"No scanner results for {timeframe}")
+            run.status = 'failed'
+            run.finished_at = timezone.now()
+            run.save(update_fields=['status', 'finished_at'])
             return f"No results for {timeframe}"
-        
-        # Save results
-        from django.utils import timezone
-        timestamp = timezone.now()
-        created_count = 0
-        
-        for result in results:
-            try:
-                MarketScanResult.objects.create(
-                    timestamp=timestamp,
-                    timeframe=timeframe,
-                    stock=result['stock'],
-                    price=result['price'],
-                    change=result['change'],
-                    change_percent=result['change_percent'],
-                    volume=result['volume'],
-                    avg_volume=result['avg_volume'],
-                    volume_ratio=result['volume_ratio'],
-                    is_unusual_volume=result['is_unusual_volume'],
-                    is_breakout=result['is_breakout'],
-                    is_gainer=result['is_gainer'],
-                    is_loser=result['is_loser'],
-                    trend=result['trend'],
-                    resistance=result.get('resistance'),
-                    support=result.get('support')
-                )
-                created_count += 1
-            
-            except Exception as e:
-                logger.error(f"Error saving scan result: {e}")
-                continue
-        
-        return f"Scanner completed: {created_count} results for {timeframe}"
-    
+
+        # Save all results of this run in one INSERT
+        MarketScanResult.objects.bulk_create([
+            MarketScanResult(
+                scan_run=run,
+                timeframe=timeframe,
+                stock_id=result['symbol'],
+                price=result['price'],
+                change=result['change'],
+                change_percent=result['change_percent'],
+                volume=result['volume'],
+                avg_volume=result['avg_volume'],
+                volume_ratio=result['volume_ratio'],
+                is_unusual_volume=result['is_unusual_volume'],
+                is_breakout=result['is_breakout'],
+                is_gainer=result['is_gainer'],
+                is_loser=result['is_loser'],
+                trend=result['trend'],
+                resistance=result.get('resistance'),
+                support=result.get('support')
+            )
+            for result in results
+        ], batch_size=1000)
+
+        run.status = 'completed'
+        run.finished_at = timezone.now()
+        run.result_count = len(results)
+        run.gainer_count = sum(1 for r in results if r['is_gainer'])
+        run.loser_count = sum(1 for r in results if r['is_loser'])
+        run.unusual_volume_count = sum(1 for r in results if r['is_unusual_volume'])
+        run.breakout_count = sum(1 for r in results if r['is_breakout'])
+        # Precompute the complete scanner response for this run
+        run.snapshot = render_snapshot(build_scan_snapshot(run, results))
+        run.save()
+
+        # The run is stored: publishing it must not mark it failed or re-run it
+        try:
+            publish_scan_snapshot(run)
+            cache.delete(f"market_scanner_{timeframe}")
+            invalidate_panel()
+
+            # Push only what changed since the previous run to subscribed clients
+            previous_run = ScanRun.objects.filter(
+                timeframe=timeframe,
+                status='completed'
+            ).exclude(pk=run.pk).order_by('-finished_at').first()
+            delta = diff_snapshots(load_snapshot_data(previous_run), load_snapshot_data(run))
+            broadcast_scanner_delta(timeframe, delta)
+
+            # Refresh volume baselines used by the intraday scanner
+            if timeframe == 'daily':
+                LiveMarketScanner().set_baselines(results)
+        except Exception as e:
+            logger.error(f"Publishing scanner run {run.pk} failed: {e}")
+
+        return f"Scanner run {run.pk} completed: {run.result_count} results for {timeframe}"
+
     except Exception as exc:
         logger.error(f"Scanner task failed: {exc}")
-        raise self.retry(exc=exc, countdown=300)
\ No newline at end of file
+        ScanRun.objects.filter(pk=run.pk).update(status='failed', finished_at=timezone.now())
+        raise self.retry(exc=exc, countdown=300)
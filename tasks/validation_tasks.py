@@ -4,7 +4,10 @@ Validation and cleanup tasks for the market data
 import logging
 from celery import shared_task
 from apps.market.models import Stock, StockPrice
-from services.market_data.resolver import _validate_symbol_has_data
+from django.core.cache import cache
+from services.market_data.resolver import (
+    _validate_symbol_has_data, symbol_check_key, SYMBOL_CHECK_TIMEOUT
+)
 from django.utils import timezone
 from datetime import timedelta
 
@@ -77,3 +80,17 @@ def validate_stock_data(symbol: str) -> bool:
     except Exception as e:
         logger.error(f"Error validating stock {symbol}: {e}")
         return False
+
+
+@shared_task
+def check_symbols_have_data(symbols):
+    """
+    Record whether search candidates have real market data, so the resolver
+    can rank them without calling yfinance on the request path.
+    Unlike validate_stock_data, nothing is removed.
+    """
+    results = {}
+    for symbol in symbols:
+        results[symbol_check_key(symbol)] = _validate_symbol_has_data(symbol)
+    cache.set_many(results, SYMBOL_CHECK_TIMEOUT)
+    return f"Checked {len(results)} symbols ({sum(1 for ok in results.values() if not ok)} without data)"
@@ -0,0 +1,50 @@
+"""
+Native async DRF views.
+
+DRF's APIView only dispatches sync handlers. AsyncAPIView keeps the same
+class attributes (authentication, permission, throttle and renderer classes)
+and the same Response / exception handling, but awaits `async def` handlers
+so a request waiting on an upstream service holds no worker thread. The
+request checks themselves (JWT user lookup, throttle counters) are sync and
+run in Django's sync thread.
+"""
+import asyncio
+from asgiref.sync import sync_to_async, iscoroutinefunction
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView whose handlers are coroutines (`async def get(...)` etc.)"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(),
+                                  self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Handlers are checked by Django's View; make sure the view is async
+        assert iscoroutinefunction(view), f'{cls.__name__} handlers must be async'
+        return view
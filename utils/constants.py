@@ -16,11 +16,33 @@ RSI_OVERBOUGHT = 70
 RSI_NEUTRAL_LOW = 40
 RSI_NEUTRAL_HIGH = 60
 
+# On-demand window indicators
+TRADING_DAYS_PER_YEAR = 252
+RISK_FREE_RATE = 0.04  # annual, for Sharpe ratios
+# Analytics lookback periods in calendar days (None = all stored history)
+ANALYTICS_PERIODS = {'6mo': 182, '1y': 365, '2y': 730, '5y': 1826, 'max': None}
+RETURN_MATRIX_LOOKBACK_DAYS = 730  # history kept in the shared universe return matrix
+RETURN_MATRIX_BUILD_TIMEOUT = 300  # seconds the build lock is held at most
+DEFAULT_CORRELATION_WINDOW = 60  # trading days
+MAX_CORRELATION_SYMBOLS = 100
+MAX_ROLLING_CORRELATION_SYMBOLS = 30
+MAX_INDICATOR_WINDOW = 1000
+MAX_INDICATOR_POINTS = 1000
+
+# Price history endpoint
+DEFAULT_HISTORY_POINTS = 1000
+MAX_HISTORY_POINTS = 5000
+MAX_HISTORY_PAGE_SIZE = 5000
+
+# Batch quotes
+MAX_BATCH_SYMBOLS = 300
+
 # Market scanner thresholds
 GAINER_THRESHOLD = 0.01  # 0.01% gain (very sensitive for demo)
 LOSER_THRESHOLD = -0.01  # 0.01% loss (very sensitive for demo)
 UNUSUAL_VOLUME_RATIO = 1.2  # 1.2x average volume
 BREAKOUT_THRESHOLD = 0.05  # 0.05% move (very sensitive for demo)
+LIVE_SCANNER_SESSION_TTL = 2 * 86400  # live scanner state is per session; keep one day past it
 
 # Subscription limits
 BASIC_DAILY_REQUESTS = 1000
@@ -31,12 +53,41 @@ BASIC_WATCHLIST_LIMIT = 50
 PREMIUM_WATCHLIST_LIMIT = 200
 PRO_WATCHLIST_LIMIT = 1000
 
+# Watchlist price alerts: a fired alert re-arms once the price is back this
+# fraction past its threshold, so a price hovering at the level fires once
+ALERT_REARM_MARGIN = 0.005
+# Cached positions of users streaming portfolio P&L, renewed by live connections
+PORTFOLIO_STREAM_TIMEOUT = 86400
+PORTFOLIO_STREAM_RENEW_INTERVAL = 3600
+
 # Cache timeouts (seconds)
 CACHE_TIMEOUT_SHORT = 60  # 1 minute
 CACHE_TIMEOUT_MEDIUM = 300  # 5 minutes
 CACHE_TIMEOUT_LONG = 3600  # 1 hour
 CACHE_TIMEOUT_DAY = 86400  # 24 hours
 
+# Stock detail snapshots (stale-while-revalidate)
+STOCK_DETAIL_SOFT_TTL = 300  # refresh in the background after 5 minutes
+STOCK_DETAIL_HARD_TTL = 7 * 86400  # keep serving the last snapshot for a week
+
+# Async views: in-flight calls per process and upstream (extra requests wait)
+ASYNC_CONCURRENCY_LIMITS = {
+    'yahoo': 64,
+    'newsapi': 16,
+    'blocking': 8,  # sync libraries (yfinance, TextBlob, LSTM) run in threads
+}
+ASYNC_UPSTREAM_TIMEOUT = 10  # seconds
+
+# Exchange listing files (import_symbol_universe): Yahoo suffix and currency
+LISTING_EXCHANGES = {
+    'NYSE': {'suffix': '', 'currency': 'USD'},
+    'NASDAQ': {'suffix': '', 'currency': 'USD'},
+    'NSE': {'suffix': '.NS', 'currency': 'INR'},
+    'BSE': {'suffix': '.BO', 'currency': 'INR'},
+    'LSE': {'suffix': '.L', 'currency': 'GBP'},
+}
+SYMBOL_IMPORT_BATCH_SIZE = 1000
+
 # Celery task settings
 CELERY_MAX_RETRIES = 3
 CELERY_RETRY_DELAY = 60  # seconds
@@ -45,6 +96,10 @@ CELERY_RETRY_DELAY = 60  # seconds
 LSTM_SEQUENCE_LENGTH = 60
 LSTM_PREDICTION_DAYS = 90
 ARIMA_ORDER = (5, 1, 0)
+AI_PREDICTION_CACHE_TIMEOUT = 3600  # same lifetime as cached yfinance history
+AI_PREDICTION_LOCK_TIMEOUT = 60
+AI_PREDICTION_WAIT_TIMEOUT = 30  # seconds a duplicate request waits for the first
+AI_PREDICTION_INSUFFICIENT_TIMEOUT = 60  # seconds a too-short history is remembered
 
 # Sentiment score ranges
 SENTIMENT_VERY_NEGATIVE = -0.8
@@ -0,0 +1,65 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read endpoints.
+
+Writers record a small version token per resource in the cache (the scan run
+id of a timeframe, a bump on every saved sentiment or prediction, a content
+hash of a stock detail snapshot). Views read it with one cache lookup, answer
+If-None-Match / If-Modified-Since with 304 before building any payload, and
+stamp the same validators on full responses.
+"""
+import hashlib
+import time
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def data_version_key(kind, key):
+    return f"data_version:{kind}:{key}"
+
+
+def set_data_version(kind, key, version, modified=None):
+    """Record the current version of a resource and when it last changed"""
+    record = {'version': str(version), 'modified': int(modified if modified is not None else time.time())}
+    cache.set(data_version_key(kind, key), record, None)
+    return record
+
+
+def bump_data_version(kind, key):
+    """Mark a resource as changed now"""
+    return set_data_version(kind, key, time.time_ns())
+
+
+def get_data_version(kind, key):
+    return cache.get(data_version_key(kind, key))
+
+
+async def aget_data_version(kind, key):
+    return await cache.aget(data_version_key(kind, key))
+
+
+def make_etag(*parts):
+    """Strong ETag over the parts that determine a representation"""
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def set_validators(response, etag, last_modified):
+    """Attach ETag / Last-Modified and require revalidation on every use"""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(request, etag, last_modified=None):
+    """Return a 304 (or 412) response when the client's validators match, else None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified) if last_modified is not None else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
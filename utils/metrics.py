@@ -0,0 +1,47 @@
+"""
+Lightweight metric helpers.
+
+Values are always stored in the cache under ``metrics:<name>`` so they can be
+read from any process (Celery workers and web workers do not share memory).
+When `prometheus_client` is installed the value is also exported as a Gauge.
+"""
+from django.core.cache import cache
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+_gauges = {}
+
+
+def _prometheus_gauge(name, description):
+    if name in _gauges:
+        return _gauges[name]
+    _gauges[name] = None
+    if prometheus_client is not None:
+        try:
+            _gauges[name] = prometheus_client.Gauge(name, description)
+        except ValueError:
+            # Already registered (e.g. module reloaded)
+            pass
+    return _gauges[name]
+
+
+def set_gauge(name, value, description=''):
+    """Record the current value of a gauge metric"""
+    try:
+        cache.set(f"metrics:{name}", value, None)
+    except Exception:
+        pass
+
+    gauge = _prometheus_gauge(name, description or name)
+    if gauge is not None:
+        try:
+            gauge.set(value)
+        except Exception:
+            pass
+
+
+def get_gauge(name, default=None):
+    """Read the last recorded value of a gauge metric"""
+    return cache.get(f"metrics:{name}", default)
@@ -1,72 +1,186 @@
 from __future__ import annotations
+import json
+from functools import lru_cache
 from typing import Any
-from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from utils.json_serializer import json_serializer
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import pyarrow
+    import pyarrow.ipc as pyarrow_ipc
+except ImportError:
+    pyarrow = pyarrow_ipc = None
 
+# Distinct keys seen across all responses are few; this bounds the cache anyway
+CAMEL_KEY_CACHE_SIZE = 4096
 
-def _snake_to_camel(s: str) -> str:
+
+@lru_cache(maxsize=CAMEL_KEY_CACHE_SIZE)
+def _convert_key(s: str) -> str:
     parts = s.split('_')
     return parts[0] + ''.join(p.title() for p in parts[1:]) if parts else s
 
 
+def _snake_to_camel(s: str) -> str:
+    # Keys without an underscore (already camelCase) convert to themselves
+    if '_' not in s:
+        return s
+    return _convert_key(s)
+
+
 def _transform(obj: Any) -> Any:
     """Recursively convert dict keys from snake_case to camelCase."""
     if isinstance(obj, dict):
-        new = {}
-        for k, v in obj.items():
-            new_key = _snake_to_camel(k) if isinstance(k, str) else k
-            new[new_key] = _transform(v)
-        return new
+        return {
+            (_snake_to_camel(k) if isinstance(k, str) else k): (
+                _transform(v) if isinstance(v, (dict, list)) else v
+            )
+            for k, v in obj.items()
+        }
     if isinstance(obj, list):
-        return [_transform(v) for v in obj]
+        return [_transform(v) if isinstance(v, (dict, list)) else v for v in obj]
     return obj
 
 
-class CamelCaseJSONRenderer(JSONRenderer):
-    """Render JSON with camelCase keys and wrap into ApiResponse shape.
+_drf_encoder = JSONEncoder()
+
+
+def _orjson_default(obj: Any) -> Any:
+    # Decimal, lazy strings, QuerySets etc. are encoded the way DRF's encoder does
+    return _drf_encoder.default(obj)
+
 
-    Behavior:
-    - If the view already returns an ApiResponse-shaped payload (has 'status' and 'data'), leave it as-is.
+def api_payload(data: Any, renderer_context: dict | None = None) -> dict:
+    """The ApiResponse envelope with camelCase keys, shared by every renderer.
+
+    - If the view already returns an ApiResponse-shaped payload (has 'status' and 'data'), keep its envelope.
     - Otherwise, convert keys to camelCase and wrap into { data, message, status }.
     - Preserve legacy 'success' boolean for backward compatibility.
     """
+    # If already shaped for frontend, don't re-wrap
+    if isinstance(data, dict) and 'status' in data and 'data' in data:
+        # still convert any nested keys to camelCase for consistency
+        data['data'] = _transform(data.get('data'))
+        return data
+
+    # Determine response status code
+    status_code = None
+    if renderer_context and renderer_context.get('response') is not None:
+        try:
+            status_code = int(getattr(renderer_context['response'], 'status_code', 200))
+        except Exception:
+            status_code = None
+
+    if status_code is not None and status_code >= 400:
+        return {
+            'data': None,
+            'message': '',
+            'status': 'error',
+            'errors': _transform(data),
+            'success': False,
+        }
+    return {
+        'data': _transform(data),
+        'message': '',
+        'status': 'success',
+        'success': True,
+    }
+
+
+class CamelCaseJSONRenderer(JSONRenderer):
+    """Render JSON with camelCase keys and wrap into ApiResponse shape (see api_payload)."""
 
     charset = 'utf-8'
 
+    def _dump(self, payload, accepted_media_type=None, renderer_context=None):
+        """Serialize with orjson when installed; indented output goes through DRF."""
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(payload, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            payload,
+            default=_orjson_default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
         # If no data (e.g., HTTP 204 No Content), let DRF handle it
         if data is None:
             return super().render(data, accepted_media_type, renderer_context)
+        return self._dump(api_payload(data, renderer_context), accepted_media_type, renderer_context)
+
+
+class MsgPackRenderer(BaseRenderer):
+    """Render the ApiResponse payload as MessagePack (Accept: application/msgpack).
+
+    Keys are camelCased exactly as in the JSON rendering.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(api_payload(data, renderer_context), default=json_serializer, use_bin_type=True)
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """Render a columnar price history as an Arrow IPC stream.
+
+    The `history` columns become the record batch; the rest of the payload is
+    attached as JSON in the schema metadata under `payload`, camelCased exactly
+    as in the JSON rendering. Responses without a history (errors) are an
+    empty stream carrying only the metadata.
+    """
+
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        payload = dict(api_payload(data, renderer_context))
+        body = payload.get('data')
+        history = {}
+        if isinstance(body, dict) and isinstance(body.get('history'), dict):
+            body = dict(body)
+            history = body.pop('history')
+            payload['data'] = body
+
+        arrays = {
+            't': pyarrow.array(history.get('t', []), type=pyarrow.int64()),
+            'o': pyarrow.array(history.get('o', []), type=pyarrow.float64()),
+            'h': pyarrow.array(history.get('h', []), type=pyarrow.float64()),
+            'l': pyarrow.array(history.get('l', []), type=pyarrow.float64()),
+            'c': pyarrow.array(history.get('c', []), type=pyarrow.float64()),
+            'v': pyarrow.array(history.get('v', []), type=pyarrow.int64()),
+        }
+        table = pyarrow.table(arrays).replace_schema_metadata({
+            'payload': json.dumps(payload, default=json_serializer)
+        })
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow_ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
 
-        # If already shaped for frontend, don't re-wrap
-        if isinstance(data, dict) and 'status' in data and 'data' in data:
-            # still convert any nested keys to camelCase for consistency
-            data['data'] = _transform(data.get('data'))
-            return super().render(data, accepted_media_type, renderer_context)
 
-        # Determine response status code
-        status_code = None
-        if renderer_context and renderer_context.get('response') is not None:
-            try:
-                status_code = int(getattr(renderer_context['response'], 'status_code', 200))
-            except Exception:
-                status_code = None
-
-        is_error = status_code is not None and status_code >= 400
-
-        if is_error:
-            payload = {
-                'data': None,
-                'message': '',
-                'status': 'error',
-                'errors': _transform(data),
-                'success': False,
-            }
-        else:
-            payload = {
-                'data': _transform(data),
-                'message': '',
-                'status': 'success',
-                'success': True,
-            }
-
-        return super().render(payload, accepted_media_type, renderer_context)
+def history_renderer_classes() -> list:
+    """Renderers for price-history endpoints; binary ones only when installed."""
+    renderers = [CamelCaseJSONRenderer]
+    if msgpack is not None:
+        renderers.append(MsgPackRenderer)
+    if pyarrow is not None and pyarrow_ipc is not None:
+        renderers.append(ArrowStreamRenderer)
+    return renderers